@@ -0,0 +1,16 @@
+"""
+Engine micro-benchmarks.
+
+Each benchmark sweeps its parameters (code distance, rounds, fault weight,
+shot count) over noiseless rotated surface-code circuits from
+``qec_zx_dataset.build_circuit`` and records per-call times as JSON. A stored
+run serves as a baseline: ``python -m benchmarks --baseline base.json`` fails
+when any matching point slowed down by more than the tolerance.
+"""
+
+from .suite import (BENCHMARKS, Benchmark, Comparison, benchmark, compare_results,
+                    load_results, run_suite, save_results, time_call)
+from . import cases  # noqa: F401  (registers the engine benchmarks)
+
+__all__ = ['BENCHMARKS', 'Benchmark', 'Comparison', 'benchmark', 'compare_results',
+           'load_results', 'run_suite', 'save_results', 'time_call']
@@ -0,0 +1,57 @@
+"""
+Run the engine benchmarks.
+
+    python -m benchmarks --quick                       # small sweep, print only
+    python -m benchmarks --output results/bench.json   # full sweep, save JSON
+    python -m benchmarks --quick --baseline results/bench_base.json --tolerance 0.3
+    python -m benchmarks --only propagate_final --d 3 5 7
+
+Exits with status 1 when --baseline is given and a point regressed.
+"""
+
+import argparse
+import sys
+
+from benchmarks import BENCHMARKS, compare_results, load_results, run_suite, save_results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SpiderTrace engine benchmarks")
+    parser.add_argument("--quick", action="store_true", help="small sweep (d=3,5)")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), metavar="NAME",
+                        help=f"benchmarks to run (default all): {', '.join(BENCHMARKS)}")
+    parser.add_argument("--d", nargs="+", type=int, help="override the distance sweep")
+    parser.add_argument("--shots", nargs="+", type=int, help="override the shot-count sweep")
+    parser.add_argument("--repeat", type=int, default=5, help="timed batches per point")
+    parser.add_argument("--min-time", type=float, default=0.1,
+                        help="seconds spent timing each point (split over --repeat)")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="compare against this results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.d:
+        overrides["d"] = args.d
+    if args.shots:
+        overrides["shots"] = args.shots
+    results = run_suite(args.only, quick=args.quick, overrides=overrides,
+                        repeat=args.repeat, min_time=args.min_time, log=print)
+    if args.output:
+        save_results(results, args.output)
+        print(f"wrote {len(results['results'])} results to {args.output}")
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), args.tolerance)
+        for r in regressions:
+            params = " ".join(f"{k}={v}" for k, v in r.params.items())
+            print(f"REGRESSION {r.name} {params}: {r.baseline * 1e3:.3f} ms -> "
+                  f"{r.current * 1e3:.3f} ms ({r.ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"no regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
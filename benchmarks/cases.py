@@ -0,0 +1,175 @@
+# engine benchmarks on noiseless rotated surface-code memory circuits
+
+from functools import lru_cache
+
+import numpy as np
+
+from benchmarks.suite import benchmark
+from spidertrace.circuit import Gate
+from spidertrace.compiled import OP_ARITY, OPCODES, CompiledCircuit, compile_stim_program
+from spidertrace.dem import sweep_error_model
+from spidertrace.distance import fault_distance, with_location_noise
+from spidertrace.engine import (apply_gate_rules, propagate_errors, propagate_errors_batch,
+                                propagate_final)
+from spidertrace.error import PauliError
+from spidertrace.lightcone import LightConeIndex
+from spidertrace.loader import load_stim_program
+from spidertrace.parallel import propagate_sharded
+from spidertrace.sampler import FrameSampler
+from spidertrace.schedule import LayeredCircuit, schedule_layers
+from spidertrace.spread import fault_spread
+
+DISTANCES = [3, 5, 7, 9, 11, 13, 15]
+
+
+@lru_cache(maxsize=None)
+def surface_program(d: int, rounds: int) -> CompiledCircuit:
+    """Noiseless d x d memory program with ``rounds`` rounds (built once per size)."""
+    import qec_zx_dataset as qzx
+
+    return compile_stim_program(qzx.build_circuit(d, 0.0, rounds=rounds).without_noise())
+
+
+@lru_cache(maxsize=None)
+def surface_layers(d: int, rounds: int) -> LayeredCircuit:
+    return schedule_layers(surface_program(d, rounds))
+
+
+def _info(program: CompiledCircuit) -> dict:
+    return {"gates": len(program), "qubits": program.num_qubits}
+
+
+def _faults(program: CompiledCircuit, weight: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    qubits = rng.choice(program.num_qubits, size=min(weight, program.num_qubits), replace=False)
+    return [PauliError(int(q), "XYZ"[rng.integers(3)]) for q in qubits]
+
+
+def _codes(program: CompiledCircuit, shots: int, weight: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    codes = np.zeros((shots, program.num_qubits), dtype=np.uint8)
+    rows = np.repeat(np.arange(shots), weight)
+    codes[rows, rng.integers(0, program.num_qubits, len(rows))] = rng.integers(1, 4, len(rows))
+    return codes
+
+
+@benchmark("load_stim_program", "gates",
+           grid={"d": DISTANCES, "rounds": [4, 16]},
+           quick={"d": [3, 5], "rounds": [4]})
+def bench_load_stim_program(d, rounds):
+    """Parsing .stim text straight into a compiled program."""
+    import qec_zx_dataset as qzx
+
+    lines = str(qzx.build_circuit(d, 0.001, rounds=rounds)).splitlines()
+    program = surface_program(d, rounds)
+    return (lambda: load_stim_program(lines)), len(program), _info(program)
+
+
+@benchmark("propagate_errors", "gates",
+           grid={"d": DISTANCES, "rounds": [1, 4, 16], "weight": [1, 4, 16]},
+           quick={"d": [3, 5], "rounds": [1, 4], "weight": [1, 4]})
+def bench_propagate_errors(d, rounds, weight):
+    """Full per-gate trace over a Gate list (the dict engine)."""
+    program = surface_program(d, rounds)
+    gates, errors = program.gates(), _faults(program, weight)
+    return (lambda: propagate_errors(gates, errors)), len(gates), _info(program)
+
+
+@benchmark("propagate_errors_compiled", "gates",
+           grid={"d": DISTANCES, "rounds": [1, 4, 16], "weight": [1, 4, 16]},
+           quick={"d": [3, 5], "rounds": [1, 4], "weight": [1, 4]})
+def bench_propagate_errors_compiled(d, rounds, weight):
+    """Full per-gate trace over the opcode arrays."""
+    program = surface_program(d, rounds)
+    errors = _faults(program, weight)
+    return (lambda: propagate_errors(program, errors)), len(program), _info(program)
+
+
+@benchmark("propagate_final", "gates",
+           grid={"d": DISTANCES, "rounds": [1, 4, 16], "weight": [1, 4, 16]},
+           quick={"d": [3, 5], "rounds": [1, 4], "weight": [1, 4]})
+def bench_propagate_final(d, rounds, weight):
+    """Final frame only, visiting the fault's forward light cone."""
+    program = surface_program(d, rounds)
+    errors = _faults(program, weight)
+    # the index is built once per circuit, as callers propagating many faults do
+    lightcone = LightConeIndex.from_circuit(program)
+
+    def run():
+        return propagate_final(program, errors, lightcone=lightcone)
+
+    return run, len(program), _info(program)
+
+
+@benchmark("apply_gate_rules", "gates",
+           grid={"gate": ["H", "CNOT", "CZ", "R", "S", "SWAP"], "weight": [1, 16, 64]},
+           quick={"gate": ["H", "CNOT"], "weight": [1, 16]})
+def bench_apply_gate_rules(gate, weight):
+    """One dict-frame gate update; the frame holds ``weight`` non-identity qubits."""
+    n = 2 * max(weight, 2)
+    rng = np.random.default_rng(0)
+    frame = {int(q): "XYZ"[rng.integers(3)] for q in rng.choice(n, weight, replace=False)}
+    arity = OP_ARITY[OPCODES[gate]]
+    gates = [Gate(gate, tuple(int(q) for q in rng.choice(n, arity, replace=False)))
+             for _ in range(256)]
+
+    def run():
+        for g in gates:
+            apply_gate_rules(g, frame)
+
+    return run, len(gates), {"qubits": n}
+
+
+@benchmark("propagate_errors_batch", "shots",
+           grid={"d": DISTANCES, "shots": [64, 1024, 16384], "weight": [1, 4]},
+           quick={"d": [3, 5], "shots": [64, 1024], "weight": [1]})
+def bench_propagate_errors_batch(d, shots, weight):
+    """Bit-sliced batch propagation, one vectorized step per gate layer."""
+    layered = surface_layers(d, d)
+    program = layered.compiled
+    codes = _codes(program, shots, weight)
+    return (lambda: propagate_errors_batch(layered, codes)), shots, _info(program)
+
+
+@benchmark("propagate_sharded", "shots",
+           grid={"d": DISTANCES, "shots": [1024, 16384]},
+           quick={"d": [3], "shots": [1024]})
+def bench_propagate_sharded(d, shots):
+    """Faults injected at random positions, run in-process (workers=1)."""
+    program = surface_program(d, d)
+    codes = _codes(program, shots, 1)
+    starts = np.random.default_rng(1).integers(0, len(program), shots)
+    return ((lambda: propagate_sharded(program, codes, starts, workers=1)),
+            shots, _info(program))
+
+
+@benchmark("frame_sampler", "shots",
+           grid={"d": DISTANCES, "shots": [1024, 16384], "p": [0.001, 0.01]},
+           quick={"d": [3], "shots": [1024], "p": [0.01]})
+def bench_frame_sampler(d, shots, p):
+    """Noisy sampling of detectors and observables with build_circuit noise."""
+    import qec_zx_dataset as qzx
+
+    sampler = FrameSampler(qzx.build_circuit(d, p))
+    return (lambda: sampler.sample(shots, seed=0)), shots, _info(sampler.program)
+
+
+@benchmark("fault_spread", "faults",
+           grid={"d": DISTANCES, "rounds": [1, 4]},
+           quick={"d": [3, 5], "rounds": [1]})
+def bench_fault_spread(d, rounds):
+    """Weights and hook flags of every single fault (backward sweep included)."""
+    program = surface_program(d, rounds)
+    faults = 3 * (len(program) + int((program.q1 >= 0).sum()))
+    return (lambda: fault_spread(program)), faults, _info(program)
+
+
+@benchmark("fault_distance", "mechanisms",
+           grid={"d": [3, 5, 7]},
+           quick={"d": [3]})
+def bench_fault_distance(d):
+    """Circuit-level distance of a d-round memory circuit (error model prebuilt)."""
+    import qec_zx_dataset as qzx
+
+    model = sweep_error_model(with_location_noise(qzx.build_circuit(d, 0.0).without_noise()))
+    return (lambda: fault_distance(model)), len(model), {"detectors": model.num_detectors}
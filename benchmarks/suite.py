@@ -0,0 +1,175 @@
+# benchmark registry, timing loop, JSON results and baseline comparison
+
+import itertools
+import json
+import platform
+import statistics
+import sys
+import time
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+# format version of the results file; bumped when fields change meaning
+SCHEMA = 1
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Callable          # setup(**params) -> (zero-arg callable, work units per call, info)
+    grid: Dict[str, list]    # full sweep
+    quick: Dict[str, list]   # small sweep for --quick and tests
+    unit: str                # what one work unit is (gates, shots, faults, ...)
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, unit: str, grid: Dict[str, list],
+              quick: Optional[Dict[str, list]] = None):
+    """
+    Registers ``setup`` as benchmark ``name``.
+
+    setup(**params) builds its inputs outside the timed region and returns
+    ``(fn, units, info)``: a zero-argument callable to time, the amount of
+    work one call does in ``unit`` (so results also report a throughput), and
+    a dict of derived sizes (gate and qubit counts) stored with the result.
+    The benchmark runs once per point of the cartesian product of ``grid``.
+    New engine paths are added by registering one more function.
+    """
+    def register(setup):
+        BENCHMARKS[name] = Benchmark(name, setup, grid, quick or grid, unit)
+        return setup
+    return register
+
+
+def time_call(fn: Callable, repeat: int = 5, min_time: float = 0.1) -> dict:
+    """
+    Times fn with an auto-calibrated inner loop.
+
+    ``number`` is doubled until one batch of calls takes at least
+    min_time / repeat; the batch is then run ``repeat`` times.
+    returns: per-call seconds as median / best, plus repeat and number
+    """
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time / repeat or number >= 1 << 20:
+            break
+        number *= 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return {"seconds": statistics.median(samples), "best": min(samples),
+            "repeat": repeat, "number": number}
+
+
+def _points(grid: Dict[str, list]) -> Iterable[dict]:
+    keys = list(grid)
+    for values in itertools.product(*(grid[k] for k in keys)):
+        yield dict(zip(keys, values))
+
+
+def run_suite(names: Optional[Iterable[str]] = None, quick: bool = False,
+              overrides: Optional[Dict[str, list]] = None, repeat: int = 5,
+              min_time: float = 0.1, log: Optional[Callable[[str], None]] = None) -> dict:
+    """
+    Runs the registered benchmarks and returns a JSON-serializable results dict.
+
+    names: benchmark names to run (default all)
+    quick: use each benchmark's small sweep
+    overrides: replace the values of a swept parameter wherever it appears,
+               e.g. ``{"d": [3, 5]}``
+    """
+    if names is None:
+        names = list(BENCHMARKS)
+    results = []
+    for name in names:
+        if name not in BENCHMARKS:
+            raise KeyError(f"unknown benchmark {name!r}; have {sorted(BENCHMARKS)}")
+        bench = BENCHMARKS[name]
+        grid = dict(bench.quick if quick else bench.grid)
+        for key, values in (overrides or {}).items():
+            if key in grid:
+                grid[key] = list(values)
+        for params in _points(grid):
+            fn, units, info = bench.setup(**params)
+            timing = time_call(fn, repeat, min_time)
+            row = {"name": name, "params": params, "info": info, "unit": bench.unit,
+                   "units": units, **timing,
+                   "throughput": units / timing["seconds"] if timing["seconds"] else None}
+            results.append(row)
+            if log is not None:
+                log(format_row(row))
+    return {"schema": SCHEMA, "meta": environment(quick), "results": results}
+
+
+def environment(quick: bool = False) -> dict:
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "quick": quick,
+    }
+
+
+def format_row(row: dict) -> str:
+    params = " ".join(f"{k}={v}" for k, v in row["params"].items())
+    rate = row["throughput"]
+    rate = f"{rate:12.4g} {row['unit']}/s" if rate else ""
+    return f"{row['name']:<26} {params:<32} {row['seconds'] * 1e3:10.3f} ms {rate}"
+
+
+def _key(row: dict) -> str:
+    return row["name"] + json.dumps(row["params"], sort_keys=True)
+
+
+class Comparison(NamedTuple):
+    name: str
+    params: dict
+    baseline: float
+    current: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current / self.baseline
+
+
+def compare_results(current: dict, baseline: dict, tolerance: float = 0.25
+                    ) -> List[Comparison]:
+    """
+    Benchmarks present in both runs whose median slowed down by more than
+    ``tolerance`` (0.25 = 25%). Points missing from either side are ignored.
+    """
+    if baseline.get("schema") != current.get("schema"):
+        raise ValueError(f"results schema {current.get('schema')} does not match "
+                         f"baseline schema {baseline.get('schema')}")
+    old = {_key(row): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        base = old.get(_key(row))
+        if base is None or not base["seconds"]:
+            continue
+        comparison = Comparison(row["name"], row["params"], base["seconds"], row["seconds"])
+        if comparison.ratio > 1 + tolerance:
+            regressions.append(comparison)
+    return regressions
+
+
+def save_results(results: dict, path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=1)
+        f.write("\n")
+
+
+def load_results(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
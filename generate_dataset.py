@@ -21,13 +21,23 @@ import numpy as np
 import stim
 
 from spidertrace.circuit import Gate
-from spidertrace.engine import propagate_errors
+from spidertrace.compiled import OP_ARITY, OP_NAMES, STIM_OPCODES, compile_stim_circuit
+from spidertrace.engine import PropagationCache, propagate_errors_batch, propagate_final
 from spidertrace.error import PauliError
+from spidertrace.frame import PAULI_CODES
+from spidertrace.optimize import optimize_circuit
+from spidertrace.schedule import schedule_layers
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
 log = logging.getLogger(__name__)
 
 PAULI_TO_INT = {"I": 0, "X": 1, "Z": 2, "Y": 3}
+# spidertrace batch codes (0=I 1=X 2=Y 3=Z) -> PAULI_TO_INT encoding
+CODE_TO_PAULI_INT = np.array([PAULI_TO_INT[c] for c in PAULI_CODES], dtype=np.uint8)
+
+# At low p almost every shot is one of a few hundred one- or two-qubit fault
+# sets; each distinct set is propagated once per circuit across all calls.
+PROPAGATION_CACHE = PropagationCache(maxsize=1 << 16)
 
 
 # ─── Step 1: Surface code circuit helpers ────────────────────────────────────
@@ -107,21 +117,20 @@ def sample_shots(d, p, n_shots):
 # ─── Step 3: ZX feature vectors ──────────────────────────────────────────────
 
 def _stim_to_spider_gates(stim_circuit: stim.Circuit) -> list:
-    """Extract H / CNOT / CZ instructions from a Stim circuit as SpiderTrace Gates."""
+    """Extract the unitary Clifford instructions of a Stim circuit as SpiderTrace Gates."""
     gates = []
     for instr in stim_circuit:
         if not isinstance(instr, stim.CircuitInstruction):
             continue
-        name = instr.name
+        op = STIM_OPCODES.get(instr.name)
+        if op is None:
+            continue
         qubits = [t.qubit_value for t in instr.targets_copy() if t.is_qubit_target]
-        if name == "H":
-            gates.extend(Gate("H", (q,)) for q in qubits)
-        elif name in ("CNOT", "CX"):
+        if OP_ARITY[op] == 1:
+            gates.extend(Gate(OP_NAMES[op], (q,)) for q in qubits)
+        else:
             for i in range(0, len(qubits) - 1, 2):
-                gates.append(Gate("CNOT", (qubits[i], qubits[i + 1])))
-        elif name == "CZ":
-            for i in range(0, len(qubits) - 1, 2):
-                gates.append(Gate("CZ", (qubits[i], qubits[i + 1])))
+                gates.append(Gate(OP_NAMES[op], (qubits[i], qubits[i + 1])))
     return gates
 
 
@@ -144,13 +153,12 @@ def get_zx_features(
         return vec
 
     errors = [PauliError(q, pl) for q, pl in fault_locations]
-    gates = _stim_to_spider_gates(stim_circuit)
-    trace = propagate_errors(gates, errors)
+    # only the final frame is read: walk just the fault's forward light cone
+    final = propagate_final(compile_stim_circuit(stim_circuit), errors, cache=PROPAGATION_CACHE)
 
-    if trace:
-        for qubit, pauli in trace[-1].errors_after.items():
-            if qubit in qubit_to_idx:
-                vec[qubit_to_idx[qubit]] = PAULI_TO_INT.get(pauli, 0)
+    for qubit, pauli in final.items():
+        if qubit in qubit_to_idx:
+            vec[qubit_to_idx[qubit]] = PAULI_TO_INT.get(pauli, 0)
 
     return vec
 
@@ -169,11 +177,12 @@ def generate_dataset(d: int, p: float, n_shots: int, output_dir: str):
     out_dir.mkdir(parents=True, exist_ok=True)
 
     noiseless = _noiseless_circuit(d)
-    spider_gates = _stim_to_spider_gates(noiseless)
+    compiled = compile_stim_circuit(noiseless)
+    # redundant basis-change Hadamards are removed once, not per shot
+    layered = schedule_layers(optimize_circuit(compiled))
 
     log.info("d=%d p=%.4f  sampling %d shots ...", d, p, n_shots)
     shots, data_qubits = sample_shots(d, p, n_shots)
-    qubit_to_idx = {q: i for i, q in enumerate(data_qubits)}
     n_data = len(data_qubits)
     n_detectors = shots[0][0].shape[0]
 
@@ -181,34 +190,26 @@ def generate_dataset(d: int, p: float, n_shots: int, output_dir: str):
     zx_arr = np.zeros((n_shots, n_data), dtype=np.uint8)
     logical_arr = np.zeros(n_shots, dtype=np.uint8)
 
-    non_trivial = skipped = 0
+    # One row of initial Pauli codes per shot, then a single batched pass
+    # through the circuit (one bit lane per shot, one vectorized step per
+    # layer of qubit-disjoint gates) instead of a Python loop calling
+    # propagate_errors once per shot.
+    num_qubits = max([compiled.num_qubits - 1] + data_qubits) + 1
+    initial = np.zeros((n_shots, num_qubits), dtype=np.uint8)
 
     for i, (syndrome_bits, fault_locations, logical_flip) in enumerate(shots):
         syndrome_arr[i] = syndrome_bits
         logical_arr[i] = logical_flip
+        for qubit, pauli in fault_locations:
+            initial[i, qubit] = PAULI_CODES.index(pauli)
 
-        if fault_locations:
-            non_trivial += 1
-            try:
-                errors = [PauliError(q, pl) for q, pl in fault_locations]
-                trace = propagate_errors(spider_gates, errors)
-                if trace:
-                    for qubit, pauli in trace[-1].errors_after.items():
-                        if qubit in qubit_to_idx:
-                            zx_arr[i, qubit_to_idx[qubit]] = PAULI_TO_INT.get(pauli, 0)
-            except Exception as exc:
-                log.warning("Shot %d SpiderTrace error: %s", i, exc)
-                skipped += 1
-
-        if (i + 1) % 5000 == 0:
-            log.info(
-                "  d=%d p=%.4f  %d/%d shots | non-trivial=%d skipped=%d",
-                d, p, i + 1, n_shots, non_trivial, skipped,
-            )
+    non_trivial = int(initial.any(axis=1).sum())
+    final = propagate_errors_batch(layered, initial, num_qubits, cache=PROPAGATION_CACHE)
+    zx_arr[:] = CODE_TO_PAULI_INT[final[:, data_qubits]]
 
     log.info(
-        "d=%d p=%.4f  done — shots=%d  non-trivial=%d  skipped=%d",
-        d, p, n_shots, non_trivial, skipped,
+        "d=%d p=%.4f  done — shots=%d  non-trivial=%d  %r",
+        d, p, n_shots, non_trivial, PROPAGATION_CACHE,
     )
 
     out_path = out_dir / f"d{d}_p{p:.4f}.npz"
@@ -41,8 +41,11 @@ engine; everything else is unchanged.
 Caveat on sub-tick timing: the reference injects a fault at its ``tick_offset``
 (layer boundary). For 2-qubit *gate* faults that occur mid-layer, exact
 propagation depends on within-layer position; SpiderTrace, which knows the exact
-gate, is authoritative there. Use the reference to unit-test SpiderTrace on
-before-round data faults (clean layer boundaries) where the two MUST agree.
+gate, is authoritative there. ``BasisImageZXPropagator`` resolves each error
+location to its exact position between operations (``propagate_location``), so
+a gate fault is injected right after its gate and a reset fault right after its
+reset. Use the reference to unit-test SpiderTrace on before-round data faults
+(clean layer boundaries) where the two MUST agree.
 
 Verified against stim 1.16.0.
 """
@@ -85,6 +88,11 @@ class ZXPropagator:
                   tick_offset: int) -> stim.PauliString:
         raise NotImplementedError
 
+    def propagate_location(self, qubits: Sequence[int], paulis: Sequence[int],
+                           location: stim.CircuitErrorLocation) -> stim.PauliString:
+        """Propagate a fault at a stim error location; defaults to its tick."""
+        return self.propagate(qubits, paulis, location.tick_offset)
+
 
 class ReferenceZXPropagator(ZXPropagator):
     """Reference propagator via stim.FlipSimulator. Use to validate SpiderTrace.
@@ -121,99 +129,178 @@ class ReferenceZXPropagator(ZXPropagator):
 class SpiderTraceAdapter(ZXPropagator):
     """ZXPropagator backed by SpiderTrace's Pauli propagation engine.
 
-    Reuses ``_stim_to_spider_gates`` (from generate_dataset.py) for the
-    H / CNOT / CZ conversion, and drives ``spidertrace.engine.propagate_errors``
-    over the gate layers that follow the injection point.
-
-    Resets are modelled directly with stim's Z-basis reset rule: ``R`` / ``MR``
-    discard the X-like component of the frame and keep the Z-like component
-    (X -> I, Y -> Z, Z -> Z). This is how an X-type ancilla fault gets
-    "explained away" at the next reset -- matching ``stim.FlipSimulator``. The
-    trailing ``M`` (no reset) is ignored so data-qubit frames persist to the
-    final frame. These are exactly the conditions under which the reference and
-    SpiderTrace MUST agree, per the module docstring.
+    Compiles the noiseless circuit ONCE with
+    ``spidertrace.repeat.compile_stim_loops``, keeping its REPEAT blocks: each
+    loop body becomes one program of gates, resets and measurements (plus
+    TICK positions), compiled once however many rounds it runs.
+    ``spidertrace.repeat.propagate_loops`` drives
+    ``spidertrace.engine.propagate_final`` over each segment from the
+    injection point, and stops iterating a loop body as soon as the frame
+    becomes periodic, so ``rounds = 100`` costs about as much as
+    ``rounds = d``.
+
+    Resets follow stim's rule natively: ``R`` / ``MR`` discard the X-like
+    component of the frame and keep the Z-like component (X -> I, Y -> Z,
+    Z -> Z), ``RX`` / ``MRX`` the mirror image. This is how an X-type ancilla
+    fault gets "explained away" at the next reset -- matching
+    ``stim.FlipSimulator``. Measurements without reset leave the frame alone,
+    so data-qubit frames persist to the final frame. These are exactly the
+    conditions under which the reference and SpiderTrace MUST agree, per the
+    module docstring.
 
     The injection seam matches ReferenceZXPropagator: a fault at ``tick_offset``
-    T is acted on by precisely the operations whose "tick bucket" (number of
-    TICKs already seen) is >= T -- i.e. everything after the T-th TICK.
+    T is acted on by precisely the operations after the T-th TICK.
+
+    The loops run over the qubits the circuit actually uses, renumbered
+    0..k-1 (``spidertrace.compact.QubitMap``, kept as ``qubits``), so frames
+    and tables are sized by k instead of the largest stim qubit index; faults
+    and results are mapped at the ``propagate`` boundary.
+
+    ``program`` is the flattened single program (with detector records) in
+    the original numbering, compiled on first use for the position-based
+    propagators.
     """
 
     def __init__(self, circuit: stim.Circuit):
         # Lazy imports so users of the reference path don't need spidertrace.
-        from generate_dataset import _stim_to_spider_gates
+        from spidertrace.compact import QubitMap
+        from spidertrace.repeat import compile_stim_loops
 
         self.N = circuit.num_qubits
-        # Ordered event stream over the NOISELESS circuit. Each event is
-        # (tick_bucket, "gates", [Gate, ...]) or (tick_bucket, "reset", [q, ...]).
-        self._events: list = []
-        instrs = list(circuit.without_noise().flattened())
-        self.num_ticks = sum(1 for i in instrs if i.name == "TICK")
-
-        tick = 0
-        pending = stim.Circuit()        # run of consecutive H/CNOT/CZ instrs
-        pending_tick = 0
-
-        def flush():
-            if len(pending) > 0:
-                gates = _stim_to_spider_gates(pending)
-                if gates:
-                    self._events.append((pending_tick, "gates", gates))
-
-        for inst in instrs:
-            name = inst.name
-            if name == "TICK":
-                flush()
-                pending = stim.Circuit()
-                tick += 1
-                pending_tick = tick
-            elif name in ("H", "CX", "CNOT", "CZ"):
-                if len(pending) == 0:
-                    pending_tick = tick
-                pending.append(inst)
-            elif name in ("R", "MR"):
-                # Reset clears the frame on its targets. Flush gates first so
-                # ordering (gates-then-reset within a tick) is preserved.
-                flush()
-                pending = stim.Circuit()
-                qs = [t.qubit_value for t in inst.targets_copy() if t.is_qubit_target]
-                self._events.append((tick, "reset", qs))
-            # M (no reset), DETECTOR, OBSERVABLE_INCLUDE, QUBIT_COORDS: no frame effect.
-        flush()
+        self._noiseless = circuit.without_noise()
+        loops = compile_stim_loops(self._noiseless, num_qubits=self.N)
+        self.qubits = QubitMap(loops.used_qubits(), self.N)
+        self.loops = loops.remap(self.qubits)
+        self.num_ticks = self.loops.num_ticks
+        self._program = None
+
+    @property
+    def program(self):
+        if self._program is None:
+            from spidertrace.compiled import compile_stim_program
+
+            self._program = compile_stim_program(self._noiseless, num_qubits=self.N)
+        return self._program
+
+    def tick_position(self, tick_offset: int) -> int:
+        """Position in ``program`` where tick bucket ``tick_offset`` starts."""
+        if tick_offset <= 0:
+            return 0
+        return int(self.program.ticks[min(tick_offset, self.num_ticks) - 1])
+
+    def _propagate_compact(self, qubits, paulis, run) -> stim.PauliString:
+        # unused qubits are never acted on: their part of the fault is final
+        errors, final = self.qubits.split({q: PAULI_CHAR[pl] for q, pl in zip(qubits, paulis)})
+        final.update(self.qubits.to_original(run(errors)))
+        return _frame_to_pauli_string(final, self.N)
+
+    def propagate(self, qubits, paulis, tick_offset) -> stim.PauliString:
+        from spidertrace.repeat import propagate_loops
+
+        return self._propagate_compact(
+            qubits, paulis, lambda errors: propagate_loops(self.loops, errors, tick_offset))
+
+
+class TableauZXPropagator(SpiderTraceAdapter):
+    """ZXPropagator backed by GF(2) tableaux (``spidertrace.repeat.LoopTableaux``).
+
+    Uses the same loop program as SpiderTraceAdapter (same reset model,
+    same injection seam), then compiles in one backward sweep per loop body
+    the GF(2) map from every tick of the body to its end, plus the body's
+    powers B^(2^j) by repeated squaring. ``propagate`` is then an XOR of one
+    table row per faulted X/Z component for each of a handful of maps, so the
+    per-DEM-error cost in ``build_fault_tables`` depends neither on circuit
+    depth nor on the number of rounds.
+    """
+
+    def __init__(self, circuit: stim.Circuit):
+        from spidertrace.repeat import LoopTableaux
+
+        super().__init__(circuit)
+        self._tableaux = LoopTableaux(self.loops)
 
     def propagate(self, qubits, paulis, tick_offset) -> stim.PauliString:
-        from spidertrace.engine import propagate_errors
-        from spidertrace.error import PauliError
+        return self._propagate_compact(
+            qubits, paulis, lambda errors: self._tableaux.propagate(errors, tick_offset))
+
+
+class BasisImageZXPropagator(SpiderTraceAdapter):
+    """ZXPropagator backed by a per-position basis-image table
+    (``spidertrace.tableau.BasisImageTable``).
+
+    Same program and reset model as SpiderTraceAdapter, but the table holds
+    the final-frame image of X and Z on every qubit before every operation,
+    not just at TICK boundaries. ``propagate`` keeps the tick seam;
+    ``propagate_location`` injects the fault at its exact position: the
+    number of program operations (H targets, CX / CZ pairs, reset and
+    measurement targets) executed before the noise instruction that produced
+    it. A ``DEPOLARIZE2`` after a
+    ``CX`` layer is therefore NOT pushed through that layer, and an
+    ``X_ERROR`` after ``MR`` survives into the next round.
+    """
+
+    def __init__(self, circuit: stim.Circuit):
+        from spidertrace.tableau import BasisImageTable
+
+        super().__init__(circuit)
+        # over the compact qubit range, like the loop program
+        self._table = BasisImageTable(self.qubits.apply(self.program))
+        self._positions = _instruction_positions(circuit)
+
+    def propagate(self, qubits, paulis, tick_offset) -> stim.PauliString:
+        return self._propagate_compact(
+            qubits, paulis, lambda errors: self._table.propagate_tick(errors, tick_offset))
+
+    def propagate_at(self, qubits, paulis, position: int) -> stim.PauliString:
+        """Final frame of a fault injected before program operation ``position``."""
+        return self._propagate_compact(
+            qubits, paulis, lambda errors: self._table.propagate(errors, position))
+
+    def location_position(self, location: stim.CircuitErrorLocation) -> int:
+        key = tuple((f.instruction_offset, f.iteration_index) for f in location.stack_frames)
+        return self._positions[key]
 
-        # current Pauli frame: qubit -> "X"/"Y"/"Z"
-        errors = {q: PAULI_CHAR[pl] for q, pl in zip(qubits, paulis)}
+    def propagate_location(self, qubits, paulis, location) -> stim.PauliString:
+        return self.propagate_at(qubits, paulis, self.location_position(location))
 
-        for ev_tick, kind, payload in self._events:
-            if ev_tick < tick_offset:
+
+def _instruction_positions(circuit: stim.Circuit) -> dict:
+    """Maps every instruction's stim stack-frame path to its frame position.
+
+    The path is ((instruction_offset, iteration_index), ...) from the outermost
+    block inwards, as in ``CircuitErrorLocation.stack_frames``; the position is
+    the number of program operations (one per one-qubit gate, reset and
+    measurement target, one per two-qubit pair) executed before the
+    instruction: its index in SpiderTraceAdapter's compiled program.
+    """
+    from spidertrace.compiled import OP_ARITY, STIM_PROGRAM_OPCODES
+
+    positions = {}
+    count = 0
+
+    def walk(block, prefix, iteration):
+        nonlocal count
+        for offset, inst in enumerate(block):
+            key = prefix + ((offset, iteration),)
+            if isinstance(inst, stim.CircuitRepeatBlock):
+                for it in range(inst.repeat_count):
+                    walk(inst.body_copy(), key, it)
                 continue
-            if kind == "reset":
-                # Z-basis reset (R / MR -> |0>): the X-like component
-                # anticommutes with the prepared state and is discarded; the
-                # Z-like component commutes and survives in the frame. So
-                # X -> I, Y -> Z, Z -> Z (matches stim.FlipSimulator exactly).
-                for q in payload:
-                    t = errors.get(q)
-                    if t == "X":
-                        errors.pop(q)
-                    elif t == "Y":
-                        errors[q] = "Z"
-                    # t == "Z" or None: unchanged
-            else:  # "gates"
-                if not errors:
-                    continue
-                err_list = [PauliError(q, t) for q, t in errors.items()]
-                trace = propagate_errors(payload, err_list)
-                if trace:
-                    errors = dict(trace[-1].errors_after)
-
-        ps = stim.PauliString(self.N)
-        for q, t in errors.items():
-            ps[q] = PAULI_CHAR.index(t)   # "X"->1, "Y"->2, "Z"->3
-        return ps
+            positions[key] = count
+            op = STIM_PROGRAM_OPCODES.get(inst.name)
+            if op is not None:
+                qubits = sum(1 for t in inst.targets_copy() if t.is_qubit_target)
+                count += qubits if OP_ARITY[op] == 1 else qubits // 2
+
+    walk(circuit, (), 0)
+    return positions
+
+
+def _frame_to_pauli_string(errors: dict, N: int) -> stim.PauliString:
+    ps = stim.PauliString(N)
+    for q, t in errors.items():
+        ps[q] = PAULI_CHAR.index(t)   # "X"->1, "Y"->2, "Z"->3
+    return ps
 
 
 # --------------------------------------------------------------------------- #
@@ -227,6 +314,7 @@ class FaultTables:
     zx_pauli: List[stim.PauliString]      # length num_errors, over num_qubits
     detector_coords: np.ndarray           # (num_detectors, 3) -> [x, y, t]
     num_detectors: int
+    qubits: Optional[np.ndarray] = None   # stim qubit of each column; None = all
 
 
 def build_fault_tables(circuit: stim.Circuit,
@@ -272,18 +360,108 @@ def build_fault_tables(circuit: stim.Circuit,
 
         # zx: same fault propagated to final frame (via SpiderTrace / reference)
         if qubits:
-            zx_pauli.append(propagator.propagate(qubits, paulis, loc.tick_offset))
+            zx_pauli.append(propagator.propagate_location(qubits, paulis, loc))
         else:
             zx_pauli.append(stim.PauliString(N))
 
-    # detector coords -> (num_detectors, 3)
+    coords = _detector_coords(circuit)
+    return FaultTables(N, ne, raw_pauli, zx_pauli, coords, len(coords)), sampler
+
+
+def build_native_fault_tables(circuit: stim.Circuit,
+                              propagator: Optional[BasisImageZXPropagator] = None,
+                              compact: bool = False
+                              ) -> Tuple[FaultTables, stim.CompiledDemSampler]:
+    """Same tables as ``build_fault_tables``, without stim's DEM or its error
+    explanation.
+
+    The detector error model comes from SpiderTrace's reverse-time sweep
+    (``spidertrace.dem.sweep_error_model``). Each merged error already carries
+    a representative fault and its exact position, so the zx table is one
+    ``BasisImageZXPropagator.propagate_at`` lookup per error. The sampler is
+    compiled from that model, so column i is error i by construction. The
+    model is equal to stim's ``detector_error_model(decompose_errors=False)``
+    up to error order and float rounding; the representative Paulis may differ
+    from stim's choice.
+
+    With ``compact=True`` the Pauli strings (and so the targets built from
+    them) cover only the qubits the circuit uses, in increasing stim index;
+    ``FaultTables.qubits`` lists those indices.
+    """
+    from spidertrace.dem import sweep_error_model
+    from spidertrace.frame import unpack_bits
+
+    model = sweep_error_model(circuit)
+    if propagator is None:
+        propagator = BasisImageZXPropagator(circuit)
+    if model.num_positions != propagator._table.num_positions:
+        raise ValueError("error model and program positions do not align")
+    sampler = model.to_stim().compile_sampler()
+    table, qubit_map = propagator._table, propagator.qubits
+    N = qubit_map.num_qubits if compact else circuit.num_qubits
+
+    # packed final images of all representatives (over the table's compact
+    # qubits), unpacked in one go
+    raw_pauli: List[stim.PauliString] = []
+    images = np.zeros((len(model), table.images.shape[-1]), dtype=np.uint64)
+    for i, (fault, position) in enumerate(zip(model.faults, model.positions.tolist())):
+        local = qubit_map.to_compact(fault)
+        raw_pauli.append(_frame_to_pauli_string(local if compact else fault, N))
+        xs = [q for q, t in local.items() if t in ("X", "Y")]
+        zs = [q for q, t in local.items() if t in ("Z", "Y")]
+        images[i] = table.image_bits(xs, zs, position)   # empty for measurement flips
+    if not compact:
+        images = qubit_map.bits_to_original(images)
+    bits = unpack_bits(images, 2 * N).astype(bool)
+    zx_pauli = [stim.PauliString.from_numpy(xs=b[:N], zs=b[N:]) for b in bits]
+
+    coords = _detector_coords(circuit)
+    qubits = qubit_map.used.copy() if compact else None
+    return FaultTables(N, len(model), raw_pauli, zx_pauli, coords, len(coords), qubits), sampler
+
+
+def _detector_coords(circuit: stim.Circuit) -> np.ndarray:
+    """Detector coordinates -> (num_detectors, 3) [x, y, t]."""
     coord_map = circuit.get_detector_coordinates()
     nd = circuit.num_detectors
     coords = np.zeros((nd, 3), dtype=np.float32)
     for di, c in coord_map.items():
         coords[di, :len(c)] = c[:3]
+    return coords
 
-    return FaultTables(N, ne, raw_pauli, zx_pauli, coords, nd), sampler
+
+def code_stabilizers(circuit: stim.Circuit,
+                     qubits: Optional[Sequence[int]] = None) -> np.ndarray:
+    """Stabilizer generators of the state at readout, as (k, 2N) X-then-Z bits.
+
+    Runs the noiseless circuit up to its final data measurement (M or MX) in a
+    ``stim.TableauSimulator`` and takes the canonical stabilizers (signs
+    dropped): the code's plaquettes, the reset ancillas' single-qubit
+    stabilizers and the prepared logical operator. Two final frames differing
+    by one of these give the same measurement record. With ``qubits`` (e.g.
+    ``FaultTables.qubits`` of compact tables) only the subgroup supported on
+    those qubits is kept, with columns in that order.
+    """
+    from spidertrace.gf2 import rref
+
+    N = circuit.num_qubits
+    instructions = list(circuit.without_noise().flattened())
+    readout = max(i for i, inst in enumerate(instructions) if inst.name in ("M", "MX"))
+    sim = stim.TableauSimulator()
+    sim.set_num_qubits(N)
+    for inst in instructions[:readout]:
+        sim.do(inst)
+    rows = [ps.to_numpy() for ps in sim.canonical_stabilizers()]
+    bits = np.array([np.concatenate([xs, zs]) for xs, zs in rows], dtype=np.uint8)
+    if qubits is None:
+        return bits
+    qubits = np.asarray(qubits, dtype=np.int64)
+    cols = np.concatenate([qubits, N + qubits])
+    # eliminate on the dropped qubits first: the rows left have no support there
+    dropped = np.setdiff1d(np.arange(2 * N), cols)
+    basis, pivots = rref(bits, np.concatenate([dropped, cols]))
+    keep = ~basis[:, dropped].any(axis=1)
+    return basis[keep][:, cols]
 
 
 # --------------------------------------------------------------------------- #
@@ -434,12 +612,18 @@ def shot_node_features(dem_graph: DemGraph, fired_detectors: np.ndarray) -> np.n
 # --------------------------------------------------------------------------- #
 def sample_tuples(circuit: stim.Circuit, tables: FaultTables,
                   sampler: stim.CompiledDemSampler, num_shots: int,
-                  k_edges: int = 6, seed: Optional[int] = None):
+                  k_edges: int = 6, seed: Optional[int] = None, reducer=None):
     """Yields dicts of numpy arrays. Convert to torch_geometric.data.Data downstream.
 
     Graph topology is the fixed DEM-derived decoding graph (built once); only the
     per-detector ``fired`` node feature changes per shot. Targets and labels are
     unchanged (the single source of truth is the non-decomposed DEM sampler).
+
+    ``reducer`` (a ``spidertrace.gf2.StabilizerReducer`` over the tables'
+    qubits, e.g. from ``code_stabilizers``) puts every ``zx_target`` in its
+    stabilizer-canonical form, so fault sets whose final frames differ by a
+    stabilizer get the same target. The frames of all shots are accumulated
+    and reduced as one batch.
     """
     # ---- THE single source of truth ----
     dets, obs, errs = sampler.sample(
@@ -448,6 +632,8 @@ def sample_tuples(circuit: stim.Circuit, tables: FaultTables,
     )
     N = tables.num_qubits
     dem_graph = build_dem_graph(circuit)            # fixed topology, built once
+    if reducer is not None:
+        zx_codes = _canonical_codes(errs, tables.zx_pauli, N, reducer)
     ei = dem_graph.edge_index
     ea = dem_graph.edge_attr
     for s in range(num_shots):
@@ -455,7 +641,11 @@ def sample_tuples(circuit: stim.Circuit, tables: FaultTables,
         fired_dets = np.where(dets[s])[0]
 
         raw_t = _accumulate_onehot(None, fired_cols, tables.raw_pauli, N)
-        zx_t = _accumulate_onehot(None, fired_cols, tables.zx_pauli, N)
+        if reducer is None:
+            zx_t = _accumulate_onehot(None, fired_cols, tables.zx_pauli, N)
+        else:
+            zx_t = np.zeros((N, 4), dtype=np.float32)
+            zx_t[np.arange(N), zx_codes[s]] = 1.0
         x = shot_node_features(dem_graph, fired_dets)
         y = int(obs[s, 0])
 
@@ -465,6 +655,26 @@ def sample_tuples(circuit: stim.Circuit, tables: FaultTables,
         }
 
 
+def _canonical_codes(errs: np.ndarray, table: List[stim.PauliString], N: int,
+                     reducer) -> np.ndarray:
+    """Per-shot product of the fired table rows, stabilizer-reduced -> (shots, N) codes."""
+    from spidertrace.frame import _XZ_TO_CODE, pack_bits, unpack_bits
+
+    rows = [ps.to_numpy() for ps in table]
+    packed = pack_bits(np.array([np.concatenate([xs, zs]) for xs, zs in rows], dtype=np.uint8))
+    # GF(2) product of the fired rows: XOR of the packed rows over each shot's
+    # fired errors, so memory follows the number of fired errors, not
+    # shots x num_errors
+    shot, err = np.nonzero(errs)
+    frames = np.zeros((len(errs), packed.shape[1]), dtype=np.uint64)
+    if len(err):
+        fired = np.unique(shot)
+        starts = np.searchsorted(shot, fired)
+        frames[fired] = np.bitwise_xor.reduceat(packed[err], starts, axis=0)
+    reduced = unpack_bits(reducer.reduce(frames), 2 * N)
+    return _XZ_TO_CODE[reduced[:, :N] + 2 * reduced[:, N:]].astype(np.int64)
+
+
 # --------------------------------------------------------------------------- #
 # 7. PyG wrapper
 # --------------------------------------------------------------------------- #
@@ -488,19 +698,27 @@ def to_pyg_list(tuples_iter):
 
 def make_dataloader(d: int, p: float, num_shots: int, batch_size: int = 256,
                     rounds: Optional[int] = None, k_edges: int = 6,
-                    propagator: Optional[ZXPropagator] = None, shuffle: bool = True):
+                    propagator: Optional[ZXPropagator] = None, shuffle: bool = True,
+                    canonical: bool = False):
     """End-to-end: build circuit -> tables -> sample -> PyG DataLoader.
 
     Pass propagator=SpiderTraceAdapter(circuit) to use your engine instead of
-    the reference. The same loader serves all three models:
+    the reference (or TableauZXPropagator(circuit) for the table-driven path). The same loader serves all three models:
         GNN-A   ignores raw_target and zx_target (trains on y only)
         GNN-Raw uses raw_target as the auxiliary head's target
         GNN-ZX  uses zx_target  as the auxiliary head's target
+
+    ``canonical=True`` reduces each zx_target modulo the code's stabilizers
+    (see ``sample_tuples``).
     """
     from torch_geometric.loader import DataLoader
     circ = build_circuit(d, p, rounds=rounds)
     tables, sampler = build_fault_tables(circ, propagator=propagator)
-    tuples = sample_tuples(circ, tables, sampler, num_shots, k_edges=k_edges)
+    reducer = None
+    if canonical:
+        from spidertrace.gf2 import StabilizerReducer
+        reducer = StabilizerReducer(code_stabilizers(circ, tables.qubits), tables.num_qubits)
+    tuples = sample_tuples(circ, tables, sampler, num_shots, k_edges=k_edges, reducer=reducer)
     data_list = to_pyg_list(tuples)
     return DataLoader(data_list, batch_size=batch_size, shuffle=shuffle), tables
 
@@ -522,13 +740,14 @@ def _data_qubits(circuit: stim.Circuit) -> List[int]:
 
 
 def validate_adapter(d: int = 3, p: float = 0.02, n_trials: int = 50,
-                     seed: int = 0) -> Tuple[int, int]:
-    """Compare SpiderTraceAdapter to ReferenceZXPropagator on random single-qubit
-    data faults across random tick offsets (clean layer boundaries, where the
-    two MUST agree). Prints a match count and any mismatch details."""
+                     seed: int = 0, adapter_cls=None) -> Tuple[int, int]:
+    """Compare SpiderTraceAdapter (or ``adapter_cls``, e.g. TableauZXPropagator)
+    to ReferenceZXPropagator on random single-qubit data faults across random
+    tick offsets (clean layer boundaries, where the two MUST agree). Prints a
+    match count and any mismatch details."""
     circ = build_circuit(d, p)
     ref = ReferenceZXPropagator(circ)
-    adapter = SpiderTraceAdapter(circ)
+    adapter = (adapter_cls or SpiderTraceAdapter)(circ)
     N = circ.num_qubits
     data = _data_qubits(circ)
     rng = np.random.default_rng(seed)
@@ -546,7 +765,8 @@ def validate_adapter(d: int = 3, p: float = 0.02, n_trials: int = 50,
         else:
             mismatches.append((q, PAULI_CHAR[pl], tick, r, a))
 
-    print(f"SpiderTrace adapter validation: {matches}/{n_trials} match")
+    print(f"SpiderTrace adapter validation ({type(adapter).__name__}): "
+          f"{matches}/{n_trials} match")
     for q, plc, tick, r, a in mismatches:
         diff = {i: (PAULI_CHAR[r[i]], PAULI_CHAR[a[i]])
                 for i in range(N) if r[i] != a[i]}
@@ -598,4 +818,6 @@ if __name__ == "__main__":
     # ---- SpiderTrace adapter validations ----
     print("\n--- SpiderTrace adapter validation ---")
     validate_adapter(d=d, p=p, n_trials=50, seed=0)
+    validate_adapter(d=d, p=p, n_trials=50, seed=0, adapter_cls=TableauZXPropagator)
+    validate_adapter(d=d, p=p, n_trials=50, seed=0, adapter_cls=BasisImageZXPropagator)
     validate_divergence_rate(d=d, p=p, shots=shots, target=0.856, tol=0.05)
\ No newline at end of file
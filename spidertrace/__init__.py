@@ -1,10 +1,46 @@
 from .circuit import Gate
 from .error import PauliError
-from .engine import propagate_errors, TraceStep
+from .frame import PauliFrame, BatchFrame
+from .clifford import CliffordGate, CLIFFORD_GATES
+from .compiled import CompiledCircuit, compile_circuit, compile_stim_circuit, compile_stim_program
+from .loader import load_stim_program, iter_stim_chunks
+from .schedule import LayeredCircuit, schedule_layers
+from .optimize import optimize_circuit
+from .compact import QubitMap, compact_qubits
+from .gf2 import StabilizerReducer, rref
+from .trace import DeltaTrace
+from .lightcone import LightConeIndex
+from .tableau import Tableau, SuffixTableaux, BasisImageTable
+from .spread import SpreadTable, fault_spread
+from .dem import ErrorModel, sweep_error_model
+from .distance import DistanceResult, fault_distance
+from .parallel import propagate_sharded
+from .sampler import FrameSampler
+from .incremental import IncrementalTrace
+from .instrument import Instrumentation
+from .repeat import LoopProgram, RepeatBlock, LoopTableaux, compile_stim_loops, propagate_loops
+from .engine import (propagate_errors, propagate_frame, propagate_errors_batch,
+                     propagate_final, detector_flips, PropagationCache, instrumented,
+                     TraceStep)
 from .zx_visual import (draw_trace_step, visualize_trace, save_diagram, 
                        draw_circuit_only, draw_initial_errors, visualize_complete_trace, 
                        save_complete_visualization)
 
-__all__ = ['Gate', 'PauliError', 'propagate_errors', 'TraceStep', 'draw_trace_step', 
+__all__ = ['Gate', 'PauliError', 'PauliFrame', 'BatchFrame', 'CliffordGate', 'CLIFFORD_GATES',
+           'propagate_errors',
+           'propagate_frame', 'propagate_errors_batch', 'CompiledCircuit', 'compile_circuit',
+           'compile_stim_circuit', 'compile_stim_program', 'load_stim_program', 'iter_stim_chunks',
+           'detector_flips', 'LayeredCircuit',
+           'schedule_layers', 'optimize_circuit', 'QubitMap', 'compact_qubits',
+           'StabilizerReducer', 'rref',
+           'DeltaTrace', 'propagate_final', 'PropagationCache', 'LightConeIndex',
+           'IncrementalTrace', 'Instrumentation', 'instrumented',
+           'Tableau', 'SuffixTableaux', 'BasisImageTable', 'ErrorModel', 'sweep_error_model',
+           'propagate_sharded',
+           'SpreadTable', 'fault_spread',
+           'FrameSampler',
+           'DistanceResult', 'fault_distance',
+           'LoopProgram', 'RepeatBlock', 'LoopTableaux', 'compile_stim_loops', 'propagate_loops',
+           'TraceStep', 'draw_trace_step', 
            'visualize_trace', 'save_diagram', 'draw_circuit_only', 'draw_initial_errors',
            'visualize_complete_trace', 'save_complete_visualization']
\ No newline at end of file
@@ -4,8 +4,8 @@ from dataclasses import dataclass
 
 @dataclass
 class Gate:
-    name: str   #"H", "CNOT", or "CZ"
-    qubits: tuple[int]  #tuple of qubit indices; length=1 for H and 2 for CNOT/CZ
+    name: str   #"H", "CNOT", "CZ", another Clifford ("S", "SWAP", "CY", ... see spidertrace.clifford), or a reset/measurement ("R", "M", "MR", "RX", "MX", "MRX")
+    qubits: tuple[int]  #tuple of qubit indices; length=1 for one-qubit gates and 2 for CNOT/CZ/SWAP/...
     
 
     """
@@ -0,0 +1,116 @@
+# generic one- and two-qubit Cliffords as precomputed symplectic action tables
+
+from typing import Dict, List, NamedTuple, Sequence
+
+import numpy as np
+
+# Images of the local basis under conjugation, signs dropped (a frame ignores
+# phases). One-qubit gates list the images of X and Z; two-qubit gates the
+# images of X_a, Z_a, X_b, Z_b, written as a two-character Pauli string over
+# (a, b). Names follow stim. H, CNOT and CZ keep their dedicated kernels and
+# are not listed; aliases are in spidertrace.compiled.GATE_ALIASES.
+CLIFFORD_IMAGES = {
+    # Paulis act trivially on a frame
+    "I": ("X", "Z"),
+    "X": ("X", "Z"),
+    "Y": ("X", "Z"),
+    "Z": ("X", "Z"),
+    "H_XY": ("Y", "Z"),
+    "H_YZ": ("X", "Y"),
+    "H_NXY": ("Y", "Z"),
+    "H_NXZ": ("Z", "X"),
+    "H_NYZ": ("X", "Y"),
+    "S": ("Y", "Z"),
+    "S_DAG": ("Y", "Z"),
+    "SQRT_X": ("X", "Y"),
+    "SQRT_X_DAG": ("X", "Y"),
+    "SQRT_Y": ("Z", "X"),
+    "SQRT_Y_DAG": ("Z", "X"),
+    "C_XYZ": ("Y", "X"),
+    "C_ZYX": ("Z", "Y"),
+    "C_NXYZ": ("Y", "X"),
+    "C_XNYZ": ("Y", "X"),
+    "C_XYNZ": ("Y", "X"),
+    "C_NZYX": ("Z", "Y"),
+    "C_ZNYX": ("Z", "Y"),
+    "C_ZYNX": ("Z", "Y"),
+    "II": ("XI", "ZI", "IX", "IZ"),
+    "SWAP": ("IX", "IZ", "XI", "ZI"),
+    "CY": ("XY", "ZI", "ZX", "ZZ"),
+    "CXSWAP": ("XX", "IZ", "XI", "ZZ"),
+    "SWAPCX": ("IX", "ZZ", "XX", "ZI"),
+    "CZSWAP": ("ZX", "IZ", "XZ", "ZI"),
+    "ISWAP": ("ZY", "IZ", "YZ", "ZI"),
+    "ISWAP_DAG": ("ZY", "IZ", "YZ", "ZI"),
+    "SQRT_XX": ("XI", "YX", "IX", "XY"),
+    "SQRT_XX_DAG": ("XI", "YX", "IX", "XY"),
+    "SQRT_YY": ("ZY", "XY", "YZ", "YX"),
+    "SQRT_YY_DAG": ("ZY", "XY", "YZ", "YX"),
+    "SQRT_ZZ": ("YZ", "ZI", "ZY", "IZ"),
+    "SQRT_ZZ_DAG": ("YZ", "ZI", "ZY", "IZ"),
+    "XCX": ("XI", "ZX", "IX", "XZ"),
+    "XCY": ("XI", "ZY", "XX", "XZ"),
+    "XCZ": ("XI", "ZZ", "XX", "IZ"),
+    "YCX": ("XX", "ZX", "IX", "YZ"),
+    "YCY": ("XY", "ZY", "YX", "YZ"),
+    "YCZ": ("XZ", "ZZ", "YX", "IZ"),
+}
+
+# local symplectic bits of a one-qubit Pauli, as (x, z)
+_BITS = {"I": (0, 0), "X": (1, 0), "Y": (1, 1), "Z": (0, 1)}
+# Pauli code (0=I 1=X 2=Y 3=Z) of local bits, indexed by x + 2*z
+_CODE = np.array([0, 1, 3, 2], dtype=np.uint8)
+
+
+class CliffordGate(NamedTuple):
+    """
+    Action of a Clifford on the local frame bits v = (x_a, z_a[, x_b, z_b]).
+
+    matrix: (2k, 2k) 0/1 array with v' = matrix @ v; column j is the image
+            of basis vector j
+    table: (4**k,) Pauli code -> image code, codes 0=I 1=X 2=Y 3=Z and
+           4 * code_a + code_b for pairs; the dict-frame engine's lookup
+    """
+    name: str
+    arity: int
+    matrix: np.ndarray
+    table: np.ndarray
+
+
+def clifford_gate(name: str, images: Sequence[str]) -> CliffordGate:
+    """Builds the matrix and the code table from the basis images."""
+    arity = len(images[0])
+    matrix = np.array([[bit for p in image for bit in _BITS[p]] for image in images],
+                      dtype=np.uint8).T
+    codes = np.arange(4 ** arity)
+    # local bits of every input code, then the images
+    digits = [(codes >> (2 * (arity - 1 - k))) & 3 for k in range(arity)]
+    v = np.stack([bits for d in digits for bits in (np.isin(d, (1, 2)), np.isin(d, (2, 3)))])
+    out = matrix.astype(np.int64) @ v.astype(np.int64) % 2
+    table = np.zeros(len(codes), dtype=np.uint8)
+    for k in range(arity):
+        table = table * 4 + _CODE[out[2 * k] + 2 * out[2 * k + 1]]
+    for arr in (matrix, table):
+        arr.flags.writeable = False
+    return CliffordGate(name, arity, matrix, table)
+
+
+CLIFFORD_GATES: Dict[str, CliffordGate] = {
+    name: clifford_gate(name, images) for name, images in CLIFFORD_IMAGES.items()}
+
+
+def mix_rows(matrix: np.ndarray, rows: Sequence) -> List:
+    """
+    out[j] = XOR of rows[i] over the set bits matrix[j, i].
+
+    Forward propagation of x / z rows uses the gate's matrix; backward sweeps
+    (tableau prepends, detector sensitivities) use its transpose, because the
+    row of basis vector j becomes the XOR of the rows of j's image.
+    """
+    out = []
+    for j in range(len(matrix)):
+        acc = None
+        for i in np.flatnonzero(matrix[j]):
+            acc = rows[i].copy() if acc is None else acc ^ rows[i]
+        out.append(np.zeros_like(rows[0]) if acc is None else acc)
+    return out
@@ -0,0 +1,121 @@
+# qubit compaction: renumber the qubits a circuit uses to a contiguous range
+
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from spidertrace.compiled import CompiledCircuit, compile_circuit
+from spidertrace.frame import pack_bits, unpack_bits
+
+
+class QubitMap:
+    """
+    Bijection between the qubits a circuit uses and 0..num_qubits-1.
+
+    used[k]: original index of compact qubit k (increasing)
+    index[q]: compact index of original qubit q, -1 if q is unused
+    num_original: width of the original numbering (max index + 1)
+
+    Stim's rotated surface code leaves many indices unused (26 of which 17
+    are used at d=3), so frames, tableaux and tables built over the compact
+    range are smaller; results are mapped back with ``to_original`` /
+    ``codes_to_original`` / ``bits_to_original`` at the boundary.
+    """
+
+    __slots__ = ("used", "index", "num_original")
+
+    def __init__(self, used: Iterable[int], num_original: Optional[int] = None):
+        self.used = np.unique(np.asarray(list(used), dtype=np.int32))
+        if num_original is None:
+            num_original = int(self.used[-1]) + 1 if len(self.used) else 0
+        self.num_original = num_original
+        self.index = np.full(num_original, -1, dtype=np.int32)
+        self.index[self.used] = np.arange(len(self.used), dtype=np.int32)
+
+    @property
+    def num_qubits(self) -> int:
+        return len(self.used)
+
+    def compact(self, q: int) -> int:
+        """Compact index of original qubit q; ValueError if the circuit never uses it."""
+        k = int(self.index[q]) if 0 <= q < self.num_original else -1
+        if k < 0:
+            raise ValueError(f"qubit {q} is not used by the compacted circuit")
+        return k
+
+    def to_compact(self, errors: Dict[int, str]) -> Dict[int, str]:
+        """``{qubit: pauli}`` frame in original numbering -> compact numbering."""
+        return {self.compact(q): p for q, p in errors.items()}
+
+    def split(self, errors: Dict[int, str]) -> Tuple[Dict[int, str], Dict[int, str]]:
+        """(compact frame of the used qubits, untouched rest in original numbering).
+
+        No operation acts on an unused qubit, so that part of a fault is
+        already final.
+        """
+        compact, rest = {}, {}
+        for q, p in errors.items():
+            k = int(self.index[q]) if 0 <= q < self.num_original else -1
+            if k < 0:
+                rest[q] = p
+            else:
+                compact[k] = p
+        return compact, rest
+
+    def to_original(self, errors: Dict[int, str]) -> Dict[int, str]:
+        """``{qubit: pauli}`` frame in compact numbering -> original numbering."""
+        used = self.used
+        return {int(used[k]): p for k, p in errors.items()}
+
+    def codes_to_original(self, codes: np.ndarray) -> np.ndarray:
+        """(..., num_qubits) Pauli codes -> (..., num_original), identity elsewhere."""
+        codes = np.asarray(codes, dtype=np.uint8)
+        out = np.zeros(codes.shape[:-1] + (self.num_original,), dtype=np.uint8)
+        out[..., self.used] = codes
+        return out
+
+    def bits_to_original(self, packed: np.ndarray) -> np.ndarray:
+        """Packed X-then-Z frames over the compact range -> over the original range."""
+        n, m = self.num_qubits, self.num_original
+        bits = unpack_bits(packed, 2 * n)
+        out = np.zeros(bits.shape[:-1] + (2 * m,), dtype=np.uint8)
+        out[..., self.used] = bits[..., :n]
+        out[..., m + self.used] = bits[..., n:]
+        return pack_bits(out)
+
+    def apply(self, compiled: CompiledCircuit) -> CompiledCircuit:
+        """The same program over compact qubit indices (annotations are kept)."""
+        q1 = compiled.q1
+        remapped = np.where(q1 >= 0, self.index[np.maximum(q1, 0)], -1)
+        if (self.index[compiled.q0] < 0).any() or (remapped[q1 >= 0] < 0).any():
+            raise ValueError("circuit uses qubits outside this map")
+        return CompiledCircuit(compiled.opcode, self.index[compiled.q0], remapped,
+                               self.num_qubits, compiled.ticks, compiled.detectors,
+                               compiled.observables)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, QubitMap):
+            return NotImplemented
+        return self.num_original == other.num_original and np.array_equal(self.used, other.used)
+
+    def __repr__(self) -> str:
+        return f"QubitMap({self.num_qubits} of {self.num_original} qubits)"
+
+
+def used_qubits(compiled: CompiledCircuit) -> np.ndarray:
+    """Sorted original indices of the qubits any operation touches."""
+    q1 = compiled.q1
+    return np.unique(np.concatenate([compiled.q0, q1[q1 >= 0]]))
+
+
+def compact_qubits(circuit_sequence, num_qubits: Optional[int] = None
+                   ) -> Tuple[CompiledCircuit, QubitMap]:
+    """
+    Compiles a Gate list (or takes a CompiledCircuit) and renumbers the qubits
+    it uses to 0..k-1, in increasing order of their original index.
+
+    returns: (compact CompiledCircuit, QubitMap back to the original numbering)
+    """
+    compiled = compile_circuit(circuit_sequence, num_qubits)
+    qubit_map = QubitMap(used_qubits(compiled), compiled.num_qubits)
+    return qubit_map.apply(compiled), qubit_map
@@ -0,0 +1,277 @@
+# compiled circuits: flat integer opcode arrays instead of Gate objects
+
+import hashlib
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from spidertrace.circuit import Gate
+from spidertrace.clifford import CLIFFORD_GATES, CliffordGate
+
+OP_H = 0
+OP_CNOT = 1
+OP_CZ = 2
+# resets and measurements, Z basis then X basis. A Z-basis reset discards the
+# X component of the frame (X -> I, Y -> Z); a Z-basis measurement leaves the
+# frame alone and is flipped by X / Y. MR is a measurement followed by a reset.
+OP_R = 3
+OP_M = 4
+OP_MR = 5
+OP_RX = 6
+OP_MX = 7
+OP_MRX = 8
+
+OPCODES = {"H": OP_H, "CNOT": OP_CNOT, "CZ": OP_CZ,
+           "R": OP_R, "M": OP_M, "MR": OP_MR, "RX": OP_RX, "MX": OP_MX, "MRX": OP_MRX}
+# every other one- and two-qubit Clifford (S, SWAP, CY, SQRT_X, ...) is applied
+# generically from its action table in spidertrace.clifford; opcodes follow
+# the built-ins in CLIFFORD_GATES order
+CLIFFORD_OPS: Dict[int, CliffordGate] = {}
+for _k, (_name, _gate) in enumerate(CLIFFORD_GATES.items()):
+    OPCODES[_name] = OP_MRX + 1 + _k
+    CLIFFORD_OPS[OP_MRX + 1 + _k] = _gate
+del _k, _name, _gate
+OP_NAMES = {op: name for name, op in OPCODES.items()}
+OP_ARITY = {op: 2 if op in (OP_CNOT, OP_CZ) else 1 for op in OP_NAMES}
+OP_ARITY.update({op: gate.arity for op, gate in CLIFFORD_OPS.items()})
+MEASURE_OPS = frozenset((OP_M, OP_MR, OP_MX, OP_MRX))
+# other spellings of the same gates, accepted wherever a gate name is
+GATE_ALIASES = {"CX": "CNOT", "ZCX": "CNOT", "ZCY": "CY", "ZCZ": "CZ", "H_XZ": "H",
+                "SQRT_Z": "S", "SQRT_Z_DAG": "S_DAG", "SWAPCZ": "CZSWAP"}
+
+# stim gate names understood by compile_stim_circuit
+STIM_OPCODES = {"H": OP_H, "CNOT": OP_CNOT, "CZ": OP_CZ}
+STIM_OPCODES.update({name: OPCODES[name] for name in CLIFFORD_GATES})
+STIM_OPCODES.update({alias: OPCODES[name] for alias, name in GATE_ALIASES.items()})
+# ... and additionally by compile_stim_program
+STIM_PROGRAM_OPCODES = dict(STIM_OPCODES, R=OP_R, M=OP_M, MR=OP_MR,
+                            RX=OP_RX, MX=OP_MX, MRX=OP_MRX)
+_STIM_ANNOTATIONS = {"TICK", "QUBIT_COORDS", "SHIFT_COORDS", "DETECTOR", "OBSERVABLE_INCLUDE"}
+
+
+class CompiledCircuit:
+    """
+    Immutable, hashable Gate sequence stored as three flat arrays.
+
+    opcode[i]: OP_H / OP_CNOT / OP_CZ, or a reset / measurement (OP_R ...)
+    q0[i], q1[i]: qubit operands; q1 is -1 for single-qubit gates
+
+    Programs compiled from whole stim circuits (compile_stim_program) also
+    carry the annotations that do not act on the frame:
+    ticks[k]: number of operations before the k-th TICK
+    detectors[k], observables[k]: measurement indices (in program order) whose
+    parity forms detector / observable k
+
+    ``key`` is a digest of the arrays, so two compilations of the same gate
+    sequence compare and hash equal. It is stable across processes and can be
+    used as a cache key for anything derived from the circuit.
+
+    Example
+        compiled = compile_circuit([Gate("H", (0,)), Gate("CNOT", (0, 1))])
+        propagate_frame(compiled, errors)
+    """
+
+    __slots__ = ("opcode", "q0", "q1", "num_qubits", "ticks", "detectors", "observables",
+                 "_key", "_lists", "_measurements")
+
+    def __init__(self, opcode, q0, q1, num_qubits: Optional[int] = None, ticks=(),
+                 detectors: Sequence[Tuple[int, ...]] = (),
+                 observables: Sequence[Tuple[int, ...]] = ()):
+        self.opcode = np.array(opcode, dtype=np.uint8)
+        self.q0 = np.array(q0, dtype=np.int32)
+        self.q1 = np.array(q1, dtype=np.int32)
+        if not (len(self.opcode) == len(self.q0) == len(self.q1)):
+            raise ValueError("opcode, q0 and q1 must have the same length")
+        if num_qubits is None:
+            num_qubits = int(max(self.q0.max(initial=-1), self.q1.max(initial=-1))) + 1
+        self.num_qubits = num_qubits
+        self.ticks = np.array(ticks, dtype=np.int64)
+        self.detectors = tuple(tuple(d) for d in detectors)
+        self.observables = tuple(tuple(o) for o in observables)
+        for arr in (self.opcode, self.q0, self.q1, self.ticks):
+            arr.flags.writeable = False
+        self._key = None
+        self._lists = None
+        self._measurements = None
+
+    def __len__(self) -> int:
+        return len(self.opcode)
+
+    def gate(self, i: int) -> Gate:
+        """Rebuild the i-th instruction as a Gate object."""
+        op = int(self.opcode[i])
+        if OP_ARITY[op] == 1:
+            return Gate(OP_NAMES[op], (int(self.q0[i]),))
+        return Gate(OP_NAMES[op], (int(self.q0[i]), int(self.q1[i])))
+
+    def gates(self) -> List[Gate]:
+        return list(self)
+
+    def __iter__(self) -> Iterator[Gate]:
+        for i in range(len(self)):
+            yield self.gate(i)
+
+    def instructions(self):
+        """(opcode, q0, q1) tuples as plain ints, the engine's dispatch format."""
+        return zip(*self.instruction_lists())
+
+    def instruction_lists(self):
+        """The three arrays as Python int lists (cached), for random access."""
+        if self._lists is None:
+            self._lists = (self.opcode.tolist(), self.q0.tolist(), self.q1.tolist())
+        return self._lists
+
+    @property
+    def measurements(self) -> np.ndarray:
+        """Position of every measurement; index k is measurement record k."""
+        if self._measurements is None:
+            self._measurements = np.flatnonzero(np.isin(self.opcode, list(MEASURE_OPS)))
+        return self._measurements
+
+    @property
+    def num_measurements(self) -> int:
+        return len(self.measurements)
+
+    @property
+    def key(self) -> bytes:
+        if self._key is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(np.int64(self.num_qubits).tobytes())
+            for arr in (self.opcode, self.q0, self.q1):
+                h.update(arr.tobytes())
+            if len(self.ticks) or self.detectors or self.observables:
+                h.update(self.ticks.tobytes())
+                h.update(repr((self.detectors, self.observables)).encode())
+            self._key = h.digest()
+        return self._key
+
+    def __hash__(self) -> int:
+        return hash(self.key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, CompiledCircuit):
+            return NotImplemented
+        return self.key == other.key
+
+    def __repr__(self) -> str:
+        return f"CompiledCircuit({len(self)} gates, {self.num_qubits} qubits)"
+
+
+def compile_circuit(circuit_sequence, num_qubits: Optional[int] = None) -> CompiledCircuit:
+    """
+    Compiles a list of Gate objects into a CompiledCircuit.
+
+    A CompiledCircuit is returned unchanged. Gate names are those of OPCODES
+    (H, CNOT, CZ, the Cliffords of spidertrace.clifford and the resets /
+    measurements R, M, MR, RX, MX, MRX) or GATE_ALIASES; anything else raises
+    ValueError.
+    """
+    if isinstance(circuit_sequence, CompiledCircuit):
+        return circuit_sequence
+    n = len(circuit_sequence)
+    opcode = np.empty(n, dtype=np.uint8)
+    q0 = np.empty(n, dtype=np.int32)
+    q1 = np.full(n, -1, dtype=np.int32)
+    for i, gate in enumerate(circuit_sequence):
+        op = OPCODES.get(GATE_ALIASES.get(gate.name, gate.name))
+        if op is None:
+            raise ValueError(f"cannot compile unsupported gate {gate.name!r}")
+        opcode[i] = op
+        q0[i] = gate.qubits[0]
+        if OP_ARITY[op] == 2:
+            q1[i] = gate.qubits[1]
+    return CompiledCircuit(opcode, q0, q1, num_qubits)
+
+
+def compile_stim_circuit(stim_circuit, num_qubits: Optional[int] = None) -> CompiledCircuit:
+    """
+    Compiles the unitary Clifford instructions (STIM_OPCODES) of a stim
+    circuit directly into arrays, without creating a Gate per target pair.
+
+    Mirrors generate_dataset._stim_to_spider_gates: every other instruction
+    (noise, resets, measurements, annotations) and REPEAT blocks are skipped.
+    """
+    ops, q0s, q1s = [], [], []
+    for instr in stim_circuit:
+        op = STIM_OPCODES.get(instr.name)
+        if op is None or not hasattr(instr, "targets_copy"):
+            continue
+        qubits = np.array([t.qubit_value for t in instr.targets_copy() if t.is_qubit_target],
+                          dtype=np.int32)
+        if OP_ARITY[op] == 1:
+            q0s.append(qubits)
+            q1s.append(np.full(len(qubits), -1, dtype=np.int32))
+        else:
+            pairs = qubits[:len(qubits) // 2 * 2].reshape(-1, 2)
+            q0s.append(pairs[:, 0])
+            q1s.append(pairs[:, 1])
+        ops.append(np.full(len(q0s[-1]), op, dtype=np.uint8))
+    if not ops:
+        return CompiledCircuit([], [], [], num_qubits)
+    return CompiledCircuit(np.concatenate(ops), np.concatenate(q0s),
+                           np.concatenate(q1s), num_qubits)
+
+
+def compile_stim_program(stim_circuit, num_qubits: Optional[int] = None,
+                         records: bool = True) -> CompiledCircuit:
+    """
+    Compiles a whole stim circuit -- gates, resets, measurements, TICKs,
+    DETECTORs and OBSERVABLE_INCLUDEs -- into one CompiledCircuit.
+
+    REPEAT blocks are unrolled (``flattened()``), noise channels are skipped
+    (the program is the noiseless circuit a fault propagates through) and
+    ``rec[-k]`` targets are resolved to absolute measurement indices. Raises
+    ValueError for any other instruction that would act on the frame.
+
+    stim_circuit may also be a plain sequence of (non-REPEAT) instructions;
+    with ``records=False`` DETECTOR / OBSERVABLE_INCLUDE are dropped, for
+    fragments whose ``rec[-k]`` targets point outside the fragment.
+    """
+    if hasattr(stim_circuit, "flattened"):
+        stim_circuit = stim_circuit.flattened()
+    ops, q0s, q1s = [], [], []
+    ticks, detectors, observables = [], [], {}
+    num_meas = 0
+    for instr in stim_circuit:
+        name = instr.name
+        op = STIM_PROGRAM_OPCODES.get(name)
+        if op is None:
+            if name == "TICK":
+                ticks.append(len(ops))
+            elif name in ("DETECTOR", "OBSERVABLE_INCLUDE"):
+                if not records:
+                    continue
+                recs = []
+                for t in instr.targets_copy():
+                    if not t.is_measurement_record_target:
+                        raise ValueError(f"unsupported {name} target {t!r}")
+                    recs.append(num_meas + t.value)
+                if name == "DETECTOR":
+                    detectors.append(tuple(recs))
+                else:
+                    idx = int(instr.gate_args_copy()[0])
+                    observables[idx] = observables.get(idx, ()) + tuple(recs)
+            elif name not in _STIM_ANNOTATIONS and not _is_stim_noise(name):
+                raise ValueError(f"cannot compile stim instruction {name!r}")
+            continue
+        qubits = [t.qubit_value for t in instr.targets_copy() if t.is_qubit_target]
+        if OP_ARITY[op] == 1:
+            q0s.extend(qubits)
+            q1s.extend([-1] * len(qubits))
+        else:
+            q0s.extend(qubits[0:len(qubits) // 2 * 2:2])
+            q1s.extend(qubits[1:len(qubits) // 2 * 2:2])
+        ops.extend([op] * (len(q0s) - len(ops)))
+        if op in MEASURE_OPS:
+            num_meas += len(qubits)
+    obs = [observables.get(k, ()) for k in range(max(observables, default=-1) + 1)]
+    if num_qubits is None and hasattr(stim_circuit, "num_qubits"):
+        num_qubits = max(stim_circuit.num_qubits, 1 + max(q0s, default=-1))
+    return CompiledCircuit(ops, q0s, q1s, num_qubits, ticks, detectors, obs)
+
+
+def _is_stim_noise(name: str) -> bool:
+    # Pauli / depolarizing channels; heralded channels write measurement
+    # records and are not supported
+    return (name.endswith("_ERROR") and not name.startswith("HERALDED")) or \
+        name.startswith(("DEPOLARIZE", "PAULI_CHANNEL")) or name in ("E", "ELSE_CORRELATED_ERROR")
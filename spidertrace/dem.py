@@ -0,0 +1,313 @@
+# detector error models from one reverse-time (Heisenberg) sweep
+
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from spidertrace.clifford import mix_rows
+from spidertrace.compiled import CLIFFORD_OPS, STIM_OPCODES
+from spidertrace.frame import _BIT, PAULI_CODES, WORD_BITS, num_words, unpack_bits
+
+# instructions with no effect on the frame or the measurement record
+_ANNOTATIONS = {"TICK", "QUBIT_COORDS", "SHIFT_COORDS", "DETECTOR", "OBSERVABLE_INCLUDE"}
+_PAULI_NOISE = {"X_ERROR": "X", "Y_ERROR": "Y", "Z_ERROR": "Z"}
+# resets / measurements, with the Pauli that survives a reset and the one that
+# flips a measurement: Z-basis (R, M, MR) and X-basis (RX, MX, MRX)
+_RESET = ("R", "MR", "RX", "MRX")
+_MEASURE = ("M", "MR", "MX", "MRX")
+# S, SWAP, CY, ... by stim name, applied from their action tables
+_CLIFFORDS = {name: CLIFFORD_OPS[op] for name, op in STIM_OPCODES.items() if op in CLIFFORD_OPS}
+
+
+def depolarize1_component(p: float) -> float:
+    """Probability of each of the 3 independent X/Y/Z channels equal to DEPOLARIZE1(p)."""
+    return 0.5 - 0.5 * (1.0 - 4.0 * p / 3.0) ** 0.5
+
+
+def depolarize2_component(p: float) -> float:
+    """Probability of each of the 15 independent channels equal to DEPOLARIZE2(p)."""
+    return 0.5 - 0.5 * (1.0 - 16.0 * p / 15.0) ** 0.125
+
+
+class ErrorModel:
+    """
+    Detector error model: independent mechanisms with distinct signatures.
+
+    probabilities[i]: chance that mechanism i fires
+    detectors[i], observables[i]: sorted ids it flips
+    faults[i]: a representative ``{qubit: pauli}`` fault producing it
+    positions[i]: where that fault sits, counted in operations (H targets,
+    CX / CZ pairs, reset and measurement targets) executed before it -- its
+    index in spidertrace.compiled.compile_stim_program's program, as used by
+    spidertrace.tableau.BasisImageTable
+
+    Mechanisms are ordered by the position of their representative.
+    num_positions is the number of operations in the whole circuit.
+    """
+
+    def __init__(self, num_detectors: int, num_observables: int, probabilities,
+                 detectors: List[Tuple[int, ...]], observables: List[Tuple[int, ...]],
+                 faults: List[Dict[int, str]], positions, num_positions: int = 0):
+        self.num_positions = num_positions
+        self.num_detectors = num_detectors
+        self.num_observables = num_observables
+        self.probabilities = np.asarray(probabilities, dtype=np.float64)
+        self.detectors = detectors
+        self.observables = observables
+        self.faults = faults
+        self.positions = np.asarray(positions, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.probabilities)
+
+    @property
+    def num_errors(self) -> int:
+        return len(self)
+
+    def to_dict(self) -> Dict[Tuple[Tuple[int, ...], Tuple[int, ...]], float]:
+        """{(detectors, observables): probability}, for comparing models."""
+        return {(d, o): float(p) for d, o, p in
+                zip(self.detectors, self.observables, self.probabilities)}
+
+    def to_stim(self):
+        """The same model as a stim.DetectorErrorModel, error i in column i."""
+        import stim
+
+        lines = []
+        for p, dets, obs in zip(self.probabilities, self.detectors, self.observables):
+            targets = [f"D{d}" for d in dets] + [f"L{o}" for o in obs]
+            lines.append(f"error({float(p)!r}) " + " ".join(targets))
+        # pin the detector / observable counts even if the last ones never fire
+        if self.num_detectors:
+            lines.append(f"detector D{self.num_detectors - 1}")
+        if self.num_observables:
+            lines.append(f"logical_observable L{self.num_observables - 1}")
+        return stim.DetectorErrorModel("\n".join(lines))
+
+    def __repr__(self) -> str:
+        return (f"ErrorModel({len(self)} errors, {self.num_detectors} detectors, "
+                f"{self.num_observables} observables)")
+
+
+def _qubits(instr) -> List[int]:
+    return [t.qubit_value for t in instr.targets_copy() if t.is_qubit_target]
+
+
+def _flattened(stim_circuit):
+    return stim_circuit.flattened() if hasattr(stim_circuit, "flattened") else stim_circuit
+
+
+def sweep_error_model(stim_circuit, num_qubits: Optional[int] = None) -> ErrorModel:
+    """
+    Builds the detector error model of a stim circuit in one backward pass.
+
+    Walking the circuit back to front, sx[q] / sz[q] hold the detectors and
+    observables that an X / Z on qubit q at the current point would flip
+    (bit-packed, one bit per detector then per observable). Gates transform
+    these sensitivities with the transpose of their forward rule, a
+    measurement adds the checks reading its record, and a reset clears the
+    qubit. At every noise instruction, each fault's signature is the XOR of
+    the rows of its X/Z components.
+
+    DEPOLARIZE1 / DEPOLARIZE2 are split into independent Pauli channels, and
+    mechanisms with equal signatures are merged with p = p1 + p2 - 2 p1 p2.
+    This is the decomposition stim uses for
+    ``detector_error_model(decompose_errors=False)``. Supported instructions:
+    H, CX / CNOT, CZ, the other one- and two-qubit Cliffords of
+    spidertrace.clifford (S, SWAP, CY, SQRT_X, ...), R / RX, M / MX, MR / MRX,
+    X_ERROR / Y_ERROR / Z_ERROR, DEPOLARIZE1/2, measurement flip
+    probabilities, and annotations. Anything else raises
+    ValueError. REPEAT blocks are unrolled through ``flattened()``.
+    """
+    instrs = list(_flattened(stim_circuit))
+
+    # forward pass: count measurements / frame positions, collect record readers
+    num_meas = num_positions = num_detectors = 0
+    num_observables = 0
+    readers = []                              # (measurement index, is_obs, id)
+    max_qubit = -1
+    for instr in instrs:
+        name = instr.name
+        qs = _qubits(instr)
+        if qs:
+            max_qubit = max(max_qubit, max(qs))
+        if name in _MEASURE:
+            num_meas += len(qs)
+        if name in ("H",) + _RESET + _MEASURE:
+            num_positions += len(qs)
+        elif name in ("CX", "CNOT", "CZ"):
+            num_positions += len(qs) // 2
+        elif name in _CLIFFORDS:
+            num_positions += len(qs) // _CLIFFORDS[name].arity
+        elif name in ("DETECTOR", "OBSERVABLE_INCLUDE"):
+            is_obs = name == "OBSERVABLE_INCLUDE"
+            if is_obs:
+                idx = int(instr.gate_args_copy()[0])
+                num_observables = max(num_observables, idx + 1)
+            else:
+                idx = num_detectors
+                num_detectors += 1
+            for t in instr.targets_copy():
+                if not t.is_measurement_record_target:
+                    raise ValueError(f"unsupported {name} target {t!r}")
+                readers.append((num_meas + t.value, is_obs, idx))
+
+    n = max(max_qubit + 1, num_qubits or 0, getattr(stim_circuit, "num_qubits", 0))
+    width = num_words(num_detectors + num_observables)
+    record = np.zeros((num_meas, width), dtype=np.uint64)
+    for m, is_obs, idx in readers:
+        bit = num_detectors + idx if is_obs else idx
+        record[m, bit // WORD_BITS] ^= _BIT[bit % WORD_BITS]
+
+    sx = np.zeros((n, width), dtype=np.uint64)
+    sz = np.zeros((n, width), dtype=np.uint64)
+    # fault chunks: signatures (k, width), probabilities, positions, and the
+    # fault itself as up to two (qubit, Pauli code) pairs, -1 / 0 when unused
+    chunks = []
+
+    def rows(qs: np.ndarray, pauli: str) -> np.ndarray:
+        if pauli == "X":
+            return sx[qs]
+        if pauli == "Z":
+            return sz[qs]
+        if pauli == "Y":
+            return sx[qs] ^ sz[qs]
+        return np.zeros((len(qs), width), dtype=np.uint64)
+
+    def add(signatures, p, position, qa, pa, qb=None, pb="I"):
+        k = len(signatures)
+        fq = np.full((k, 2), -1, dtype=np.int64)
+        fp = np.zeros((k, 2), dtype=np.uint8)
+        if pa != "I":
+            fq[:, 0], fp[:, 0] = qa, PAULI_CODES.index(pa)
+        if pb != "I":
+            fq[:, 1], fp[:, 1] = qb, PAULI_CODES.index(pb)
+        chunks.append((signatures, np.full(k, p), np.full(k, position), fq, fp))
+
+    m, pos = num_meas, num_positions
+    for instr in reversed(instrs):
+        name = instr.name
+        if name in _ANNOTATIONS:
+            continue
+        qs = _qubits(instr)
+        args = instr.gate_args_copy()
+        # gates inside one instruction act in sequence; when no qubit repeats
+        # they commute and the whole instruction is one fancy-indexed update
+        distinct = len(set(qs)) == len(qs)
+        if name == "H":
+            if distinct:
+                sx[qs], sz[qs] = sz[qs], sx[qs]
+            else:
+                for q in reversed(qs):
+                    sx[q], sz[q] = sz[q].copy(), sx[q].copy()
+            pos -= len(qs)
+        elif name in ("CX", "CNOT", "CZ"):
+            pairs = np.array(qs[:len(qs) // 2 * 2], dtype=np.int64).reshape(-1, 2)
+            steps = [pairs] if distinct else [pairs[i:i + 1] for i in range(len(pairs) - 1, -1, -1)]
+            for step in steps:
+                a, b = step[:, 0], step[:, 1]
+                if name == "CZ":
+                    sx_a = sx[a] ^ sz[b]
+                    sx[b] ^= sz[a]
+                    sx[a] = sx_a
+                else:
+                    sx[a] ^= sx[b]
+                    sz[b] ^= sz[a]
+            pos -= len(pairs)
+        elif name in _CLIFFORDS:
+            gate = _CLIFFORDS[name]
+            targets = np.array(qs[:len(qs) // gate.arity * gate.arity],
+                               dtype=np.int64).reshape(-1, gate.arity)
+            steps = [targets] if distinct else [targets[i:i + 1]
+                                                for i in range(len(targets) - 1, -1, -1)]
+            back = gate.matrix.T
+            for step in steps:
+                if gate.arity == 1:
+                    a = step[:, 0]
+                    sx[a], sz[a] = mix_rows(back, (sx[a], sz[a]))
+                else:
+                    a, b = step[:, 0], step[:, 1]
+                    sx[a], sz[a], sx[b], sz[b] = mix_rows(back, (sx[a], sz[a], sx[b], sz[b]))
+            pos -= len(targets)
+        elif name in _MEASURE:
+            # a Z-basis measurement is flipped by X, an X-basis one by Z
+            flipped_by = sz if name in ("MX", "MRX") else sx
+            for q in reversed(qs):
+                m -= 1
+                pos -= 1
+                if name in _RESET:
+                    sx[q] = 0
+                    sz[q] = 0
+                if args and args[0] > 0:
+                    add(record[m:m + 1].copy(), args[0], pos, -1, "I")
+                flipped_by[q] ^= record[m]
+        elif name in _RESET:
+            sx[qs] = 0
+            sz[qs] = 0
+            pos -= len(qs)
+        elif name in _PAULI_NOISE:
+            pauli = _PAULI_NOISE[name]
+            add(rows(qs, pauli), args[0], pos, qs, pauli)
+        elif name == "DEPOLARIZE1":
+            p = depolarize1_component(args[0])
+            for pauli in "XYZ":
+                add(rows(qs, pauli), p, pos, qs, pauli)
+        elif name == "DEPOLARIZE2":
+            p = depolarize2_component(args[0])
+            qa, qb = qs[0:len(qs) // 2 * 2:2], qs[1:len(qs) // 2 * 2:2]
+            for pa in PAULI_CODES:
+                for pb in PAULI_CODES:
+                    if pa == pb == "I":
+                        continue
+                    add(rows(qa, pa) ^ rows(qb, pb), p, pos, qa, pa, qb, pb)
+        else:
+            raise ValueError(f"sweep_error_model: unsupported instruction {name!r}")
+
+    model = _merge(chunks, width, num_detectors, num_observables)
+    model.num_positions = num_positions
+    return model
+
+
+def _merge(chunks, width: int, num_detectors: int, num_observables: int) -> ErrorModel:
+    # group faults by signature; XOR-combine probabilities via
+    # 1 - 2p = prod(1 - 2p_i), keep the lowest-weight, earliest fault
+    if chunks:
+        sigs, probs, positions, fq, fp = (np.concatenate(c) for c in zip(*chunks))
+    else:
+        sigs = np.zeros((0, width), dtype=np.uint64)
+        probs = np.zeros(0)
+        positions = np.zeros(0, dtype=np.int64)
+        fq = np.zeros((0, 2), dtype=np.int64)
+        fp = np.zeros((0, 2), dtype=np.uint8)
+    keep = sigs.any(axis=1) & (probs > 0)
+    sigs, probs, positions, fq, fp = sigs[keep], probs[keep], positions[keep], fq[keep], fp[keep]
+
+    keys = np.ascontiguousarray(sigs).view(np.dtype((np.void, 8 * width))).ravel()
+    _, group = np.unique(keys, return_inverse=True)
+    group = group.ravel()
+    num_groups = int(group.max()) + 1 if len(group) else 0
+    log_q = np.bincount(group, weights=np.log1p(-2 * probs), minlength=num_groups)
+    combined = -np.expm1(log_q) / 2
+
+    weight = (fp != 0).sum(axis=1)
+    order = np.lexsort((positions, weight, group))
+    first = order[np.flatnonzero(np.diff(group[order], prepend=-1))]
+    first = first[np.argsort(positions[first], kind="stable")]
+
+    # set bits, read from the nonzero words only (signatures are very sparse)
+    packed = sigs[first]
+    rows, words = np.nonzero(packed)
+    wrow, bit = np.nonzero(unpack_bits(packed[rows, words][:, None], WORD_BITS))
+    cols = (words[wrow] * WORD_BITS + bit).tolist()
+    bounds = np.searchsorted(rows[wrow], np.arange(len(first) + 1)).tolist()
+    detectors, observables = [], []
+    for k in range(len(first)):
+        lo, hi = bounds[k], bounds[k + 1]
+        mid = bisect_left(cols, num_detectors, lo, hi)
+        detectors.append(tuple(cols[lo:mid]))
+        observables.append(tuple(c - num_detectors for c in cols[mid:hi]))
+    faults = [{q: PAULI_CODES[c] for q, c in zip(qs, cs) if c}
+              for qs, cs in zip(fq[first].tolist(), fp[first].tolist())]
+    return ErrorModel(num_detectors, num_observables, combined[group[first]], detectors,
+                      observables, faults, positions[first])
@@ -1,20 +1,172 @@
 #core propagation rules
 
-from typing import Dict
+import heapq
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import perf_counter
+from types import MappingProxyType
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
 from spidertrace.circuit import Gate
+from spidertrace.clifford import CliffordGate
+from spidertrace.compiled import (OP_CNOT, OP_CZ, OP_H, OP_M, OP_MR, OP_MRX, OP_R, OP_RX,
+                                  CLIFFORD_OPS, GATE_ALIASES, MEASURE_OPS, OP_NAMES, OPCODES,
+                                  CompiledCircuit, compile_circuit)
+from spidertrace.frame import BatchFrame, PauliFrame
+from spidertrace.instrument import Instrumentation
+from spidertrace.lightcone import LightConeIndex
+from spidertrace.schedule import LayeredCircuit, run_layered
+from spidertrace.trace import DeltaTrace, TraceStep
+
+TRACE_MODES = ("full", "delta", "stream", "final")
+
+# installed Instrumentation, or None; read once per engine call
+_HOOKS: Optional[Instrumentation] = None
+
+# adaptive frames: propagate_final keeps a {qubit: pauli} dict on the light
+# cone while the frame is light and switches to a packed PauliFrame over every
+# operation once it acts on more than this fraction of the qubits (at least
+# _MIN_DENSE_WEIGHT); it switches back below half of that
+_DENSE_FRACTION = 0.4
+_MIN_DENSE_WEIGHT = 8
+# operations applied to a packed frame between weight checks
+_DENSE_CHUNK = 256
+
+
+@contextmanager
+def instrumented(hooks: Optional[Instrumentation] = None):
+    """
+    Installs an Instrumentation for the duration of a with-block.
+
+        with instrumented() as stats:
+            propagate_errors(circuit, errors)
+        print(stats.summary())
+
+    The dict-frame paths (propagate_errors in every trace mode,
+    propagate_final) and the packed paths (propagate_frame,
+    propagate_errors_batch, run_packed) report every gate they apply. A
+    LayeredCircuit is run gate by gate while instrumented, so its layers are
+    not timed as layers. The hooks are process-global; blocks nest and
+    restore the previous instance on exit.
+    """
+    global _HOOKS
+    if hooks is None:
+        hooks = Instrumentation()
+    previous, _HOOKS = _HOOKS, hooks
+    try:
+        yield hooks
+    finally:
+        _HOOKS = previous
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    size: int
+    maxsize: int
+
+
+class PropagationCache:
+    """
+    Bounded LRU cache of propagation results, shareable across threads.
+
+    Keys combine the circuit's ``CompiledCircuit.key`` digest with a canonical
+    frozen fault set (a frozenset of ``(qubit, pauli)`` pairs, identities
+    dropped), so the same faults given as a dict, a PauliError list or a row
+    of Pauli codes hit the same entry. Stored results are immutable: frames
+    are MappingProxyType views of a private dict and code rows are read-only
+    arrays, so no caller can corrupt what another caller gets back.
+
+    Pass one as ``cache=`` to propagate_final or propagate_errors_batch; at
+    low p most shots repeat a handful of one- and two-qubit fault sets.
+    """
 
-class TraceStep:
-    def __init__(self, gate, errors_after):
-        self.gate = gate
-        self.errors_after = errors_after
+    def __init__(self, maxsize: int = 65536):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[tuple, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = 0
+
+    def get(self, key):
+        """Cached value for key (marking it most recently used), or None."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        """Stores an immutable value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(self._hits, self._misses, self._evictions,
+                              len(self._entries), self.maxsize)
+
+    def clear(self):
+        """Drops every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __repr__(self) -> str:
+        hits, misses, evictions, size, maxsize = self.stats
+        return (f"PropagationCache({size}/{maxsize} entries, {hits} hits, "
+                f"{misses} misses, {evictions} evictions)")
+
+
+def _fault_key(frame: Dict[int, str]) -> frozenset:
+    return frozenset((q, p) for q, p in frame.items() if p != "I")
    
    
-def propagate_errors(circuit_sequence, errors):
+def propagate_errors(circuit_sequence, errors, trace_mode: str = "full",
+                     checkpoint_interval: int = 64):
     """
-    circuit sequence: list of Gate objects
+    circuit sequence: list of Gate objects, a CompiledCircuit or a LayeredCircuit
     errors: list of PauliError orbjects
-    returns: list of TraceStep Objects
+    trace_mode: "full" keeps a dict copy per step (default);
+                "delta" returns a DeltaTrace that stores only the qubits each
+                gate changed, plus a checkpoint every checkpoint_interval steps;
+                "stream" returns a generator yielding TraceSteps lazily;
+                "final" returns only the final frame dict (see propagate_final)
+    returns: list of TraceStep Objects (DeltaTrace / generator / dict, see trace_mode)
     """
+    if trace_mode == "final":
+        return propagate_final(circuit_sequence, errors)
+    if trace_mode == "delta":
+        return _propagate_delta(circuit_sequence, errors, checkpoint_interval)
+    if trace_mode == "stream":
+        return _propagate_stream(circuit_sequence, errors)
+    if trace_mode != "full":
+        raise ValueError(f"trace_mode must be one of {TRACE_MODES}, got {trace_mode!r}")
+
+    if isinstance(circuit_sequence, LayeredCircuit):
+        circuit_sequence = circuit_sequence.compiled
+    if isinstance(circuit_sequence, CompiledCircuit):
+        return _propagate_compiled(circuit_sequence, errors)
+    if _HOOKS is not None:
+        return _propagate_list_instrumented(circuit_sequence, errors, _HOOKS)
+
     trace = []
     current_errors = {e.qubit: e.type for e in errors}
     
@@ -25,6 +177,460 @@ def propagate_errors(circuit_sequence, errors):
         current_errors = new_errors
         
     return trace
+
+
+def _propagate_list_instrumented(circuit_sequence, errors, hooks: Instrumentation):
+    trace = []
+    current_errors = {e.qubit: e.type for e in errors}
+    for i, gate in enumerate(circuit_sequence):
+        t0 = perf_counter()
+        new_errors = apply_gate_rules(gate, current_errors)
+        hooks.record(gate.name, i, gate.qubits, new_errors, perf_counter() - t0)
+        trace.append(TraceStep(gate, new_errors.copy()))
+        current_errors = new_errors
+    return trace
+
+
+def _propagate_compiled(compiled: CompiledCircuit, errors):
+    # same rules as apply_gate_rules, dispatched on integer opcodes
+    if _HOOKS is not None:
+        return _propagate_compiled_instrumented(compiled, errors, _HOOKS)
+    trace = []
+    current_errors = {e.qubit: e.type for e in errors}
+    for i, (op, a, b) in enumerate(compiled.instructions()):
+        _DICT_RULES[op](current_errors, a, b)
+        trace.append(TraceStep(compiled.gate(i), current_errors.copy()))
+    return trace
+
+
+def _propagate_compiled_instrumented(compiled: CompiledCircuit, errors, hooks: Instrumentation):
+    trace = []
+    current_errors = {e.qubit: e.type for e in errors}
+    for i, (op, a, b) in enumerate(compiled.instructions()):
+        t0 = perf_counter()
+        _DICT_RULES[op](current_errors, a, b)
+        hooks.record(OP_NAMES[op], i, _operands(a, b), current_errors, perf_counter() - t0)
+        trace.append(TraceStep(compiled.gate(i), current_errors.copy()))
+    return trace
+
+
+def _operands(a: int, b: int) -> tuple:
+    return (a,) if b < 0 else (a, b)
+
+
+def _gate_lookup(circuit_sequence):
+    # (compiled form used for dispatch, index -> Gate used for TraceSteps)
+    if isinstance(circuit_sequence, LayeredCircuit):
+        circuit_sequence = circuit_sequence.compiled
+    if isinstance(circuit_sequence, CompiledCircuit):
+        return circuit_sequence, circuit_sequence.gate
+    return compile_circuit(circuit_sequence), circuit_sequence.__getitem__
+
+
+def _walk(compiled: CompiledCircuit, frame: Dict[int, str]):
+    # applies each gate to frame in place, yielding the per-step delta
+    if _HOOKS is not None:
+        yield from _walk_instrumented(compiled, frame, _HOOKS)
+        return
+    for op, a, b in compiled.instructions():
+        old_a = frame.get(a, "I")
+        old_b = frame.get(b, "I") if b >= 0 else None
+        _DICT_RULES[op](frame, a, b)
+        new_a = frame.get(a, "I")
+        if b < 0:
+            yield ((a, new_a),) if new_a != old_a else ()
+            continue
+        new_b = frame.get(b, "I")
+        if new_a != old_a:
+            yield ((a, new_a), (b, new_b)) if new_b != old_b else ((a, new_a),)
+        else:
+            yield ((b, new_b),) if new_b != old_b else ()
+
+
+def _walk_instrumented(compiled: CompiledCircuit, frame: Dict[int, str],
+                       hooks: Instrumentation):
+    for i, (op, a, b) in enumerate(compiled.instructions()):
+        operands = _operands(a, b)
+        old = [frame.get(q, "I") for q in operands]
+        t0 = perf_counter()
+        _DICT_RULES[op](frame, a, b)
+        hooks.record(OP_NAMES[op], i, operands, frame, perf_counter() - t0)
+        yield tuple((q, frame.get(q, "I")) for q, p in zip(operands, old)
+                    if frame.get(q, "I") != p)
+
+
+def _propagate_delta(circuit_sequence, errors, checkpoint_interval: int) -> DeltaTrace:
+    compiled, gate_at = _gate_lookup(circuit_sequence)
+    frame = {e.qubit: e.type for e in errors}
+    trace = DeltaTrace(frame, gate_at, checkpoint_interval)
+    for delta in _walk(compiled, frame):
+        trace.append(delta, frame)
+    return trace
+
+
+def _propagate_stream(circuit_sequence, errors):
+    compiled, gate_at = _gate_lookup(circuit_sequence)
+    frame = {e.qubit: e.type for e in errors}
+    for i, _ in enumerate(_walk(compiled, frame)):
+        yield TraceStep(gate_at(i), frame.copy())
+
+
+def propagate_final(circuit_sequence, errors, start: int = 0,
+                    lightcone: Optional[LightConeIndex] = None,
+                    measured: Optional[List[int]] = None,
+                    cache: Optional[PropagationCache] = None,
+                    dense_weight: Optional[int] = None) -> Dict[int, str]:
+    """
+    Final frame only, visiting just the gates in the fault's forward light cone.
+
+    circuit sequence: list of Gate objects, a CompiledCircuit or a LayeredCircuit
+    errors: list of PauliError objects, or a {qubit: pauli} dict
+    start: index of the first gate that acts on the errors (for faults
+           injected mid-circuit); earlier gates are ignored
+    lightcone: LightConeIndex of this circuit; built on demand if omitted, so
+               pass one in when propagating many faults through one circuit
+    measured: if a list is given, the position of every measurement the
+              fault flips is appended to it (see detector_flips)
+    cache: a PropagationCache; the result is then a read-only mapping,
+           looked up by (circuit key, start, fault set) before propagating
+    dense_weight: frame weight above which the walk switches to a packed
+                  frame; defaults to 40% of the qubits (at least 8)
+    returns: dict mapping qubit -> Pauli after the last gate
+
+    A gate can only change the frame if it touches the frame's current
+    support, so instead of walking every position this jumps to the next gate
+    acting on any supported qubit (a heap keyed by position). That pays per
+    supported qubit, so once the frame has spread past ``dense_weight`` the
+    rest runs on a packed PauliFrame, which pays per operation whatever the
+    weight; when its weight falls to half the threshold again (resets clear
+    it) the walk goes back to the dict. Low-p faults stay on the light cone
+    throughout and heavy frames stop paying for it.
+    """
+    compiled, _ = _gate_lookup(circuit_sequence)
+    if isinstance(errors, dict):
+        frame = dict(errors)
+    else:
+        frame = {e.qubit: e.type for e in errors}
+    if cache is not None and measured is None:
+        key = ("final", compiled.key, start, _fault_key(frame))
+        final = cache.get(key)
+        if final is None:
+            final = MappingProxyType(propagate_final(compiled, frame, start, lightcone,
+                                                     dense_weight=dense_weight))
+            cache.put(key, final)
+        return final
+    if lightcone is None:
+        lightcone = LightConeIndex.from_circuit(compiled)
+    if _HOOKS is not None:
+        return _final_instrumented(compiled, frame, start, lightcone, measured, _HOOKS)
+    end = len(compiled)
+    width = max(compiled.num_qubits, max(frame, default=-1) + 1)
+    if dense_weight is None:
+        dense_weight = max(int(width * _DENSE_FRACTION), _MIN_DENSE_WEIGHT)
+
+    pos = _walk_sparse(compiled, lightcone, frame, start, dense_weight, measured)
+    while pos < end:
+        packed = PauliFrame.from_dict(frame, width)
+        pos = _walk_dense(compiled, packed, pos, dense_weight // 2, measured)
+        frame = packed.to_dict()
+        if pos < end:
+            pos = _walk_sparse(compiled, lightcone, frame, pos, dense_weight, measured)
+    return frame
+
+
+def _walk_sparse(compiled: CompiledCircuit, lightcone: LightConeIndex, frame: Dict[int, str],
+                 start: int, dense_weight: int, measured: Optional[List[int]]) -> int:
+    # light-cone walk of a dict frame from start; returns the end of the
+    # program, or the position to go on from once the frame is too heavy
+    ops, q0, q1 = compiled.instruction_lists()
+    end = len(ops)
+    heap = [(lightcone.next_gate(q, start), q) for q in frame]
+    heapq.heapify(heap)
+    last = start - 1
+    while heap:
+        pos, q = heapq.heappop(heap)
+        if pos >= end:
+            break
+        if pos <= last or q not in frame:
+            # gate already applied via another qubit, or q has left the frame
+            continue
+        a, b = q0[pos], q1[pos]
+        op = ops[pos]
+        if measured is not None and op in MEASURE_OPS and _flips(op, frame.get(a, "I")):
+            measured.append(pos)
+        _DICT_RULES[op](frame, a, b)
+        last = pos
+        if len(frame) > dense_weight:
+            return pos + 1
+        for touched in (a, b):
+            if touched in frame:
+                heapq.heappush(heap, (lightcone.next_gate(touched, pos + 1), touched))
+    return end
+
+
+def _walk_dense(compiled: CompiledCircuit, frame: PauliFrame, start: int,
+                sparse_weight: int, measured: Optional[List[int]]) -> int:
+    # every operation from start, _DENSE_CHUNK at a time; returns the end of
+    # the program, or the position to go on from once the frame is light again
+    ops, q0, _ = compiled.instruction_lists()
+    end = len(ops)
+    pos = start
+    while pos < end:
+        stop = min(pos + _DENSE_CHUNK, end)
+        if measured is not None:
+            meas = compiled.measurements
+            for m in meas[np.searchsorted(meas, pos):np.searchsorted(meas, stop)].tolist():
+                run_packed(compiled, frame, pos, m)
+                if _flips(ops[m], frame.get(q0[m])):
+                    measured.append(m)
+                pos = m
+        run_packed(compiled, frame, pos, stop)
+        pos = stop
+        if frame.weight() <= sparse_weight:
+            return pos
+    return end
+
+
+def _final_instrumented(compiled: CompiledCircuit, frame: Dict[int, str], start: int,
+                        lightcone: LightConeIndex, measured: Optional[List[int]],
+                        hooks: Instrumentation) -> Dict[int, str]:
+    ops, q0, q1 = compiled.instruction_lists()
+    end = len(ops)
+    heap = [(lightcone.next_gate(q, start), q) for q in frame]
+    heapq.heapify(heap)
+    last = start - 1
+    while heap:
+        pos, q = heapq.heappop(heap)
+        if pos >= end:
+            break
+        if pos <= last or q not in frame:
+            continue
+        a, b = q0[pos], q1[pos]
+        op = ops[pos]
+        if measured is not None and op in MEASURE_OPS and _flips(op, frame.get(a, "I")):
+            measured.append(pos)
+        t0 = perf_counter()
+        _DICT_RULES[op](frame, a, b)
+        hooks.record(OP_NAMES[op], pos, _operands(a, b), frame, perf_counter() - t0)
+        last = pos
+        for touched in (a, b):
+            if touched in frame:
+                heapq.heappush(heap, (lightcone.next_gate(touched, pos + 1), touched))
+    return frame
+
+
+def detector_flips(program: CompiledCircuit, errors, start: int = 0,
+                   lightcone: Optional[LightConeIndex] = None
+                   ) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Detectors and observables flipped by a fault, for a program built with
+    spidertrace.compiled.compile_stim_program.
+
+    errors: list of PauliError objects, or a {qubit: pauli} dict
+    start: position at which the fault is injected
+    returns: (detector ids, observable ids), each sorted
+
+    Runs the light-cone walk of propagate_final, noting every measurement the
+    frame flips on the way; a detector fires when an odd number of its
+    measurements flipped.
+    """
+    measured: List[int] = []
+    propagate_final(program, errors, start, lightcone, measured)
+    flipped = set(np.searchsorted(program.measurements, measured).tolist())
+
+    def fired(groups):
+        return tuple(k for k, recs in enumerate(groups)
+                     if sum(r in flipped for r in recs) % 2)
+
+    return fired(program.detectors), fired(program.observables)
+
+
+def _num_qubits_for(circuit_sequence, errors) -> int:
+    qubits = [e.qubit for e in errors]
+    if isinstance(circuit_sequence, (CompiledCircuit, LayeredCircuit)):
+        qubits.append(circuit_sequence.num_qubits - 1)
+    else:
+        qubits.extend(q for gate in circuit_sequence for q in gate.qubits)
+    return max(qubits) + 1 if qubits else 0
+
+
+def propagate_frame(circuit_sequence, errors, num_qubits: Optional[int] = None) -> PauliFrame:
+    """
+    Bit-packed counterpart of propagate_errors.
+
+    circuit sequence: list of Gate objects, a CompiledCircuit or a LayeredCircuit
+    errors: list of PauliError objects
+    num_qubits: frame size; defaults to 1 + the largest qubit index seen
+    returns: the final PauliFrame (no per-step trace is kept)
+
+    propagate_errors stays the reference implementation; both paths apply the
+    same conjugation rules, so ``propagate_frame(c, e).to_dict()`` equals
+    ``propagate_errors(c, e)[-1].errors_after`` for any non-empty circuit.
+    """
+    if num_qubits is None:
+        num_qubits = _num_qubits_for(circuit_sequence, errors)
+    frame = PauliFrame.from_errors(errors, num_qubits)
+    return _run_frame(circuit_sequence, frame)
+
+
+def propagate_errors_batch(circuit_sequence, paulis, num_qubits: Optional[int] = None,
+                           cache: Optional[PropagationCache] = None,
+                           lightcone: Optional[LightConeIndex] = None) -> np.ndarray:
+    """
+    Propagates many independent initial fault configurations at once.
+
+    circuit sequence: list of Gate objects, a CompiledCircuit or a LayeredCircuit
+    paulis: (shots, qubits) array of Pauli codes, 0=I 1=X 2=Y 3=Z
+    num_qubits: frame width; defaults to cover both the array and the circuit
+    cache: a PropagationCache; identical rows are then propagated once, and
+           rows already cached (from this or earlier calls) not at all
+    lightcone: LightConeIndex of this circuit, used for sparse batches; built
+               on demand if omitted (see propagate_final)
+    returns: (shots, num_qubits) uint8 array of final-frame Pauli codes
+
+    Each shot is one bit lane of a BatchFrame, so every gate is applied to
+    64 shots per word operation. Passing a LayeredCircuit (see
+    spidertrace.schedule.schedule_layers) applies each layer of qubit-disjoint
+    gates as one vectorized step. A batch so sparse that all its faults
+    together touch no more qubits than propagate_final's dense threshold is
+    instead propagated shot by shot on the light cone, which is cheaper than
+    one pass over the whole circuit. With a cache, the same choice is made
+    for the rows that miss it.
+    """
+    paulis = np.asarray(paulis, dtype=np.uint8)
+    if num_qubits is None:
+        num_qubits = max(paulis.shape[1], _num_qubits_for(circuit_sequence, []))
+    if cache is not None:
+        return _propagate_batch_cached(circuit_sequence, paulis, num_qubits, cache, lightcone)
+    return _propagate_rows(circuit_sequence, paulis, num_qubits, lightcone)
+
+
+def _propagate_rows(circuit_sequence, paulis: np.ndarray, num_qubits: int,
+                    lightcone: Optional[LightConeIndex]) -> np.ndarray:
+    # light-cone walk per row for sparse batches, bit-lane BatchFrame otherwise
+    if _HOOKS is None and np.count_nonzero(paulis) <= max(int(num_qubits * _DENSE_FRACTION),
+                                                           _MIN_DENSE_WEIGHT):
+        return _propagate_batch_sparse(circuit_sequence, paulis, num_qubits, lightcone)
+    frame = BatchFrame.from_codes(paulis, num_qubits)
+    return _run_frame(circuit_sequence, frame).to_codes()
+
+
+def _propagate_batch_sparse(circuit_sequence, paulis: np.ndarray, num_qubits: int,
+                            lightcone: Optional[LightConeIndex]) -> np.ndarray:
+    compiled, _ = _gate_lookup(circuit_sequence)
+    if lightcone is None:
+        lightcone = LightConeIndex.from_circuit(compiled)
+    out = np.zeros((len(paulis), num_qubits), dtype=np.uint8)
+    for s, row in enumerate(paulis):
+        nz = np.flatnonzero(row).tolist()
+        if not nz:
+            continue
+        final = propagate_final(compiled, {q: _CODE_P[row[q]] for q in nz}, 0, lightcone)
+        for q, p in final.items():
+            out[s, q] = _P_CODE[p]
+    return out
+
+
+def _propagate_batch_cached(circuit_sequence, paulis, num_qubits: int,
+                            cache: PropagationCache,
+                            lightcone: Optional[LightConeIndex]) -> np.ndarray:
+    compiled, _ = _gate_lookup(circuit_sequence)
+    unique, inverse = np.unique(paulis, axis=0, return_inverse=True)
+    rows = [None] * len(unique)
+    keys, missing = [], []
+    for i, row in enumerate(unique):
+        nz = np.flatnonzero(row)
+        key = ("batch", compiled.key, num_qubits,
+               frozenset(zip(nz.tolist(), row[nz].tolist())))
+        rows[i] = cache.get(key)
+        if rows[i] is None:
+            keys.append(key)
+            missing.append(i)
+    if missing:
+        computed = _propagate_rows(circuit_sequence, unique[missing], num_qubits, lightcone)
+        for i, key, codes in zip(missing, keys, computed):
+            codes.flags.writeable = False
+            cache.put(key, codes)
+            rows[i] = codes
+    out = np.empty((len(unique), num_qubits), dtype=np.uint8)
+    for i, codes in enumerate(rows):
+        out[i] = codes
+    return out[inverse.reshape(-1)]
+
+
+def _run_frame(circuit_sequence, frame):
+    if isinstance(circuit_sequence, LayeredCircuit):
+        if _HOOKS is not None:
+            return run_packed(circuit_sequence.compiled, frame)
+        return run_layered(circuit_sequence, frame)
+    return run_packed(compile_circuit(circuit_sequence), frame)
+
+
+def run_packed(compiled: CompiledCircuit, frame, start: int = 0, stop: Optional[int] = None):
+    """Applies a CompiledCircuit in place to a PauliFrame or BatchFrame and returns it.
+
+    start, stop: apply only the operations at positions [start, stop)
+    """
+    if _HOOKS is not None:
+        return _run_packed_instrumented(compiled, frame, start, stop, _HOOKS)
+    h, cnot, cz = frame.h, frame.cnot, frame.cz
+    ops, q0, q1 = compiled.instruction_lists()
+    for op, a, b in zip(ops[start:stop], q0[start:stop], q1[start:stop]):
+        if op == OP_CNOT:
+            cnot(a, b)
+        elif op == OP_H:
+            h(a)
+        elif op == OP_CZ:
+            cz(a, b)
+        elif op in (OP_R, OP_MR):
+            frame.reset(a)
+        elif op in (OP_RX, OP_MRX):
+            frame.reset_x(a)
+        elif op in CLIFFORD_OPS:
+            frame.clifford(CLIFFORD_OPS[op], a, b)
+    return frame
+
+
+def _run_packed_instrumented(compiled: CompiledCircuit, frame, start: int,
+                             stop: Optional[int], hooks: Instrumentation):
+    ops, q0, q1 = compiled.instruction_lists()
+    stop = len(ops) if stop is None else min(stop, len(ops))
+    for i in range(start, stop):
+        op, a, b = ops[i], q0[i], q1[i]
+        t0 = perf_counter()
+        if op == OP_CNOT:
+            frame.cnot(a, b)
+        elif op == OP_H:
+            frame.h(a)
+        elif op == OP_CZ:
+            frame.cz(a, b)
+        elif op in (OP_R, OP_MR):
+            frame.reset(a)
+        elif op in (OP_RX, OP_MRX):
+            frame.reset_x(a)
+        elif op in CLIFFORD_OPS:
+            frame.clifford(CLIFFORD_OPS[op], a, b)
+        hooks.record(OP_NAMES[op], i, _operands(a, b), frame, perf_counter() - t0)
+    return frame
+
+
+def apply_gate_packed(gate: Gate, frame):
+    """Applies a single gate in place to a PauliFrame or BatchFrame and returns it."""
+    name = GATE_ALIASES.get(gate.name, gate.name)
+    if name == "H":
+        frame.h(gate.qubits[0])
+    elif name == "CNOT":
+        frame.cnot(gate.qubits[0], gate.qubits[1])
+    elif name == "CZ":
+        frame.cz(gate.qubits[0], gate.qubits[1])
+    elif name in ("R", "MR"):
+        frame.reset(gate.qubits[0])
+    elif name in ("RX", "MRX"):
+        frame.reset_x(gate.qubits[0])
+    elif OPCODES.get(name) in CLIFFORD_OPS:
+        frame.clifford(CLIFFORD_OPS[OPCODES[name]], *gate.qubits)
+    return frame
+
     
 def apply_gate_rules(gate: Gate, errors: Dict[int,str])-> Dict[int,str]:
     """yes
@@ -36,81 +642,174 @@ def apply_gate_rules(gate: Gate, errors: Dict[int,str])-> Dict[int,str]:
     Returns a new dict with updated
     """
     new_errors = errors.copy()
+    name = GATE_ALIASES.get(gate.name, gate.name)
     
-    if gate.name == "H":
-        q = gate.qubits[0]
-        
-        if q in new_errors:
-            if new_errors[q] == "X":
-                new_errors[q] = "Z"
-            elif new_errors[q] == "Z":
-                new_errors[q] = "X"
-            elif new_errors[q] == "Y":
-                pass
+    if name == "H":
+        _h_rule(new_errors, gate.qubits[0])
     
-    if gate.name == "CNOT":
-        c, t = gate.qubits[0], gate.qubits[1]
-
-        # Full CNOT conjugation via the symplectic (x, z) representation
-        # (I=00, X=10, Z=01, Y=11). This covers every input Pauli -- including
-        # Y on the control or target, which the earlier X/Z-only special-casing
-        # silently dropped. The X-control/Z-target rules below are the standard
-        # CNOT symplectic update; the previously handled cases are a subset:
-        #     x_t' = x_t XOR x_c   (X on control spreads X to target)
-        #     z_c' = z_c XOR z_t   (Z on target spreads Z to control)
-        #     x_c, z_t unchanged
-        _to_xz = {"I": (0, 0), "X": (1, 0), "Z": (0, 1), "Y": (1, 1)}
-        _to_p = {(0, 0): "I", (1, 0): "X", (0, 1): "Z", (1, 1): "Y"}
-
-        xc, zc = _to_xz[new_errors.get(c, "I")]
-        xt, zt = _to_xz[new_errors.get(t, "I")]
-
-        new_c = _to_p[(xc, zc ^ zt)]
-        new_t = _to_p[(xt ^ xc, zt)]
-
-        for q, p in ((c, new_c), (t, new_t)):
-            if p == "I":
-                new_errors.pop(q, None)
-            else:
-                new_errors[q] = p
-
-    if gate.name == "CZ":
-        c, t = gate.qubits[0], gate.qubits[1]
-
-        p_c = new_errors.get(c, "I")
-        p_t = new_errors.get(t, "I")
-
-        # Full CZ conjugation table: CZ (p_c ⊗ p_t) CZ, ignoring global phase.
-        # Derived by composing individual single-qubit rules and multiplying Paulis.
-        cz_table = {
-            ("I", "I"): ("I", "I"),
-            ("X", "I"): ("X", "Z"),
-            ("I", "X"): ("Z", "X"),
-            ("Z", "I"): ("Z", "I"),
-            ("I", "Z"): ("I", "Z"),
-            ("Y", "I"): ("Y", "Z"),
-            ("I", "Y"): ("Z", "Y"),
-            ("X", "X"): ("Y", "Y"),
-            ("X", "Z"): ("X", "I"),
-            ("Z", "X"): ("I", "X"),
-            ("X", "Y"): ("Y", "X"),
-            ("Y", "X"): ("X", "Y"),
-            ("Z", "Z"): ("Z", "Z"),
-            ("Z", "Y"): ("I", "Y"),
-            ("Y", "Z"): ("Y", "I"),
-            ("Y", "Y"): ("X", "X"),
-        }
-
-        q_c, q_t = cz_table[(p_c, p_t)]
-
-        if q_c == "I":
-            new_errors.pop(c, None)
+    if name == "CNOT":
+        _cnot_rule(new_errors, gate.qubits[0], gate.qubits[1])
+
+    if name == "CZ":
+        _cz_rule(new_errors, gate.qubits[0], gate.qubits[1])
+
+    if name in ("R", "MR"):
+        _reset_rule(new_errors, gate.qubits[0])
+
+    if name in ("RX", "MRX"):
+        _reset_x_rule(new_errors, gate.qubits[0])
+
+    op = OPCODES.get(name)
+    if op in CLIFFORD_OPS:
+        # S, SWAP, CY, SQRT_X, ... from their action tables
+        _DICT_RULES[op](new_errors, *gate.qubits)
+
+    return new_errors
+
+
+# Single-gate rules. Each updates an errors dict in place.
+
+def _h_rule(errors: Dict[int, str], q: int, _unused: int = -1):
+    if q in errors:
+        if errors[q] == "X":
+            errors[q] = "Z"
+        elif errors[q] == "Z":
+            errors[q] = "X"
+        elif errors[q] == "Y":
+            pass
+
+
+# Full CNOT conjugation via the symplectic (x, z) representation
+# (I=00, X=10, Z=01, Y=11). This covers every input Pauli -- including
+# Y on the control or target, which the earlier X/Z-only special-casing
+# silently dropped. The X-control/Z-target rules below are the standard
+# CNOT symplectic update; the previously handled cases are a subset:
+#     x_t' = x_t XOR x_c   (X on control spreads X to target)
+#     z_c' = z_c XOR z_t   (Z on target spreads Z to control)
+#     x_c, z_t unchanged
+_TO_XZ = {"I": (0, 0), "X": (1, 0), "Z": (0, 1), "Y": (1, 1)}
+_TO_P = {(0, 0): "I", (1, 0): "X", (0, 1): "Z", (1, 1): "Y"}
+
+
+def _cnot_rule(errors: Dict[int, str], c: int, t: int):
+    xc, zc = _TO_XZ[errors.get(c, "I")]
+    xt, zt = _TO_XZ[errors.get(t, "I")]
+
+    new_c = _TO_P[(xc, zc ^ zt)]
+    new_t = _TO_P[(xt ^ xc, zt)]
+
+    for q, p in ((c, new_c), (t, new_t)):
+        if p == "I":
+            errors.pop(q, None)
         else:
-            new_errors[c] = q_c
+            errors[q] = p
+
+
+# Full CZ conjugation table: CZ (p_c ⊗ p_t) CZ, ignoring global phase.
+# Derived by composing individual single-qubit rules and multiplying Paulis.
+_CZ_TABLE = {
+    ("I", "I"): ("I", "I"),
+    ("X", "I"): ("X", "Z"),
+    ("I", "X"): ("Z", "X"),
+    ("Z", "I"): ("Z", "I"),
+    ("I", "Z"): ("I", "Z"),
+    ("Y", "I"): ("Y", "Z"),
+    ("I", "Y"): ("Z", "Y"),
+    ("X", "X"): ("Y", "Y"),
+    ("X", "Z"): ("X", "I"),
+    ("Z", "X"): ("I", "X"),
+    ("X", "Y"): ("Y", "X"),
+    ("Y", "X"): ("X", "Y"),
+    ("Z", "Z"): ("Z", "Z"),
+    ("Z", "Y"): ("I", "Y"),
+    ("Y", "Z"): ("Y", "I"),
+    ("Y", "Y"): ("X", "X"),
+}
+
+
+def _cz_rule(errors: Dict[int, str], c: int, t: int):
+    p_c = errors.get(c, "I")
+    p_t = errors.get(t, "I")
+    if p_c == "I" and p_t == "I":
+        return
 
-        if q_t == "I":
-            new_errors.pop(t, None)
+    q_c, q_t = _CZ_TABLE[(p_c, p_t)]
+
+    if q_c == "I":
+        errors.pop(c, None)
+    else:
+        errors[c] = q_c
+
+    if q_t == "I":
+        errors.pop(t, None)
+    else:
+        errors[t] = q_t
+
+
+# Resets. A Z-basis reset prepares |0>: the X-like part of the frame
+# anticommutes with the prepared state and is discarded, the Z-like part
+# survives (X -> I, Y -> Z, Z -> Z). The X-basis reset is the mirror image.
+# Measurements leave the frame unchanged; MR / MRX reset after measuring.
+
+def _reset_rule(errors: Dict[int, str], q: int, _unused: int = -1):
+    p = errors.get(q)
+    if p == "X":
+        del errors[q]
+    elif p == "Y":
+        errors[q] = "Z"
+
+
+def _reset_x_rule(errors: Dict[int, str], q: int, _unused: int = -1):
+    p = errors.get(q)
+    if p == "Z":
+        del errors[q]
+    elif p == "Y":
+        errors[q] = "X"
+
+
+def _measure_rule(errors: Dict[int, str], q: int, _unused: int = -1):
+    pass
+
+
+def _flips(op: int, pauli: str) -> bool:
+    # a Z-basis measurement is flipped by X / Y, an X-basis one by Z / Y
+    if op in (OP_M, OP_MR):
+        return pauli in ("X", "Y")
+    return pauli in ("Z", "Y")
+
+
+# Generic Cliffords (spidertrace.clifford): one lookup in the gate's table of
+# Pauli codes, 0=I 1=X 2=Y 3=Z and 4 * code_a + code_b for pairs.
+_P_CODE = {"I": 0, "X": 1, "Y": 2, "Z": 3}
+_CODE_P = ("I", "X", "Y", "Z")
+
+
+def _clifford_rule(gate: CliffordGate):
+    table = gate.table.tolist()
+
+    def set_code(errors, q, code):
+        if code:
+            errors[q] = _CODE_P[code]
         else:
-            new_errors[t] = q_t
+            errors.pop(q, None)
+
+    if gate.arity == 1:
+        def rule(errors: Dict[int, str], q: int, _unused: int = -1):
+            p = errors.get(q)
+            if p is not None:
+                set_code(errors, q, table[_P_CODE[p]])
+    else:
+        def rule(errors: Dict[int, str], a: int, b: int):
+            code = 4 * _P_CODE[errors.get(a, "I")] + _P_CODE[errors.get(b, "I")]
+            if code:
+                out = table[code]
+                set_code(errors, a, out >> 2)
+                set_code(errors, b, out & 3)
+    return rule
+
 
-    return new_errors
\ No newline at end of file
+# indexed by opcode: OP_H, OP_CNOT, OP_CZ, OP_R, OP_M, OP_MR, OP_RX, OP_MX, OP_MRX,
+# then the generic Cliffords in CLIFFORD_OPS order
+_DICT_RULES = (_h_rule, _cnot_rule, _cz_rule, _reset_rule, _measure_rule, _reset_rule,
+               _reset_x_rule, _measure_rule, _reset_x_rule) + tuple(
+                   _clifford_rule(CLIFFORD_OPS[op]) for op in sorted(CLIFFORD_OPS))
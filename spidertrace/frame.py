@@ -0,0 +1,251 @@
+# bit-packed symplectic Pauli frames
+
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from spidertrace.clifford import CliffordGate, mix_rows
+
+WORD_BITS = 64
+
+# _BIT[i] == 1 << i as a uint64 word mask
+_BIT = np.left_shift(np.uint64(1), np.arange(WORD_BITS, dtype=np.uint64))
+
+_XZ_TO_PAULI = {(1, 0): "X", (0, 1): "Z", (1, 1): "Y"}
+_PAULI_TO_XZ = {"I": (0, 0), "X": (1, 0), "Z": (0, 1), "Y": (1, 1)}
+
+
+def num_words(num_bits: int) -> int:
+    """Number of uint64 words needed to hold ``num_bits`` bits."""
+    return (num_bits + WORD_BITS - 1) // WORD_BITS
+
+
+def unpack_bits(words: np.ndarray, num_bits: int) -> np.ndarray:
+    """Unpack uint64 words (last axis) into a uint8 0/1 array of ``num_bits``."""
+    as_bytes = np.ascontiguousarray(words, dtype="<u8").view(np.uint8)
+    return np.unpackbits(as_bytes, axis=-1, bitorder="little")[..., :num_bits]
+
+
+def pack_bits(bits: np.ndarray) -> np.ndarray:
+    """Pack a 0/1 array (last axis) into uint64 words; inverse of unpack_bits."""
+    bits = np.asarray(bits, dtype=np.uint8)
+    n = bits.shape[-1]
+    pad = num_words(n) * WORD_BITS - n
+    if pad:
+        widths = [(0, 0)] * (bits.ndim - 1) + [(0, pad)]
+        bits = np.pad(bits, widths)
+    packed = np.packbits(bits, axis=-1, bitorder="little")
+    return np.ascontiguousarray(packed).view("<u8").astype(np.uint64)
+
+
+class PauliFrame:
+    """
+    Pauli frame held as two packed bit vectors over the qubits.
+
+    Bit q of ``x`` / ``z`` is the X / Z component on qubit q, using the
+    symplectic encoding I=00, X=10, Z=01, Y=11 (global phase ignored).
+    Qubits are packed 64 per uint64 word, so H, CNOT and CZ are a handful of
+    word-level XOR/AND operations instead of dict copies and string compares.
+
+    Example
+        frame = PauliFrame.from_dict({0: "X"}, num_qubits=2)
+        frame.cnot(0, 1)
+        frame.to_dict()   # {0: "X", 1: "X"}
+    """
+
+    __slots__ = ("num_qubits", "x", "z")
+
+    def __init__(self, num_qubits: int, x: Optional[np.ndarray] = None,
+                 z: Optional[np.ndarray] = None):
+        self.num_qubits = num_qubits
+        n = num_words(num_qubits)
+        self.x = np.zeros(n, dtype=np.uint64) if x is None else x
+        self.z = np.zeros(n, dtype=np.uint64) if z is None else z
+
+    @classmethod
+    def from_dict(cls, errors: Dict[int, str], num_qubits: int) -> "PauliFrame":
+        """Build a frame from a ``{qubit: "X"/"Y"/"Z"}`` dict."""
+        frame = cls(num_qubits)
+        for q, p in errors.items():
+            frame.set(q, p)
+        return frame
+
+    @classmethod
+    def from_errors(cls, errors: Iterable, num_qubits: int) -> "PauliFrame":
+        """Build a frame from a list of PauliError objects (later entries win)."""
+        return cls.from_dict({e.qubit: e.type for e in errors}, num_qubits)
+
+    def copy(self) -> "PauliFrame":
+        return PauliFrame(self.num_qubits, self.x.copy(), self.z.copy())
+
+    def get(self, q: int) -> str:
+        w, m = q >> 6, _BIT[q & 63]
+        xz = (int(bool(self.x[w] & m)), int(bool(self.z[w] & m)))
+        return _XZ_TO_PAULI.get(xz, "I")
+
+    def set(self, q: int, pauli: str):
+        w, m = q >> 6, _BIT[q & 63]
+        xb, zb = _PAULI_TO_XZ[pauli]
+        self.x[w] = (self.x[w] | m) if xb else (self.x[w] & ~m)
+        self.z[w] = (self.z[w] | m) if zb else (self.z[w] & ~m)
+
+    def to_dict(self) -> Dict[int, str]:
+        """Sparse ``{qubit: pauli}`` view, the format used by the dict engine."""
+        xs = unpack_bits(self.x, self.num_qubits)
+        zs = unpack_bits(self.z, self.num_qubits)
+        out = {}
+        for q in np.flatnonzero(xs | zs):
+            out[int(q)] = _XZ_TO_PAULI[(int(xs[q]), int(zs[q]))]
+        return out
+
+    def weight(self) -> int:
+        """Number of qubits carrying a non-identity Pauli."""
+        return int(unpack_bits(self.x | self.z, self.num_qubits).sum())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, PauliFrame):
+            return NotImplemented
+        return (self.num_qubits == other.num_qubits
+                and np.array_equal(self.x, other.x)
+                and np.array_equal(self.z, other.z))
+
+    def __repr__(self) -> str:
+        return f"PauliFrame({self.num_qubits}, {self.to_dict()})"
+
+    # ---- in-place gate updates (symplectic rules, see engine.apply_gate_rules)
+
+    def h(self, q: int):
+        # swap the x and z bits of qubit q
+        w, m = q >> 6, _BIT[q & 63]
+        d = (self.x[w] ^ self.z[w]) & m
+        self.x[w] ^= d
+        self.z[w] ^= d
+
+    def cnot(self, c: int, t: int):
+        # x_t ^= x_c ; z_c ^= z_t
+        wc, mc = c >> 6, _BIT[c & 63]
+        wt, mt = t >> 6, _BIT[t & 63]
+        if self.x[wc] & mc:
+            self.x[wt] ^= mt
+        if self.z[wt] & mt:
+            self.z[wc] ^= mc
+
+    def cz(self, a: int, b: int):
+        # z_b ^= x_a ; z_a ^= x_b
+        wa, ma = a >> 6, _BIT[a & 63]
+        wb, mb = b >> 6, _BIT[b & 63]
+        xa = self.x[wa] & ma
+        xb = self.x[wb] & mb
+        if xa:
+            self.z[wb] ^= mb
+        if xb:
+            self.z[wa] ^= ma
+
+    def reset(self, q: int):
+        # Z-basis reset: drop the X bit (X -> I, Y -> Z)
+        self.x[q >> 6] &= ~_BIT[q & 63]
+
+    def reset_x(self, q: int):
+        # X-basis reset: drop the Z bit (Z -> I, Y -> X)
+        self.z[q >> 6] &= ~_BIT[q & 63]
+
+    def clifford(self, gate: CliffordGate, a: int, b: int = -1):
+        # one lookup in the gate's code table (spidertrace.clifford)
+        qubits = (a,) if b < 0 else (a, b)
+        code = 0
+        for q in qubits:
+            w, m = q >> 6, _BIT[q & 63]
+            code = 4 * code + _XZ_TO_CODE[bool(self.x[w] & m) + 2 * bool(self.z[w] & m)]
+        out = int(gate.table[code])
+        for shift, q in zip((2 * (len(qubits) - 1), 0), qubits):
+            c = (out >> shift) & 3
+            w, m = q >> 6, _BIT[q & 63]
+            self.x[w] = (self.x[w] | m) if _CODE_X[c] else (self.x[w] & ~m)
+            self.z[w] = (self.z[w] | m) if _CODE_Z[c] else (self.z[w] & ~m)
+
+
+# Pauli codes used by the batch APIs: 0=I, 1=X, 2=Y, 3=Z (matches stim.PauliString)
+PAULI_CODES = "IXYZ"
+_CODE_X = np.array([0, 1, 1, 0], dtype=np.uint8)
+_CODE_Z = np.array([0, 0, 1, 1], dtype=np.uint8)
+_XZ_TO_CODE = np.array([0, 1, 3, 2], dtype=np.uint8)   # indexed by x + 2*z
+
+
+class BatchFrame:
+    """
+    Many Pauli frames propagated together, one shot per bit lane.
+
+    ``x`` and ``z`` have shape ``(num_qubits, num_words(num_shots))``: row q
+    holds the X / Z bit of qubit q for every shot, 64 shots per uint64 word.
+    A gate is then a row operation (swap or XOR) that updates all shots at
+    once, e.g. CNOT(c, t) is ``x[t] ^= x[c]; z[c] ^= z[t]``.
+    """
+
+    __slots__ = ("num_qubits", "num_shots", "x", "z")
+
+    def __init__(self, num_qubits: int, num_shots: int,
+                 x: Optional[np.ndarray] = None, z: Optional[np.ndarray] = None):
+        self.num_qubits = num_qubits
+        self.num_shots = num_shots
+        shape = (num_qubits, num_words(num_shots))
+        self.x = np.zeros(shape, dtype=np.uint64) if x is None else x
+        self.z = np.zeros(shape, dtype=np.uint64) if z is None else z
+
+    @classmethod
+    def from_codes(cls, paulis: np.ndarray, num_qubits: Optional[int] = None) -> "BatchFrame":
+        """Build from a ``(shots, qubits)`` array of Pauli codes (0=I,1=X,2=Y,3=Z)."""
+        paulis = np.asarray(paulis, dtype=np.uint8)
+        if paulis.ndim != 2:
+            raise ValueError(f"expected a (shots, qubits) array, got shape {paulis.shape}")
+        shots, width = paulis.shape
+        if num_qubits is None:
+            num_qubits = width
+        if width > num_qubits:
+            raise ValueError(f"array has {width} qubit columns but num_qubits={num_qubits}")
+        x = np.zeros((num_qubits, num_words(shots)), dtype=np.uint64)
+        z = np.zeros_like(x)
+        if shots:
+            x[:width] = pack_bits(_CODE_X[paulis].T)
+            z[:width] = pack_bits(_CODE_Z[paulis].T)
+        return cls(num_qubits, shots, x, z)
+
+    def to_codes(self) -> np.ndarray:
+        """``(shots, num_qubits)`` uint8 array of Pauli codes."""
+        xs = unpack_bits(self.x, self.num_shots)
+        zs = unpack_bits(self.z, self.num_shots)
+        return _XZ_TO_CODE[xs + 2 * zs].T.copy()
+
+    def shot(self, s: int) -> PauliFrame:
+        """Extract one shot as a qubit-packed PauliFrame."""
+        w, m = s >> 6, _BIT[s & 63]
+        frame = PauliFrame(self.num_qubits)
+        frame.x = pack_bits((self.x[:, w] & m) != 0)
+        frame.z = pack_bits((self.z[:, w] & m) != 0)
+        return frame
+
+    # ---- in-place gate updates, applied to every shot lane at once
+
+    def h(self, q: int):
+        self.x[q], self.z[q] = self.z[q].copy(), self.x[q].copy()
+
+    def cnot(self, c: int, t: int):
+        self.x[t] ^= self.x[c]
+        self.z[c] ^= self.z[t]
+
+    def cz(self, a: int, b: int):
+        self.z[b] ^= self.x[a]
+        self.z[a] ^= self.x[b]
+
+    def reset(self, q: int):
+        self.x[q] = 0
+
+    def reset_x(self, q: int):
+        self.z[q] = 0
+
+    def clifford(self, gate: CliffordGate, a: int, b: int = -1):
+        # rows (x_a, z_a[, x_b, z_b]) mixed by the gate's symplectic matrix
+        if b < 0:
+            self.x[a], self.z[a] = mix_rows(gate.matrix, (self.x[a], self.z[a]))
+        else:
+            self.x[a], self.z[a], self.x[b], self.z[b] = mix_rows(
+                gate.matrix, (self.x[a], self.z[a], self.x[b], self.z[b]))
@@ -0,0 +1,136 @@
+# GF(2) linear algebra: row reduction and stabilizer-coset canonical forms
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from spidertrace.frame import _BIT, _PAULI_TO_XZ, _XZ_TO_PAULI, pack_bits, unpack_bits
+
+
+def rref(matrix: np.ndarray, column_order: Optional[Sequence[int]] = None
+         ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduced row-echelon form of a 0/1 matrix over GF(2).
+
+    matrix: (rows, cols) 0/1 array
+    column_order: order in which columns are tried as pivots (default 0..cols-1)
+    returns: (basis, pivots) -- the nonzero reduced rows as uint8, and the
+             pivot column of each; every pivot column is zero in all other rows
+
+    The reduced basis is unique for a given row space and column order, which
+    is what makes it usable as a canonical form.
+    """
+    m = (np.asarray(matrix, dtype=np.uint8) & 1).copy()
+    rows, cols = m.shape
+    order = range(cols) if column_order is None else column_order
+    pivots = []
+    r = 0
+    for c in order:
+        if r == rows:
+            break
+        hits = np.flatnonzero(m[r:, c]) + r
+        if not len(hits):
+            continue
+        top = hits[0]
+        if top != r:
+            m[[r, top]] = m[[top, r]]
+        others = np.flatnonzero(m[:, c])
+        others = others[others != r]
+        m[others] ^= m[r]
+        pivots.append(c)
+        r += 1
+    return m[:r], np.asarray(pivots, dtype=np.int64)
+
+
+class StabilizerReducer:
+    """
+    Canonical representatives of Pauli frames modulo a stabilizer group.
+
+    generators: (k, 2N) 0/1 matrix of stabilizer generators, X bits of every
+                qubit then Z bits (the packed frame layout), signs ignored
+
+    Two frames that differ by a stabilizer act identically on the code state,
+    so ``reduce`` maps every frame of a coset to the same representative:
+    1. clear each pivot coordinate of the precomputed reduced row-echelon
+       basis (a linear map whose result depends only on the coset), then
+    2. multiply in the original generators greedily, in a fixed order, while
+       that lowers the Pauli weight.
+    Step 2 starts from the unique output of step 1 and is deterministic, so
+    the result is still a function of the coset alone; it is a local minimum
+    of the weight, not necessarily the global one (exact minimum-weight coset
+    search is intractable in general). Sparse generators such as the code's
+    plaquettes give the best weights.
+
+    Every operation is vectorized over a batch of packed frames.
+    """
+
+    def __init__(self, generators: np.ndarray, num_qubits: Optional[int] = None,
+                 max_passes: int = 8):
+        generators = np.asarray(generators, dtype=np.uint8)
+        if num_qubits is None:
+            num_qubits = generators.shape[1] // 2
+        if generators.shape[1] != 2 * num_qubits:
+            raise ValueError(f"expected (k, {2 * num_qubits}) generators, got {generators.shape}")
+        self.num_qubits = num_qubits
+        self.max_passes = max_passes
+        basis, self.pivots = rref(generators)
+        self.rank = len(basis)
+        self._basis = pack_bits(basis)
+        self._generators = pack_bits(generators[generators.any(axis=1)])
+        # word index and bit mask of each pivot coordinate
+        self._pivot_word = self.pivots // 64
+        self._pivot_mask = _BIT[self.pivots % 64]
+
+    def reduce(self, packed: np.ndarray) -> np.ndarray:
+        """Canonical representative of each packed frame; (..., words) in and out."""
+        linear = self.reduce_linear(packed)
+        shape = linear.shape
+        frames = linear.reshape(-1, shape[-1])
+        if len(self._generators) and len(frames):
+            weight = self.weight(frames)
+            for _ in range(self.max_passes):
+                improved = False
+                for g in self._generators:
+                    candidate = frames ^ g
+                    w = self.weight(candidate)
+                    better = w < weight
+                    if better.any():
+                        frames[better] = candidate[better]
+                        weight[better] = w[better]
+                        improved = True
+                if not improved:
+                    break
+        return frames.reshape(shape)
+
+    def weight(self, packed: np.ndarray) -> np.ndarray:
+        """Number of qubits with a non-identity Pauli in each packed frame."""
+        n = self.num_qubits
+        bits = unpack_bits(packed, 2 * n)
+        return (bits[..., :n] | bits[..., n:]).sum(axis=-1)
+
+    def reduce_dict(self, errors: Dict[int, str]) -> Dict[int, str]:
+        """``reduce`` for a single ``{qubit: pauli}`` frame."""
+        n = self.num_qubits
+        bits = np.zeros(2 * n, dtype=np.uint8)
+        for q, p in errors.items():
+            bits[q], bits[n + q] = _PAULI_TO_XZ[p]
+        out = unpack_bits(self.reduce(pack_bits(bits)), 2 * n)
+        x, z = out[:n], out[n:]
+        return {int(q): _XZ_TO_PAULI[(int(x[q]), int(z[q]))] for q in np.flatnonzero(x | z)}
+
+    def equivalent(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Whether packed frames a and b lie in the same stabilizer coset."""
+        diff = np.asarray(a, dtype=np.uint64) ^ np.asarray(b, dtype=np.uint64)
+        return ~self.reduce_linear(diff).any(axis=-1)
+
+    def reduce_linear(self, packed: np.ndarray) -> np.ndarray:
+        """Step 1 only: the row-echelon normal form, a linear map of the frame."""
+        frames = np.array(packed, dtype=np.uint64)
+        flat = frames.reshape(-1, frames.shape[-1])
+        for row, word, mask in zip(self._basis, self._pivot_word, self._pivot_mask):
+            hit = (flat[:, word] & mask) != 0
+            flat[hit] ^= row
+        return flat.reshape(frames.shape)
+
+    def __repr__(self) -> str:
+        return f"StabilizerReducer({self.num_qubits} qubits, rank {self.rank})"
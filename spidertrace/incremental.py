@@ -0,0 +1,149 @@
+# incremental re-propagation: checkpointed traces of editable Gate lists
+
+from typing import Dict, Iterator, List
+
+from spidertrace.circuit import Gate
+from spidertrace.engine import apply_gate_rules
+from spidertrace.trace import TraceStep
+
+
+class IncrementalTrace:
+    """
+    Trace of a fixed fault through a Gate list that is edited in place.
+
+    Keeps the frame before every ``checkpoint_interval``-th gate. An edit at
+    gate i drops only the checkpoints after i, and the next query replays
+    from the last checkpoint at or before i, so changing one gate near the
+    end of a long circuit costs a few gates instead of the whole circuit.
+    Checkpoints are filled lazily: only as far as a query needs.
+
+    ``replayed`` counts the gates applied since construction, for callers
+    that want to see how much work the checkpoints saved.
+    """
+
+    def __init__(self, circuit, errors, checkpoint_interval: int = 64):
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be >= 1")
+        self.checkpoint_interval = checkpoint_interval
+        self.gates: List[Gate] = list(circuit)
+        if isinstance(errors, dict):
+            initial = dict(errors)
+        else:
+            initial = {e.qubit: e.type for e in errors}
+        # checkpoints[k] is the frame before gate k * checkpoint_interval
+        self.checkpoints: List[Dict[int, str]] = [initial]
+        self.replayed = 0
+
+    # edits
+
+    def replace(self, i: int, gate: Gate):
+        """Replaces gate i."""
+        i = self._index(i)
+        self.gates[i] = gate
+        self._invalidate(i)
+
+    def insert(self, i: int, gate: Gate):
+        """Inserts a gate before gate i (at the end if i == len)."""
+        if i < 0:
+            i += len(self.gates)
+        if not 0 <= i <= len(self.gates):
+            raise IndexError("gate index out of range")
+        self.gates.insert(i, gate)
+        self._invalidate(i)
+
+    def delete(self, i: int):
+        """Removes gate i."""
+        i = self._index(i)
+        del self.gates[i]
+        self._invalidate(i)
+
+    def set_errors(self, errors):
+        """Starts over with a different initial fault (every checkpoint is stale)."""
+        if isinstance(errors, dict):
+            initial = dict(errors)
+        else:
+            initial = {e.qubit: e.type for e in errors}
+        self.checkpoints = [initial]
+
+    # queries
+
+    def frame_before(self, i: int) -> Dict[int, str]:
+        """Frame before gate i (i == len gives the final frame); a copy."""
+        if i < 0:
+            i += len(self.gates)
+        if not 0 <= i <= len(self.gates):
+            raise IndexError("gate index out of range")
+        k = self._fill(i // self.checkpoint_interval)
+        return self._replay(dict(self.checkpoints[k]), k * self.checkpoint_interval, i)
+
+    def errors_after(self, i: int) -> Dict[int, str]:
+        """Frame after gate i, as in ``propagate_errors(...)[i].errors_after``."""
+        return self.frame_before(self._index(i) + 1)
+
+    @property
+    def final(self) -> Dict[int, str]:
+        """Frame after the last gate (a copy)."""
+        return self.frame_before(len(self.gates))
+
+    def final_with(self, i: int, gate: Gate) -> Dict[int, str]:
+        """
+        Final frame if gate i were replaced by ``gate``, leaving the trace as is.
+
+        Schedule searches that try many one-gate variants of a circuit share
+        the checkpoints up to i and replay only the suffix of each variant.
+        """
+        i = self._index(i)
+        frame = apply_gate_rules(gate, self.frame_before(i))
+        self.replayed += 1
+        return self._replay(frame, i + 1, len(self.gates))
+
+    def steps(self, start: int = 0) -> Iterator[TraceStep]:
+        """TraceSteps from gate ``start`` onward, resuming from the nearest checkpoint."""
+        frame = self.frame_before(start)
+        for i in range(start, len(self.gates)):
+            frame = self._step(frame, i)
+            yield TraceStep(self.gates[i], frame.copy())
+
+    def trace(self) -> List[TraceStep]:
+        """The full trace, equal to ``propagate_errors(gates, errors)``."""
+        return list(self.steps())
+
+    def __len__(self) -> int:
+        return len(self.gates)
+
+    def __repr__(self) -> str:
+        return (f"IncrementalTrace({len(self.gates)} gates, "
+                f"{len(self.checkpoints)} checkpoints, {self.replayed} gates replayed)")
+
+    # internals
+
+    def _index(self, i: int) -> int:
+        if i < 0:
+            i += len(self.gates)
+        if not 0 <= i < len(self.gates):
+            raise IndexError("gate index out of range")
+        return i
+
+    def _invalidate(self, i: int):
+        # checkpoint k covers gates before k * interval; those at or before i stay valid
+        del self.checkpoints[i // self.checkpoint_interval + 1:]
+
+    def _fill(self, k: int) -> int:
+        """Extends the checkpoints up to index k; returns the last one available."""
+        interval = self.checkpoint_interval
+        k = min(k, len(self.gates) // interval)
+        while len(self.checkpoints) <= k:
+            last = len(self.checkpoints) - 1
+            frame = self._replay(dict(self.checkpoints[last]),
+                                 last * interval, (last + 1) * interval)
+            self.checkpoints.append(frame)
+        return k
+
+    def _replay(self, frame: Dict[int, str], lo: int, hi: int) -> Dict[int, str]:
+        for i in range(lo, hi):
+            frame = self._step(frame, i)
+        return frame
+
+    def _step(self, frame: Dict[int, str], i: int) -> Dict[int, str]:
+        self.replayed += 1
+        return apply_gate_rules(self.gates[i], frame)
@@ -0,0 +1,100 @@
+# opt-in instrumentation of the propagation engine's per-gate loops
+
+from collections import Counter, defaultdict
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from spidertrace.frame import BatchFrame, PauliFrame, unpack_bits
+
+
+class Instrumentation:
+    """
+    Per-gate statistics collected by the engine while installed.
+
+    counts[name]: gates of each kind applied
+    seconds[name]: cumulative wall time spent applying them
+    weight_histogram[bin][w]: frames of weight w seen after a gate at a
+        position in ``[bin * time_bin, (bin + 1) * time_bin)``; a BatchFrame
+        contributes one entry per shot
+    on_step(position, name, qubits, frame): called after every gate with the
+        live frame (a dict, PauliFrame or BatchFrame); it must not modify it
+
+    Install with ``spidertrace.engine.instrumented()``. While none is
+    installed the engine never calls into this class: each entry point
+    checks for an installed instance once per call, not once per gate.
+    Timings include the per-gate bookkeeping, so read them as relative
+    costs of the gate kinds rather than as uninstrumented throughput.
+    """
+
+    def __init__(self, on_step: Optional[Callable] = None, time_bin: int = 64,
+                 weights: bool = True):
+        if time_bin < 1:
+            raise ValueError("time_bin must be >= 1")
+        self.on_step = on_step
+        self.time_bin = time_bin
+        self.weights = weights
+        self.reset()
+
+    def reset(self):
+        """Zeroes every counter and histogram."""
+        self.counts: Counter = Counter()
+        self.seconds: Dict[str, float] = defaultdict(float)
+        self.weight_histogram: Dict[int, Counter] = defaultdict(Counter)
+
+    def record(self, name: str, position: int, qubits: tuple, frame, seconds: float):
+        """Accounts for one applied gate. Called by the engine."""
+        self.counts[name] += 1
+        self.seconds[name] += seconds
+        if self.weights:
+            bucket = self.weight_histogram[position // self.time_bin]
+            if isinstance(frame, BatchFrame):
+                w = np.bincount(batch_weights(frame))
+                for weight in np.flatnonzero(w):
+                    bucket[int(weight)] += int(w[weight])
+            elif isinstance(frame, PauliFrame):
+                bucket[frame.weight()] += 1
+            else:
+                bucket[sum(p != "I" for p in frame.values())] += 1
+        if self.on_step is not None:
+            self.on_step(position, name, qubits, frame)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+    def histogram(self) -> np.ndarray:
+        """Dense (time bins, max weight + 1) array of ``weight_histogram``."""
+        if not self.weight_histogram:
+            return np.zeros((0, 0), dtype=np.int64)
+        bins = max(self.weight_histogram) + 1
+        width = max(max(c) for c in self.weight_histogram.values()) + 1
+        out = np.zeros((bins, width), dtype=np.int64)
+        for b, counter in self.weight_histogram.items():
+            for w, n in counter.items():
+                out[b, w] = n
+        return out
+
+    def mean_weight(self) -> np.ndarray:
+        """Mean frame weight per time bin (NaN for bins with no gates)."""
+        hist = self.histogram()
+        total = hist.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return hist @ np.arange(hist.shape[1]) / total
+
+    def summary(self) -> str:
+        """Table of gate kinds by cumulative time."""
+        lines = [f"{'gate':<6} {'count':>10} {'seconds':>10} {'us/gate':>9}"]
+        for name, secs in sorted(self.seconds.items(), key=lambda kv: -kv[1]):
+            n = self.counts[name]
+            lines.append(f"{name:<6} {n:>10} {secs:>10.4f} {1e6 * secs / n:>9.2f}")
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return (f"Instrumentation({sum(self.counts.values())} gates, "
+                f"{self.total_seconds:.4f} s)")
+
+
+def batch_weights(frame: BatchFrame) -> np.ndarray:
+    """Weight of every shot of a BatchFrame, as a (num_shots,) array."""
+    return unpack_bits(frame.x | frame.z, frame.num_shots).sum(axis=0)
@@ -0,0 +1,60 @@
+# forward light-cone index: which gates can still reach a fault's support
+
+from bisect import bisect_left
+from typing import List, Sequence
+
+import numpy as np
+
+from spidertrace.compiled import compile_circuit
+
+
+class LightConeIndex:
+    """
+    For every qubit, the sorted positions of the gates that act on it.
+
+    ``next_gate(q, pos)`` is the earliest gate at or after ``pos`` touching q.
+    A gate only changes the frame if it touches a qubit in the frame's
+    support, so a propagation can jump from one such gate to the next instead
+    of visiting every position. For a low-weight fault injected late in a
+    long circuit that skips almost everything.
+    """
+
+    __slots__ = ("num_positions", "positions")
+
+    def __init__(self, supports: Sequence[Sequence[int]], num_qubits: int = 0):
+        """
+        supports: for each position, the qubits acted on there (gates, or any
+        other op such as a whole layer or a reset).
+        """
+        self.num_positions = len(supports)
+        width = max([num_qubits] + [q + 1 for qs in supports for q in qs])
+        self.positions: List[List[int]] = [[] for _ in range(width)]
+        for pos, qs in enumerate(supports):
+            for q in qs:
+                self.positions[q].append(pos)
+
+    @classmethod
+    def from_circuit(cls, circuit_sequence) -> "LightConeIndex":
+        """Index a Gate list or CompiledCircuit, one position per gate."""
+        compiled = compile_circuit(circuit_sequence)
+        index = cls.__new__(cls)
+        index.num_positions = len(compiled)
+        q0, q1 = compiled.q0, compiled.q1
+        pos = np.arange(len(compiled))
+        two = q1 >= 0
+        qubits = np.concatenate([q0, q1[two]])
+        where = np.concatenate([pos, pos[two]])
+        order = np.lexsort((where, qubits))
+        qubits, where = qubits[order], where[order]
+        bounds = np.searchsorted(qubits, np.arange(compiled.num_qubits + 1))
+        index.positions = [where[bounds[q]:bounds[q + 1]].tolist()
+                           for q in range(compiled.num_qubits)]
+        return index
+
+    def next_gate(self, q: int, pos: int) -> int:
+        """Earliest position >= pos acting on q, or num_positions if none."""
+        if q >= len(self.positions):
+            return self.num_positions
+        gates = self.positions[q]
+        i = bisect_left(gates, pos)
+        return gates[i] if i < len(gates) else self.num_positions
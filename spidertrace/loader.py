@@ -0,0 +1,214 @@
+# streaming .stim text loader: circuit files straight into compiled programs
+
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from spidertrace.compiled import (MEASURE_OPS, OP_ARITY, STIM_PROGRAM_OPCODES, _STIM_ANNOTATIONS,
+                                  CompiledCircuit, _is_stim_noise)
+
+# NAME, optional [tag], optional (args), targets
+_LINE = re.compile(r"([A-Za-z][A-Za-z0-9_]*)(?:\[[^\]]*\])?\s*(?:\(([^)]*)\))?\s*(.*)")
+# stim spellings that only the text format can contain (stim.Circuit
+# canonicalizes them on parsing)
+_TEXT_ALIASES = {"MZ": "M", "RZ": "R", "MRZ": "MR", "CORRELATED_ERROR": "E"}
+_REPEAT = object()
+
+
+def load_stim_program(source, num_qubits: Optional[int] = None,
+                      records: bool = True) -> CompiledCircuit:
+    """
+    Reads a .stim circuit and compiles it into one CompiledCircuit, the same
+    program compile_stim_program builds from the parsed stim.Circuit.
+
+    source: path of a .stim file, an open text file, or any iterable of lines
+    num_qubits: frame width; defaults to one past the largest qubit named
+                anywhere in the file (stim's ``num_qubits``)
+    records: keep DETECTOR / OBSERVABLE_INCLUDE (see compile_stim_program)
+
+    The text is read a line at a time and never turned into stim objects,
+    flattened instruction lists or Gates: operations go straight into flat
+    integer buffers. REPEAT bodies are parsed once and replayed.
+    """
+    builder = _ProgramBuilder(records)
+    for item in _instructions(_lines(source)):
+        builder.add(*item)
+    return builder.finish(num_qubits)
+
+
+def iter_stim_chunks(source, chunk_size: int = 1 << 16,
+                     num_qubits: Optional[int] = None) -> Iterator[CompiledCircuit]:
+    """
+    Reads a .stim circuit lazily as consecutive program fragments of about
+    ``chunk_size`` operations, so a deep circuit can be propagated while it
+    is still being read, in memory bounded by the chunk size.
+
+    Each fragment carries its own TICK positions but no detector records
+    (as ``records=False``); chained together they are the whole program,
+    e.g. ``for chunk in iter_stim_chunks(path): frame = propagate_final(chunk, frame)``.
+    Without ``num_qubits`` each fragment is as wide as the qubits it touches;
+    pass it when feeding fixed-width PauliFrame / BatchFrame objects.
+    """
+    builder = _ProgramBuilder(records=False)
+    for item in _instructions(_lines(source)):
+        builder.add(*item)
+        if len(builder) >= chunk_size:
+            yield builder.finish(num_qubits, whole=False)
+            builder = _ProgramBuilder(records=False, start=builder)
+    if len(builder) or builder.ticks:
+        yield builder.finish(num_qubits, whole=False)
+
+
+def _lines(source) -> Iterator[str]:
+    if isinstance(source, str) or hasattr(source, "__fspath__"):
+        with open(source) as f:
+            yield from f
+    else:
+        yield from source
+
+
+def _instructions(lines: Iterable[str]) -> Iterator[Tuple[str, str, List[str]]]:
+    # (NAME, args, targets) of the unrolled circuit
+    lines = iter(lines)
+    for item in _items(lines, nested=False):
+        if item[0] is _REPEAT:
+            yield from _unroll(item[1], item[2])
+        else:
+            yield item
+
+
+def _items(lines: Iterator[str], nested: bool) -> Iterator[tuple]:
+    # one nesting level; a REPEAT consumes its body through the closing brace
+    for raw in lines:
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line == "}":
+            if not nested:
+                raise ValueError("unmatched '}' in stim circuit")
+            return
+        m = _LINE.fullmatch(line)
+        if m is None:
+            raise ValueError(f"cannot parse stim line {raw.strip()!r}")
+        name, args, rest = m.group(1).upper(), m.group(2) or "", m.group(3)
+        if name == "REPEAT":
+            if not rest.endswith("{"):
+                raise ValueError(f"expected '{{' after REPEAT: {raw.strip()!r}")
+            yield (_REPEAT, int(rest[:-1]), list(_items(lines, nested=True)))
+        else:
+            yield (_TEXT_ALIASES.get(name, name), args, rest.split())
+    if nested:
+        raise ValueError("unterminated REPEAT block in stim circuit")
+
+
+def _unroll(count: int, body: list) -> Iterator[Tuple[str, str, List[str]]]:
+    for _ in range(count):
+        for item in body:
+            if item[0] is _REPEAT:
+                yield from _unroll(item[1], item[2])
+            else:
+                yield item
+
+
+def _qubits(tokens: List[str]) -> List[int]:
+    try:
+        return [int(t) for t in tokens]
+    except ValueError:
+        pass
+    out = []
+    for t in tokens:
+        digits = t.lstrip("!")
+        if not digits.isdigit():
+            raise ValueError(f"unsupported stim target {t!r}")
+        out.append(int(digits))
+    return out
+
+
+def _max_qubit(tokens: List[str]) -> int:
+    # largest qubit among noise / coordinate targets such as 3, !3 or X3
+    best = -1
+    for t in tokens:
+        for part in t.split("*"):
+            digits = part.lstrip("!XYZxyz")
+            if digits.isdigit():
+                best = max(best, int(digits))
+    return best
+
+
+class _ProgramBuilder:
+    # flat operation buffers, flushed into numpy parts every _FLUSH operations
+    _FLUSH = 1 << 16
+
+    def __init__(self, records: bool, start: Optional["_ProgramBuilder"] = None):
+        self.records = records
+        self.ops: List[int] = []
+        self.q0: List[int] = []
+        self.q1: List[int] = []
+        self.parts: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self.flushed = 0
+        self.ticks: List[int] = []
+        self.detectors: List[Tuple[int, ...]] = []
+        self.observables: Dict[int, Tuple[int, ...]] = {}
+        # measurement count and width carry over between chunks
+        self.num_meas = start.num_meas if start else 0
+        self.max_qubit = start.max_qubit if start else -1
+
+    def __len__(self) -> int:
+        return self.flushed + len(self.ops)
+
+    def add(self, name: str, args: str, tokens: List[str]):
+        op = STIM_PROGRAM_OPCODES.get(name)
+        if op is not None:
+            qubits = _qubits(tokens)
+            if qubits:
+                self.max_qubit = max(self.max_qubit, max(qubits))
+            if OP_ARITY[op] == 1:
+                self.q0.extend(qubits)
+                self.q1.extend([-1] * len(qubits))
+            else:
+                if len(qubits) % 2:
+                    raise ValueError(f"{name} needs an even number of targets")
+                self.q0.extend(qubits[0::2])
+                self.q1.extend(qubits[1::2])
+            self.ops.extend([op] * (len(self.q0) - len(self.ops)))
+            if op in MEASURE_OPS:
+                self.num_meas += len(qubits)
+            if len(self.ops) >= self._FLUSH:
+                self._flush()
+        elif name == "TICK":
+            self.ticks.append(len(self))
+        elif name in ("DETECTOR", "OBSERVABLE_INCLUDE"):
+            if not self.records:
+                return
+            recs = []
+            for t in tokens:
+                if not (t.startswith("rec[") and t.endswith("]")):
+                    raise ValueError(f"unsupported {name} target {t!r}")
+                recs.append(self.num_meas + int(t[4:-1]))
+            if name == "DETECTOR":
+                self.detectors.append(tuple(recs))
+            else:
+                idx = int(float(args.split(",")[0]))
+                self.observables[idx] = self.observables.get(idx, ()) + tuple(recs)
+        elif name in _STIM_ANNOTATIONS or _is_stim_noise(name):
+            self.max_qubit = max(self.max_qubit, _max_qubit(tokens))
+        else:
+            raise ValueError(f"cannot compile stim instruction {name!r}")
+
+    def _flush(self):
+        self.parts.append((np.array(self.ops, dtype=np.uint8),
+                           np.array(self.q0, dtype=np.int32),
+                           np.array(self.q1, dtype=np.int32)))
+        self.flushed += len(self.ops)
+        self.ops, self.q0, self.q1 = [], [], []
+
+    def finish(self, num_qubits: Optional[int], whole: bool = True) -> CompiledCircuit:
+        self._flush()
+        ops, q0, q1 = (np.concatenate([p[k] for p in self.parts]) for k in range(3))
+        if num_qubits is None:
+            num_qubits = self.max_qubit + 1 if whole else int(max(q0.max(initial=-1),
+                                                               q1.max(initial=-1))) + 1
+        obs = [self.observables.get(k, ())
+               for k in range(max(self.observables, default=-1) + 1)]
+        return CompiledCircuit(ops, q0, q1, num_qubits, self.ticks, self.detectors, obs)
@@ -0,0 +1,90 @@
+# Clifford peephole optimizer: cancel and merge gates without changing propagation
+
+from typing import Optional
+
+import numpy as np
+
+from spidertrace.compiled import OP_CNOT, OP_CZ, OP_H, CompiledCircuit, compile_circuit
+from spidertrace.schedule import LayeredCircuit, schedule_layers
+
+
+def optimize_circuit(circuit_sequence, num_qubits: Optional[int] = None):
+    """
+    Peephole-optimizes a Gate list, CompiledCircuit or LayeredCircuit and
+    returns the same kind of object.
+
+    Rewrites, each an exact identity on Pauli frames:
+      H(q) H(q)                 -> nothing
+      CNOT(c, t) CNOT(c, t)     -> nothing
+      CZ(a, b) CZ(a, b)         -> nothing (either operand order)
+      H(t) CZ(c, t) H(t)        -> CNOT(c, t)
+
+    Two gates count as adjacent when every gate between them acts on
+    disjoint qubits, so they commute out of the way; cancellations cascade
+    (H CNOT CNOT H disappears entirely). Resets and measurements are kept and
+    block rewrites on their qubit. For programs with TICKs (compile_stim_program)
+    nothing moves across a TICK and the tick positions are renumbered, so the
+    map from every tick to the end is unchanged; detector records index
+    measurements, which are never removed.
+    """
+    if isinstance(circuit_sequence, LayeredCircuit):
+        return schedule_layers(optimize_circuit(circuit_sequence.compiled))
+    compiled = compile_circuit(circuit_sequence, num_qubits)
+    ops, q0, q1 = (list(a) for a in compiled.instruction_lists())
+    alive = [True] * len(ops)
+    ticks = set(compiled.ticks.tolist())
+    # per qubit: positions of the live operations on it since the last TICK
+    stacks = {}
+
+    def last(q):
+        stack = stacks.get(q)
+        while stack and not alive[stack[-1]]:
+            stack.pop()
+        return stack[-1] if stack else -1
+
+    def before(q, j):
+        # the live operation on q preceding position j (j is live on q)
+        stack = stacks[q]
+        for i in range(len(stack) - 2, -1, -1):
+            if alive[stack[i]] and stack[i] < j:
+                return stack[i]
+        return -1
+
+    for pos in range(len(ops)):
+        if pos in ticks:
+            stacks.clear()
+        op, a, b = ops[pos], q0[pos], q1[pos]
+        if op == OP_H:
+            j = last(a)
+            if j >= 0 and ops[j] == OP_H:
+                alive[pos] = alive[j] = False
+                continue
+            if j >= 0 and ops[j] == OP_CZ:
+                i = before(a, j)
+                if i >= 0 and ops[i] == OP_H:
+                    # H(a) CZ(c, a) H(a): the first H only commutes past gates
+                    # off qubit a, so the three fuse at the CZ's position
+                    control = q1[j] if q0[j] == a else q0[j]
+                    ops[j], q0[j], q1[j] = OP_CNOT, control, a
+                    alive[pos] = alive[i] = False
+                    continue
+        elif op in (OP_CNOT, OP_CZ):
+            j = last(a)
+            if j >= 0 and j == last(b) and ops[j] == op and (
+                    (q0[j], q1[j]) == (a, b) or (op == OP_CZ and (q0[j], q1[j]) == (b, a))):
+                alive[pos] = alive[j] = False
+                continue
+        stacks.setdefault(a, []).append(pos)
+        if b >= 0:
+            stacks.setdefault(b, []).append(pos)
+
+    keep = np.flatnonzero(alive)
+    # a TICK before position p now sits before the survivors that preceded p
+    survivors_before = np.concatenate([[0], np.cumsum(alive)])
+    out = CompiledCircuit(np.asarray(ops, dtype=np.uint8)[keep], np.asarray(q0)[keep],
+                          np.asarray(q1)[keep], compiled.num_qubits,
+                          survivors_before[compiled.ticks], compiled.detectors,
+                          compiled.observables)
+    if isinstance(circuit_sequence, CompiledCircuit):
+        return out
+    return out.gates()
@@ -0,0 +1,140 @@
+# multi-process sharded propagation over a compiled circuit in shared memory
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from spidertrace.compiled import CompiledCircuit, compile_circuit
+from spidertrace.engine import run_packed
+from spidertrace.frame import _CODE_X, _CODE_Z, BatchFrame, num_words, pack_bits, unpack_bits
+
+DEFAULT_SHARD_SIZE = 4096
+
+# per-worker state, filled in by _attach in each pool process
+_WORKER: Dict[str, object] = {}
+
+
+def propagate_sharded(circuit_sequence, paulis, starts=None, num_qubits: Optional[int] = None,
+                      workers: Optional[int] = None,
+                      shard_size: int = DEFAULT_SHARD_SIZE) -> np.ndarray:
+    """
+    Final frames of many faults, split into shards across a process pool.
+
+    circuit sequence: list of Gate objects or a CompiledCircuit
+    paulis: (faults, qubits) array of Pauli codes, 0=I 1=X 2=Y 3=Z
+    starts: program position where each fault is injected (default 0)
+    num_qubits: frame width; defaults to cover both the array and the circuit
+    workers: number of processes (default os.cpu_count()); 1 runs in-process
+    shard_size: faults per task, i.e. bit lanes per BatchFrame
+    returns: (faults, num_words(2 * num_qubits)) uint64 array; row i is the
+             packed final frame of fault i, X bits of every qubit then Z bits
+             (the layout of Tableau rows and BasisImageTable.image_bits)
+
+    The program arrays, the faults and the output are placed in one
+    multiprocessing.shared_memory block, so each worker attaches to them by
+    name instead of receiving pickled copies; tasks are just (lo, hi) fault
+    ranges and every shard writes its rows of the output in place.
+    Inside a shard, faults run as bit lanes of one BatchFrame, sorted by
+    injection point: the frame is advanced to each start in turn and the
+    faults starting there are XORed in (their lanes are still identity).
+    """
+    compiled = compile_circuit(circuit_sequence)
+    paulis = np.asarray(paulis, dtype=np.uint8)
+    if paulis.ndim != 2:
+        raise ValueError(f"expected a (faults, qubits) array, got shape {paulis.shape}")
+    num_faults = paulis.shape[0]
+    if num_qubits is None:
+        num_qubits = max(paulis.shape[1], compiled.num_qubits)
+    if paulis.shape[1] > num_qubits:
+        raise ValueError(f"array has {paulis.shape[1]} qubit columns but num_qubits={num_qubits}")
+    if starts is None:
+        starts = np.zeros(num_faults, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    if starts.shape != (num_faults,):
+        raise ValueError(f"expected {num_faults} starts, got shape {starts.shape}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    shards = [(lo, min(lo + shard_size, num_faults)) for lo in range(0, num_faults, shard_size)]
+
+    arrays = {
+        "opcode": compiled.opcode, "q0": compiled.q0, "q1": compiled.q1,
+        "paulis": paulis, "starts": starts,
+        "out": np.zeros((num_faults, num_words(2 * num_qubits)), dtype=np.uint64),
+    }
+    if workers <= 1 or len(shards) <= 1:
+        state = _state(arrays, num_qubits)
+        for lo, hi in shards:
+            _propagate_shard(state, lo, hi)
+        return arrays["out"]
+
+    block, layout = _share(arrays)
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shards)), initializer=_attach,
+                                 initargs=(block.name, layout, num_qubits)) as pool:
+            for _ in pool.map(_run_shard, shards):
+                pass
+        lo, dtype, shape = layout["out"]
+        return np.ndarray(shape, dtype, buffer=block.buf, offset=lo).copy()
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _share(arrays: Dict[str, np.ndarray]) -> Tuple[shared_memory.SharedMemory, dict]:
+    # one block for every array, each at an 8-byte aligned offset
+    layout, size = {}, 0
+    for name, arr in arrays.items():
+        layout[name] = (size, arr.dtype.str, arr.shape)
+        size += (arr.nbytes + 7) // 8 * 8
+    block = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, arr in arrays.items():
+        offset, dtype, shape = layout[name]
+        np.ndarray(shape, dtype, buffer=block.buf, offset=offset)[...] = arr
+    return block, layout
+
+
+def _attach(name: str, layout: dict, num_qubits: int):
+    block = shared_memory.SharedMemory(name=name)
+    arrays = {key: np.ndarray(shape, dtype, buffer=block.buf, offset=offset)
+              for key, (offset, dtype, shape) in layout.items()}
+    _WORKER.update(_state(arrays, num_qubits))
+    _WORKER["block"] = block           # keep the mapping alive
+
+
+def _state(arrays: Dict[str, np.ndarray], num_qubits: int) -> dict:
+    program = CompiledCircuit(arrays["opcode"], arrays["q0"], arrays["q1"], num_qubits)
+    return {"program": program, "paulis": arrays["paulis"], "starts": arrays["starts"],
+            "out": arrays["out"], "num_qubits": num_qubits}
+
+
+def _run_shard(shard: Tuple[int, int]):
+    _propagate_shard(_WORKER, *shard)
+
+
+def _propagate_shard(state: dict, lo: int, hi: int):
+    program, n = state["program"], state["num_qubits"]
+    starts = state["starts"][lo:hi]
+    order = np.argsort(starts, kind="stable")
+    paulis = state["paulis"][lo:hi][order]
+    starts = starts[order]
+    shots, width = paulis.shape
+    fx = pack_bits(_CODE_X[paulis].T)
+    fz = pack_bits(_CODE_Z[paulis].T)
+    frame = BatchFrame(n, shots)
+    bounds = np.flatnonzero(np.diff(starts)) + 1
+    groups = np.split(np.arange(shots), bounds)
+    position = int(starts[0]) if shots else 0
+    for lanes in groups:
+        start = int(starts[lanes[0]])
+        run_packed(program, frame, position, start)
+        position = start
+        # lanes are contiguous after sorting, so the mask is one bit range
+        mask = pack_bits((np.arange(shots) >= lanes[0]) & (np.arange(shots) <= lanes[-1]))
+        frame.x[:width] ^= fx & mask
+        frame.z[:width] ^= fz & mask
+    run_packed(program, frame, position)
+    bits = np.concatenate([unpack_bits(frame.x, shots), unpack_bits(frame.z, shots)])
+    state["out"][lo + order] = pack_bits(bits.T)
@@ -0,0 +1,299 @@
+# REPEAT-aware programs: loop bodies compiled once, iterated without unrolling
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from spidertrace.compact import used_qubits
+from spidertrace.compiled import CompiledCircuit, compile_stim_program
+from spidertrace.engine import propagate_final
+from spidertrace.frame import _PAULI_TO_XZ, pack_bits
+from spidertrace.lightcone import LightConeIndex
+from spidertrace.tableau import SuffixTableaux, Tableau
+
+
+class RepeatBlock:
+    """A loop body (itself a LoopProgram) executed ``count`` times."""
+
+    __slots__ = ("body", "count")
+
+    def __init__(self, body: "LoopProgram", count: int):
+        self.body = body
+        self.count = count
+
+    @property
+    def num_ticks(self) -> int:
+        return self.body.num_ticks * self.count
+
+    def __repr__(self) -> str:
+        return f"RepeatBlock({self.count} x {self.body!r})"
+
+
+class LoopProgram:
+    """
+    A stim circuit kept in its REPEAT structure.
+
+    segments: straight-line CompiledCircuits (gates, resets, measurements and
+    local TICK positions, no detector records) and RepeatBlocks, in order.
+    Each segment is compiled once however many times it runs, so memory does
+    not grow with the number of rounds.
+
+    Ticks are counted as in the flattened circuit: tick bucket T is everything
+    after the T-th TICK of the unrolled circuit.
+    """
+
+    __slots__ = ("segments", "num_qubits", "lightcones", "num_ticks")
+
+    def __init__(self, segments: Sequence[Union[CompiledCircuit, RepeatBlock]], num_qubits: int):
+        self.segments = list(segments)
+        self.num_qubits = num_qubits
+        # light-cone index per straight segment (None for loops)
+        self.lightcones = [LightConeIndex.from_circuit(seg)
+                           if isinstance(seg, CompiledCircuit) else None
+                           for seg in self.segments]
+        self.num_ticks = sum(_segment_ticks(seg) for seg in self.segments)
+
+    def flattened(self) -> CompiledCircuit:
+        """The unrolled program (without detector records)."""
+        parts = []
+        self._unroll(parts)
+        ops = np.concatenate([p.opcode for p in parts]) if parts else []
+        q0 = np.concatenate([p.q0 for p in parts]) if parts else []
+        q1 = np.concatenate([p.q1 for p in parts]) if parts else []
+        ticks, offset = [], 0
+        for p in parts:
+            ticks.extend((p.ticks + offset).tolist())
+            offset += len(p)
+        return CompiledCircuit(ops, q0, q1, self.num_qubits, ticks)
+
+    def used_qubits(self) -> np.ndarray:
+        """Sorted indices of the qubits any operation in any segment touches."""
+        parts = [seg.body.used_qubits() if isinstance(seg, RepeatBlock) else used_qubits(seg)
+                 for seg in self.segments]
+        return np.unique(np.concatenate(parts)) if parts else np.zeros(0, dtype=np.int32)
+
+    def remap(self, qubit_map) -> "LoopProgram":
+        """The same loops over a QubitMap's compact indices (spidertrace.compact)."""
+        segments = [RepeatBlock(seg.body.remap(qubit_map), seg.count)
+                    if isinstance(seg, RepeatBlock) else qubit_map.apply(seg)
+                    for seg in self.segments]
+        return LoopProgram(segments, qubit_map.num_qubits)
+
+    def _unroll(self, parts: List[CompiledCircuit]):
+        for seg in self.segments:
+            if isinstance(seg, RepeatBlock):
+                for _ in range(seg.count):
+                    seg.body._unroll(parts)
+            else:
+                parts.append(seg)
+
+    def __repr__(self) -> str:
+        return f"LoopProgram({len(self.segments)} segments, {self.num_ticks} ticks)"
+
+
+def _segment_ticks(seg) -> int:
+    return seg.num_ticks if isinstance(seg, RepeatBlock) else len(seg.ticks)
+
+
+def compile_stim_loops(stim_circuit, num_qubits: Optional[int] = None) -> LoopProgram:
+    """
+    Compiles a stim circuit into a LoopProgram without unrolling its REPEAT
+    blocks (nested blocks are kept nested). Noise is skipped, as in
+    spidertrace.compiled.compile_stim_program.
+    """
+    if num_qubits is None:
+        num_qubits = stim_circuit.num_qubits
+    segments, pending = [], []
+
+    def flush():
+        if pending:
+            segments.append(compile_stim_program(pending, num_qubits, records=False))
+            pending.clear()
+
+    for instr in stim_circuit:
+        if hasattr(instr, "body_copy"):          # stim.CircuitRepeatBlock
+            flush()
+            segments.append(RepeatBlock(compile_stim_loops(instr.body_copy(), num_qubits),
+                                        instr.repeat_count))
+        else:
+            pending.append(instr)
+    flush()
+    return LoopProgram(segments, num_qubits)
+
+
+def _locate(tick: int, seg_ticks: int) -> Optional[int]:
+    # tick (relative to the segment start) -> local start tick in the segment,
+    # or None when the injection point lies after the whole segment
+    return tick if tick <= seg_ticks else None
+
+
+def _iteration(tick: int, body_ticks: int) -> Tuple[int, int]:
+    # bucket T >= 1 starts after the T-th TICK, i.e. inside iteration
+    # (T - 1) // body_ticks, after that iteration's local TICK number
+    if tick == 0:
+        return 0, 0
+    i = (tick - 1) // body_ticks
+    return i, tick - i * body_ticks
+
+
+def propagate_loops(program: LoopProgram, errors, tick: int = 0) -> Dict[int, str]:
+    """
+    Final frame of a fault injected at ``tick`` of a LoopProgram.
+
+    errors: list of PauliError objects, or a {qubit: pauli} dict
+
+    Straight segments run with propagate_final's light-cone walk. A loop body
+    is applied iteration by iteration until the frame repeats a state seen at
+    the start of an earlier iteration; from then on the frame is periodic, and
+    the remaining iterations are skipped modulo the period. In a memory
+    experiment that typically happens after one or two rounds (ancilla parts
+    are reset, data parts persist), so the cost no longer grows with rounds.
+    """
+    if isinstance(errors, dict):
+        frame = dict(errors)
+    else:
+        frame = {e.qubit: e.type for e in errors}
+    return _run(program, frame, min(tick, program.num_ticks))
+
+
+def _run(program: LoopProgram, frame: Dict[int, str], tick: int) -> Dict[int, str]:
+    for seg, lightcone in zip(program.segments, program.lightcones):
+        if not frame:
+            break
+        seg_ticks = _segment_ticks(seg)
+        local = _locate(tick, seg_ticks)
+        if local is None:
+            tick -= seg_ticks
+            continue
+        tick = 0
+        if lightcone is not None:
+            start = 0 if local == 0 else int(seg.ticks[local - 1])
+            frame = propagate_final(seg, frame, start, lightcone)
+            continue
+        body = seg.body
+        if body.num_ticks == 0:
+            first, local = (0, 0) if local == 0 else (seg.count, 0)
+        else:
+            first, local = _iteration(local, body.num_ticks)
+        if first >= seg.count:
+            continue
+        frame = _run(body, frame, local)
+        frame = _iterate(body, frame, seg.count - first - 1)
+    return frame
+
+
+def _iterate(body: LoopProgram, frame: Dict[int, str], count: int) -> Dict[int, str]:
+    seen = {}
+    i = 0
+    while i < count and frame:
+        state = frozenset(frame.items())
+        if state in seen:
+            period = i - seen[state]
+            for _ in range((count - i) % period):
+                frame = _run(body, frame, 0)
+            return frame
+        seen[state] = i
+        frame = _run(body, frame, 0)
+        i += 1
+    return frame
+
+
+class LoopTableaux:
+    """
+    GF(2) maps for a LoopProgram, built without unrolling it.
+
+    Every loop body is compiled once into its per-tick suffix maps and its
+    whole-body Tableau B; B^(2^j) come from repeated squaring, so B^m is
+    applied to a frame with at most log2(count) table applications. A fault
+    injected at tick T then costs one suffix map inside its own iteration, the
+    binary powers for the remaining iterations, and one precomputed map for
+    everything after the loop. Memory is O(log rounds) tableaux instead of
+    one per tick.
+    """
+
+    def __init__(self, program: LoopProgram):
+        self.program = program
+        self.num_qubits = n = program.num_qubits
+        self.num_ticks = program.num_ticks
+        self._inner = []            # per segment: SuffixTableaux, or (body maps, powers)
+        full = []
+        for seg in program.segments:
+            if isinstance(seg, RepeatBlock):
+                body = LoopTableaux(seg.body)
+                powers = [body.full]
+                while (1 << len(powers)) <= seg.count:
+                    powers.append(powers[-1].then(powers[-1]))
+                self._inner.append((body, powers))
+                full.append(_power(powers, seg.count, n))
+            else:
+                suffixes = SuffixTableaux(seg)
+                self._inner.append(suffixes)
+                full.append(suffixes[0])
+        # tails[s]: everything after segment s
+        self._tails = [None] * len(full)
+        tail = Tableau.identity(n)
+        for s in range(len(full) - 1, -1, -1):
+            self._tails[s] = tail
+            tail = full[s].then(tail)
+        self.full = tail
+
+    def apply_bits(self, packed: np.ndarray, tick: int) -> np.ndarray:
+        """Final image of a packed 2N-bit frame injected at ``tick``."""
+        tick = min(tick, self.num_ticks)
+        for s, seg in enumerate(self.program.segments):
+            seg_ticks = _segment_ticks(seg)
+            local = _locate(tick, seg_ticks)
+            if local is None:
+                tick -= seg_ticks
+                continue
+            inner = self._inner[s]
+            if isinstance(inner, SuffixTableaux):
+                packed = inner[local].apply_bits(packed)
+            else:
+                body, powers = inner
+                if body.num_ticks == 0:
+                    first, local = (0, 0) if local == 0 else (seg.count, 0)
+                else:
+                    first, local = _iteration(local, body.num_ticks)
+                if first < seg.count:
+                    packed = body.apply_bits(packed, local)
+                    remaining = seg.count - first - 1
+                    j = 0
+                    while remaining:
+                        if remaining & 1:
+                            packed = powers[j].apply_bits(packed)
+                        remaining >>= 1
+                        j += 1
+            return self._tails[s].apply_bits(packed)
+        return packed
+
+    def propagate(self, errors: Dict[int, str], tick: int) -> Dict[int, str]:
+        """Final frame of a ``{qubit: pauli}`` fault injected at ``tick``."""
+        n = self.num_qubits
+        bits = np.zeros(2 * n, dtype=np.uint8)
+        for q, p in errors.items():
+            bits[q], bits[n + q] = _PAULI_TO_XZ[p]
+        return self.full.bits_to_dict(self.apply_bits(pack_bits(bits), tick))
+
+    @property
+    def nbytes(self) -> int:
+        total = self.full.rows.nbytes + sum(t.rows.nbytes for t in self._tails)
+        for inner in self._inner:
+            if isinstance(inner, SuffixTableaux):
+                total += inner.nbytes
+            else:
+                body, powers = inner
+                total += body.nbytes + sum(p.rows.nbytes for p in powers)
+        return total
+
+
+def _power(powers: List[Tableau], count: int, num_qubits: int) -> Tableau:
+    # B^count from the binary powers B^(2^j)
+    result = Tableau.identity(num_qubits)
+    j = 0
+    while count:
+        if count & 1:
+            result = result.then(powers[j])
+        count >>= 1
+        j += 1
+    return result
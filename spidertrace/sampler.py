@@ -0,0 +1,256 @@
+# noisy Pauli-frame sampler: random faults at every noise location, all shots in bit lanes
+
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from spidertrace.compiled import (OP_CNOT, OP_CZ, OP_H, OP_M, OP_MR, OP_MRX, OP_MX, OP_R,
+                                  OP_RX, OP_ARITY, CLIFFORD_OPS, MEASURE_OPS,
+                                  STIM_PROGRAM_OPCODES, CompiledCircuit, compile_stim_program)
+from spidertrace.frame import _BIT, _CODE_X, _CODE_Z, BatchFrame, num_words, unpack_bits
+
+
+class NoiseChannel(NamedTuple):
+    """
+    Independent Pauli noise on a set of targets, applied before program
+    operation ``position`` (``len(program)`` for noise after the last one).
+
+    targets: (m,) qubits, or (m, 2) qubit pairs for two-qubit channels
+    probs: probability of each non-identity Pauli, indexed by code - 1 with
+           codes 0=I 1=X 2=Y 3=Z; two-qubit channels use 4 * first + second
+           (15 entries, IX first, as in stim's PAULI_CHANNEL_2)
+    """
+    position: int
+    targets: np.ndarray
+    probs: np.ndarray
+
+
+class MeasurementNoise(NamedTuple):
+    """Flips measurement records [first, first + count) with probability p (``M(p)``)."""
+    first: int
+    count: int
+    p: float
+
+
+class SampleResult(NamedTuple):
+    detectors: np.ndarray              # (shots, num_detectors) bool
+    observables: np.ndarray            # (shots, num_observables) bool
+    frames: Optional[np.ndarray]       # (shots, num_qubits) final Pauli codes, if requested
+
+
+def _one_qubit(px: float, py: float, pz: float) -> np.ndarray:
+    return np.array([px, py, pz], dtype=np.float64)
+
+
+# stim single-qubit channels -> (X, Y, Z) probabilities from the gate arguments
+_CHANNELS_1 = {
+    "X_ERROR": lambda a: _one_qubit(a[0], 0, 0),
+    "Y_ERROR": lambda a: _one_qubit(0, a[0], 0),
+    "Z_ERROR": lambda a: _one_qubit(0, 0, a[0]),
+    "DEPOLARIZE1": lambda a: _one_qubit(a[0] / 3, a[0] / 3, a[0] / 3),
+    "PAULI_CHANNEL_1": lambda a: _one_qubit(*a),
+}
+_CHANNELS_2 = {
+    "DEPOLARIZE2": lambda a: np.full(15, a[0] / 15),
+    "PAULI_CHANNEL_2": lambda a: np.array(a, dtype=np.float64),
+}
+
+
+class FrameSampler:
+    """
+    Samples detector and observable flips by propagating random Pauli faults.
+
+    Every shot is one bit lane of a BatchFrame. Walking the program once,
+    each noise channel XORs its sampled Paulis into the lanes it hits, each
+    gate updates all lanes at once, and each measurement records the lanes
+    whose frame anticommutes with it. Detectors and observables are parities
+    of those records, i.e. flips relative to the noiseless circuit, the same
+    convention as stim's detector sampler. Hits are drawn with geometric
+    gaps, so the cost of a channel scales with the number of faults it
+    actually inserts rather than with targets x shots.
+
+    The channels come either from the noise instructions of a stim circuit
+    (``FrameSampler(circuit)``, e.g. the four knobs of
+    ``qec_zx_dataset.build_circuit``) or from uniform per-location
+    probabilities on a noiseless program (``FrameSampler.uniform``).
+    """
+
+    def __init__(self, stim_circuit=None, program: Optional[CompiledCircuit] = None,
+                 channels: Tuple[NoiseChannel, ...] = (),
+                 measurement_noise: Tuple[MeasurementNoise, ...] = ()):
+        if stim_circuit is not None:
+            program = compile_stim_program(stim_circuit)
+            channels, measurement_noise = _compile_noise(stim_circuit)
+        if program is None:
+            raise ValueError("give a stim circuit or a compiled program")
+        self.program = program
+        self.channels = tuple(sorted(channels, key=lambda c: c.position))
+        self.measurement_noise = tuple(measurement_noise)
+
+    @classmethod
+    def uniform(cls, program: CompiledCircuit, after_clifford_depolarization: float = 0.0,
+                after_reset_flip_probability: float = 0.0,
+                before_measure_flip_probability: float = 0.0) -> "FrameSampler":
+        """
+        Noise at every gate, reset and measurement location of a program:
+        DEPOLARIZE1 after H and the other one-qubit Cliffords, DEPOLARIZE2
+        after CNOT / CZ and the other two-qubit Cliffords, a flip of the
+        prepared state after each reset and of the measured basis before
+        each measurement (X for Z-basis operations, Z for X-basis ones).
+        """
+        ops, q0, q1 = (np.asarray(a) for a in (program.opcode, program.q0, program.q1))
+        pos = np.arange(len(ops))
+        channels = []
+
+        def add(mask, targets, probs, offset):
+            for p in np.flatnonzero(mask):
+                channels.append(NoiseChannel(int(pos[p]) + offset, targets[p:p + 1], probs))
+
+        if after_clifford_depolarization:
+            p = after_clifford_depolarization
+            arity = np.array([OP_ARITY[op] for op in range(max(OP_ARITY) + 1)])[ops]
+            unitary = np.isin(ops, (OP_H, OP_CNOT, OP_CZ) + tuple(CLIFFORD_OPS))
+            add(unitary & (arity == 1), q0, _CHANNELS_1["DEPOLARIZE1"]([p]), 1)
+            pairs = np.stack([q0, q1], axis=1)
+            add(unitary & (arity == 2), pairs, _CHANNELS_2["DEPOLARIZE2"]([p]), 1)
+        if after_reset_flip_probability:
+            p = after_reset_flip_probability
+            add(np.isin(ops, (OP_R, OP_MR)), q0, _one_qubit(p, 0, 0), 1)
+            add(np.isin(ops, (OP_RX, OP_MRX)), q0, _one_qubit(0, 0, p), 1)
+        if before_measure_flip_probability:
+            p = before_measure_flip_probability
+            add(np.isin(ops, (OP_M, OP_MR)), q0, _one_qubit(p, 0, 0), 0)
+            add(np.isin(ops, (OP_MX, OP_MRX)), q0, _one_qubit(0, 0, p), 0)
+        return cls(program=program, channels=tuple(channels))
+
+    def sample(self, shots: int, seed=None, frames: bool = False) -> SampleResult:
+        """
+        shots: number of shots
+        seed: seed or numpy Generator
+        frames: also return each shot's final frame as Pauli codes
+        """
+        rng = np.random.default_rng(seed)
+        program = self.program
+        frame = BatchFrame(program.num_qubits, shots)
+        records = np.zeros((program.num_measurements, num_words(shots)), dtype=np.uint64)
+        channels = self.channels
+        c, k = 0, 0
+        ops, q0, q1 = program.instruction_lists()
+        for i, op in enumerate(ops):
+            while c < len(channels) and channels[c].position == i:
+                _apply_channel(frame, channels[c], shots, rng)
+                c += 1
+            a, b = q0[i], q1[i]
+            if op in MEASURE_OPS:
+                records[k] = frame.x[a] if op in (OP_M, OP_MR) else frame.z[a]
+                k += 1
+            if op == OP_CNOT:
+                frame.cnot(a, b)
+            elif op == OP_H:
+                frame.h(a)
+            elif op == OP_CZ:
+                frame.cz(a, b)
+            elif op in (OP_R, OP_MR):
+                frame.reset(a)
+            elif op in (OP_RX, OP_MRX):
+                frame.reset_x(a)
+            elif op in CLIFFORD_OPS:
+                frame.clifford(CLIFFORD_OPS[op], a, b)
+        for channel in channels[c:]:
+            _apply_channel(frame, channel, shots, rng)
+        for noise in self.measurement_noise:
+            hits = _sparse_hits(rng, noise.count * shots, noise.p)
+            _xor_lanes(records, noise.first + hits // shots, hits % shots)
+        return SampleResult(_parities(records, program.detectors, shots),
+                            _parities(records, program.observables, shots),
+                            frame.to_codes() if frames else None)
+
+    @property
+    def num_detectors(self) -> int:
+        return len(self.program.detectors)
+
+    def __repr__(self) -> str:
+        return (f"FrameSampler({len(self.program)} operations, {len(self.channels)} noise "
+                f"channels, {self.num_detectors} detectors)")
+
+
+def _compile_noise(stim_circuit) -> Tuple[List[NoiseChannel], List[MeasurementNoise]]:
+    # positions count program operations exactly as compile_stim_program does
+    channels, measurement_noise = [], []
+    position, num_meas = 0, 0
+    for instr in stim_circuit.flattened():
+        name = instr.name
+        args = instr.gate_args_copy()
+        op = STIM_PROGRAM_OPCODES.get(name)
+        if op is not None:
+            qubits = [t.qubit_value for t in instr.targets_copy() if t.is_qubit_target]
+            count = len(qubits) if OP_ARITY[op] == 1 else len(qubits) // 2
+            if op in MEASURE_OPS:
+                if args and args[0]:
+                    measurement_noise.append(MeasurementNoise(num_meas, count, args[0]))
+                num_meas += count
+            position += count
+        elif name in _CHANNELS_1 or name in _CHANNELS_2:
+            qubits = np.array([t.qubit_value for t in instr.targets_copy()], dtype=np.int64)
+            if name in _CHANNELS_1:
+                channels.append(NoiseChannel(position, qubits, _CHANNELS_1[name](args)))
+            else:
+                channels.append(NoiseChannel(position, qubits.reshape(-1, 2),
+                                             _CHANNELS_2[name](args)))
+        elif name in ("E", "ELSE_CORRELATED_ERROR") or name.startswith("HERALDED"):
+            raise ValueError(f"FrameSampler does not support {name}")
+    return channels, measurement_noise
+
+
+def _sparse_hits(rng: np.random.Generator, n: int, p: float) -> np.ndarray:
+    """Sorted indices of the successes among n Bernoulli(p) trials."""
+    if n <= 0 or p <= 0:
+        return np.zeros(0, dtype=np.int64)
+    if p >= 1:
+        return np.arange(n, dtype=np.int64)
+    out = []
+    last = -1
+    while True:
+        chunk = int(1.1 * (n - last) * p) + 64
+        hits = last + np.cumsum(rng.geometric(p, chunk))
+        if hits[-1] >= n:
+            out.append(hits[hits < n])
+            break
+        out.append(hits)
+        last = int(hits[-1])
+    return np.concatenate(out)
+
+
+def _apply_channel(frame: BatchFrame, channel: NoiseChannel, shots: int,
+                   rng: np.random.Generator):
+    total = float(channel.probs.sum())
+    targets = channel.targets
+    hits = _sparse_hits(rng, len(targets) * shots, total)
+    if not len(hits):
+        return
+    target, lane = hits // shots, hits % shots
+    if len(channel.probs) == 1 or np.count_nonzero(channel.probs) == 1:
+        codes = np.full(len(hits), np.flatnonzero(channel.probs)[0] + 1)
+    else:
+        codes = rng.choice(len(channel.probs), size=len(hits), p=channel.probs / total) + 1
+    if targets.ndim == 1:
+        parts = ((targets[target], codes),)
+    else:
+        parts = ((targets[target, 0], codes >> 2), (targets[target, 1], codes & 3))
+    for qubits, pauli in parts:
+        x, z = _CODE_X[pauli].astype(bool), _CODE_Z[pauli].astype(bool)
+        _xor_lanes(frame.x, qubits[x], lane[x])
+        _xor_lanes(frame.z, qubits[z], lane[z])
+
+
+def _xor_lanes(rows: np.ndarray, row: np.ndarray, lane: np.ndarray):
+    # XOR bit ``lane`` of row ``row`` for every pair; repeated words accumulate
+    np.bitwise_xor.at(rows, (row, lane >> 6), _BIT[lane & 63])
+
+
+def _parities(records: np.ndarray, groups, shots: int) -> np.ndarray:
+    out = np.zeros((len(groups), records.shape[1]), dtype=np.uint64)
+    for k, recs in enumerate(groups):
+        if recs:
+            out[k] = np.bitwise_xor.reduce(records[list(recs)], axis=0)
+    return unpack_bits(out, shots).T.astype(bool)
@@ -0,0 +1,188 @@
+# moment/layer scheduling: group gates into layers of qubit-disjoint gates
+
+from typing import List, Optional
+
+import numpy as np
+
+from spidertrace.clifford import mix_rows
+from spidertrace.compiled import (OP_CNOT, OP_CZ, OP_H, OP_MR, OP_MRX, OP_R, OP_RX,
+                                  CLIFFORD_OPS, CompiledCircuit, compile_circuit)
+from spidertrace.frame import BatchFrame, PauliFrame, pack_bits, unpack_bits
+
+
+class Layer:
+    """
+    One moment of qubit-disjoint gates, stored per gate kind as index arrays.
+
+    h: qubits receiving an H
+    cnot_c, cnot_t: controls and targets of the CNOTs (pairwise)
+    cz_a, cz_b: operands of the CZs (pairwise)
+    reset, reset_x: qubits reset in the Z / X basis (R, MR / RX, MRX);
+    measurements leave the frame alone and are not stored
+    cliffords: (CliffordGate, qubits, partners) per generic gate kind present,
+               partners None for one-qubit gates
+
+    Because no qubit appears twice in a layer, the gates commute and a whole
+    kind can be applied with one fancy-indexed array operation.
+    """
+
+    __slots__ = ("h", "cnot_c", "cnot_t", "cz_a", "cz_b", "reset", "reset_x", "cliffords")
+
+    def __init__(self, h, cnot_c, cnot_t, cz_a, cz_b, reset=(), reset_x=(), cliffords=()):
+        self.h = h
+        self.cnot_c = cnot_c
+        self.cnot_t = cnot_t
+        self.cz_a = cz_a
+        self.cz_b = cz_b
+        self.reset = np.asarray(reset, dtype=np.int32)
+        self.reset_x = np.asarray(reset_x, dtype=np.int32)
+        self.cliffords = tuple(cliffords)
+
+    def __len__(self) -> int:
+        return (len(self.h) + len(self.cnot_c) + len(self.cz_a)
+                + len(self.reset) + len(self.reset_x)
+                + sum(len(qubits) for _, qubits, _ in self.cliffords))
+
+
+class LayeredCircuit:
+    """
+    A CompiledCircuit partitioned into layers of qubit-disjoint gates.
+
+    ``compiled`` is kept for hashing and for paths that need gate order;
+    ``layers`` is what the vectorized engine path iterates, so the number of
+    Python-level steps is the circuit depth rather than its gate count.
+    """
+
+    __slots__ = ("compiled", "layers")
+
+    def __init__(self, compiled: CompiledCircuit, layers: List[Layer]):
+        self.compiled = compiled
+        self.layers = layers
+
+    @property
+    def num_qubits(self) -> int:
+        return self.compiled.num_qubits
+
+    @property
+    def depth(self) -> int:
+        return len(self.layers)
+
+    def __len__(self) -> int:
+        return len(self.compiled)
+
+    def __hash__(self) -> int:
+        return hash(self.compiled)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, LayeredCircuit):
+            return NotImplemented
+        return self.compiled == other.compiled
+
+    def __repr__(self) -> str:
+        return f"LayeredCircuit({len(self)} gates, depth {self.depth})"
+
+
+def layer_indices(compiled: CompiledCircuit) -> np.ndarray:
+    """
+    ASAP layer of every gate: one past the latest layer that already touches
+    any of its qubits. Gates on a shared qubit keep their relative order, so
+    the layering is equivalent to the original sequence.
+    """
+    last = {}
+    out = np.empty(len(compiled), dtype=np.int64)
+    for i, (op, a, b) in enumerate(compiled.instructions()):
+        if b < 0:
+            layer = last.get(a, -1) + 1
+            last[a] = layer
+        else:
+            layer = max(last.get(a, -1), last.get(b, -1)) + 1
+            last[a] = last[b] = layer
+        out[i] = layer
+    return out
+
+
+def schedule_layers(circuit_sequence, num_qubits: Optional[int] = None) -> LayeredCircuit:
+    """
+    Groups a Gate list or CompiledCircuit into layers of qubit-disjoint gates.
+
+    For stim surface-code circuits this recovers (at most) the TICK layering
+    that compile_stim_circuit flattens away.
+    """
+    if isinstance(circuit_sequence, LayeredCircuit):
+        return circuit_sequence
+    compiled = compile_circuit(circuit_sequence, num_qubits)
+    idx = layer_indices(compiled)
+    depth = int(idx.max()) + 1 if len(idx) else 0
+
+    order = np.argsort(idx, kind="stable")
+    bounds = np.searchsorted(idx[order], np.arange(depth + 1))
+    opcode, q0, q1 = compiled.opcode, compiled.q0, compiled.q1
+    layers = []
+    for k in range(depth):
+        sel = order[bounds[k]:bounds[k + 1]]
+        ops = opcode[sel]
+        hs, cx, cz = sel[ops == OP_H], sel[ops == OP_CNOT], sel[ops == OP_CZ]
+        r = sel[(ops == OP_R) | (ops == OP_MR)]
+        rx = sel[(ops == OP_RX) | (ops == OP_MRX)]
+        cliffords = []
+        for op in np.unique(ops[ops > OP_MRX]):
+            g = sel[ops == op]
+            gate = CLIFFORD_OPS[int(op)]
+            cliffords.append((gate, q0[g], q1[g] if gate.arity == 2 else None))
+        layers.append(Layer(q0[hs], q0[cx], q1[cx], q0[cz], q1[cz], q0[r], q0[rx], cliffords))
+    return LayeredCircuit(compiled, layers)
+
+
+def _apply_layer_rows(layer: Layer, x: np.ndarray, z: np.ndarray):
+    # x / z indexed by qubit along axis 0 (one row per qubit)
+    if len(layer.h):
+        h = layer.h
+        tmp = x[h]
+        x[h] = z[h]
+        z[h] = tmp
+    if len(layer.cnot_c):
+        c, t = layer.cnot_c, layer.cnot_t
+        x[t] ^= x[c]
+        z[c] ^= z[t]
+    if len(layer.cz_a):
+        a, b = layer.cz_a, layer.cz_b
+        z[a] ^= x[b]
+        z[b] ^= x[a]
+    if len(layer.reset):
+        x[layer.reset] = 0
+    if len(layer.reset_x):
+        z[layer.reset_x] = 0
+    for gate, a, b in layer.cliffords:
+        if b is None:
+            x[a], z[a] = mix_rows(gate.matrix, (x[a], z[a]))
+        else:
+            x[a], z[a], x[b], z[b] = mix_rows(gate.matrix, (x[a], z[a], x[b], z[b]))
+
+
+def apply_layer(layer: Layer, frame):
+    """Applies one layer in place to a BatchFrame or PauliFrame and returns it."""
+    if isinstance(frame, BatchFrame):
+        _apply_layer_rows(layer, frame.x, frame.z)
+    else:
+        x = unpack_bits(frame.x, frame.num_qubits)
+        z = unpack_bits(frame.z, frame.num_qubits)
+        _apply_layer_rows(layer, x, z)
+        frame.x = pack_bits(x)
+        frame.z = pack_bits(z)
+    return frame
+
+
+def run_layered(layered: LayeredCircuit, frame):
+    """Applies every layer in order to a BatchFrame or PauliFrame and returns it."""
+    if isinstance(frame, PauliFrame):
+        # unpack once, run all layers on the bit arrays, repack once
+        x = unpack_bits(frame.x, frame.num_qubits)
+        z = unpack_bits(frame.z, frame.num_qubits)
+        for layer in layered.layers:
+            _apply_layer_rows(layer, x, z)
+        frame.x = pack_bits(x)
+        frame.z = pack_bits(z)
+        return frame
+    for layer in layered.layers:
+        _apply_layer_rows(layer, frame.x, frame.z)
+    return frame
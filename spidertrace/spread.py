@@ -0,0 +1,140 @@
+# exhaustive single-fault spread: final weight, data weight and hook flag of every fault
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from spidertrace.compiled import OP_M, OP_MX, CompiledCircuit, compile_circuit
+from spidertrace.frame import PAULI_CODES, unpack_bits
+from spidertrace.tableau import BasisImageTable
+
+# positions unpacked at a time when counting weights
+_CHUNK = 2048
+
+
+class SpreadTable:
+    """
+    Every single-qubit Pauli fault of a program and how far it spreads.
+
+    Row k is the fault ``pauli[k]`` (1=X 2=Y 3=Z) on ``qubit[k]`` injected just
+    before operation ``position[k]``, for each qubit that operation acts on:
+    arity x 3 rows per operation, in program order. A fault anywhere else is
+    one of these rows, because it is only acted on from the next operation
+    touching its qubit (``row``); the fault right after operation p on q is
+    ``row(p + 1, q, pauli)``.
+
+    weight[k]: number of qubits the final frame acts on
+    data_weight[k]: the same, counted on the data qubits only
+    hook[k]: a fault on a non-data qubit whose final frame has data weight
+             >= 2, i.e. one ancilla fault that the schedule turns into a
+             multi-qubit data error
+    """
+
+    __slots__ = ("num_qubits", "data_qubits", "position", "qubit", "pauli", "weight",
+                 "data_weight", "hook", "_table")
+
+    def __init__(self, table: BasisImageTable, data_qubits: np.ndarray, position, qubit,
+                 pauli, weight, data_weight, hook):
+        self._table = table
+        self.num_qubits = table.num_qubits
+        self.data_qubits = data_qubits
+        self.position = position
+        self.qubit = qubit
+        self.pauli = pauli
+        self.weight = weight
+        self.data_weight = data_weight
+        self.hook = hook
+
+    def __len__(self) -> int:
+        return len(self.position)
+
+    def row(self, position: int, qubit: int, pauli: str) -> int:
+        """Row of a fault on ``qubit`` injected before ``position``, or -1 if no
+        later operation touches the qubit (the fault reaches the end unchanged)."""
+        g = self._table.lightcone.next_gate(qubit, position)
+        if g >= self._table.num_positions:
+            return -1
+        k = np.searchsorted(self.position, g)
+        if self.qubit[k] != qubit:
+            k += 3
+        return int(k + PAULI_CODES.index(pauli) - 1)
+
+    def hooks(self) -> np.ndarray:
+        """Rows of the hook errors."""
+        return np.flatnonzero(self.hook)
+
+    def histogram(self, data: bool = True) -> np.ndarray:
+        """Number of faults per (data) weight, indexed by weight."""
+        return np.bincount(self.data_weight if data else self.weight)
+
+    def summary(self) -> str:
+        hist = self.histogram()
+        spread = ", ".join(f"{w}: {c}" for w, c in enumerate(hist) if c)
+        return (f"{len(self)} faults, {int(self.hook.sum())} hook errors, "
+                f"max weight {int(self.weight.max(initial=0))}; "
+                f"faults per data weight {{{spread}}}")
+
+    def __repr__(self) -> str:
+        return f"SpreadTable({len(self)} faults, {int(self.hook.sum())} hooks)"
+
+
+def fault_spread(program, data_qubits: Optional[Sequence[int]] = None,
+                 table: Optional[BasisImageTable] = None) -> SpreadTable:
+    """
+    Spread of every (position, qubit, Pauli) single fault of a program.
+
+    program: a CompiledCircuit, e.g. from compile_stim_program
+    data_qubits: defaults to the qubits of the final readout (the trailing M /
+                 MX operations, as in a memory experiment)
+    table: the program's BasisImageTable, if already built
+
+    One backward sweep (the BasisImageTable) gives the final image of X and Z
+    before every operation on its qubits; Y is their XOR. The weights of all
+    images are then counted with array operations, a block of positions at a
+    time, so the cost is one sweep plus O(faults x qubits) vectorized work.
+    """
+    program = compile_circuit(program)
+    if table is None:
+        table = BasisImageTable(program)
+    n = table.num_qubits
+    data = (_final_readout(program) if data_qubits is None
+            else np.asarray(data_qubits, dtype=np.int64))
+    is_data = np.zeros(n, dtype=bool)
+    is_data[data] = True
+
+    # (position, slot) of every operand, in program order
+    q1 = np.asarray(table.q1)
+    two = np.flatnonzero(q1 >= 0)
+    positions = np.concatenate([np.arange(table.num_positions), two])
+    slots = np.concatenate([np.zeros(table.num_positions, dtype=np.int64),
+                            np.ones(len(two), dtype=np.int64)])
+    order = np.lexsort((slots, positions))
+    positions, slots = positions[order], slots[order]
+    qubits = np.where(slots == 0, table.q0[positions], q1[positions])
+
+    weight = np.empty((len(positions), 3), dtype=np.int32)
+    data_weight = np.empty_like(weight)
+    for start in range(0, len(positions), _CHUNK):
+        sel = slice(start, start + _CHUNK)
+        # (k, X/Z, 2n) image bits, then the three Paulis' supports
+        bits = unpack_bits(table.images[positions[sel], slots[sel]], 2 * n)
+        x_img, z_img = bits[:, 0], bits[:, 1]
+        for c, img in enumerate((x_img, x_img ^ z_img, z_img)):
+            support = (img[:, :n] | img[:, n:]).astype(bool)
+            weight[sel, c] = support.sum(axis=1)
+            data_weight[sel, c] = support[:, is_data].sum(axis=1)
+
+    hook = (data_weight >= 2) & ~is_data[qubits][:, None]
+    return SpreadTable(table, data, np.repeat(positions, 3), np.repeat(qubits, 3).astype(np.int32),
+                       np.tile(np.arange(1, 4, dtype=np.uint8), len(positions)),
+                       weight.reshape(-1), data_weight.reshape(-1), hook.reshape(-1))
+
+
+def _final_readout(program: CompiledCircuit) -> np.ndarray:
+    ops = program.opcode
+    end = len(ops)
+    while end and ops[end - 1] in (OP_M, OP_MX):
+        end -= 1
+    if end == len(ops):
+        raise ValueError("program does not end in a readout; pass data_qubits")
+    return np.unique(program.q0[end:]).astype(np.int64)
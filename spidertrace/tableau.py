@@ -0,0 +1,268 @@
+# Clifford tableaux over GF(2): whole-circuit and per-tick suffix maps
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from spidertrace.clifford import mix_rows
+from spidertrace.compiled import (OP_CNOT, OP_CZ, OP_H, OP_MR, OP_MRX, OP_R, OP_RX,
+                                  CLIFFORD_OPS, MEASURE_OPS, CompiledCircuit, compile_circuit)
+from spidertrace.frame import _BIT, _XZ_TO_PAULI, WORD_BITS, num_words, pack_bits, unpack_bits
+from spidertrace.lightcone import LightConeIndex
+
+
+class Tableau:
+    """
+    Linear map on Pauli frames over GF(2), stored as the images of the basis.
+
+    A frame on N qubits is the 2N-bit vector v = [x_0..x_{N-1}, z_0..z_{N-1}].
+    ``rows[j]`` is the packed image of basis vector j (X_j for j < N, Z_{j-N}
+    otherwise), so the image of any frame is the XOR of the rows of its set
+    bits: one sparse matrix-vector product, independent of circuit depth.
+
+    Tableaux are built back to front. Prepending an earlier gate G to a map S
+    (S after G) is a row operation, e.g. for CNOT(c, t): G(X_c) = X_c X_t, so
+    ``row[X_c] ^= row[X_t]``. For unitary Clifford circuits the map is symplectic;
+    resets add the (non-invertible) projections X -> I, Z -> Z (R, MR) and
+    Z -> I, X -> X (RX, MRX), and measurements are the identity.
+    """
+
+    __slots__ = ("num_qubits", "rows")
+
+    def __init__(self, num_qubits: int, rows: Optional[np.ndarray] = None):
+        self.num_qubits = num_qubits
+        if rows is None:
+            rows = pack_bits(np.eye(2 * num_qubits, dtype=np.uint8))
+        self.rows = rows
+
+    @classmethod
+    def identity(cls, num_qubits: int) -> "Tableau":
+        return cls(num_qubits)
+
+    @classmethod
+    def from_circuit(cls, circuit_sequence, num_qubits: Optional[int] = None) -> "Tableau":
+        """Whole-circuit map of a Gate list or CompiledCircuit."""
+        compiled = compile_circuit(circuit_sequence)
+        if num_qubits is None:
+            num_qubits = compiled.num_qubits
+        return cls(num_qubits).prepend_circuit(compiled)
+
+    def copy(self) -> "Tableau":
+        return Tableau(self.num_qubits, self.rows.copy())
+
+    # ---- composition with earlier operations (row operations)
+
+    def prepend_gate(self, op: int, a: int, b: int = -1) -> "Tableau":
+        rows, n = self.rows, self.num_qubits
+        if op == OP_H:
+            rows[[a, n + a]] = rows[[n + a, a]]
+        elif op == OP_CNOT:
+            rows[a] ^= rows[b]                 # X_c -> X_c X_t
+            rows[n + b] ^= rows[n + a]         # Z_t -> Z_c Z_t
+        elif op == OP_CZ:
+            rows[a] ^= rows[n + b]             # X_a -> X_a Z_b
+            rows[b] ^= rows[n + a]             # X_b -> Z_a X_b
+        elif op in (OP_R, OP_MR):
+            rows[a] = 0
+        elif op in (OP_RX, OP_MRX):
+            rows[n + a] = 0
+        elif op in CLIFFORD_OPS:
+            # basis vector j maps to the XOR of the rows of its image: the
+            # transpose of the gate's forward matrix
+            sel = [a, n + a] if b < 0 else [a, n + a, b, n + b]
+            rows[sel] = mix_rows(CLIFFORD_OPS[op].matrix.T, rows[sel])
+        elif op not in MEASURE_OPS:
+            raise ValueError(f"unknown opcode {op}")
+        return self
+
+    def prepend_circuit(self, compiled: CompiledCircuit) -> "Tableau":
+        ops, q0, q1 = compiled.instruction_lists()
+        for i in range(len(ops) - 1, -1, -1):
+            self.prepend_gate(ops[i], q0[i], q1[i])
+        return self
+
+    def prepend_reset(self, qubits: Sequence[int]) -> "Tableau":
+        # a Z-basis reset discards the X component and keeps the Z component
+        for q in qubits:
+            self.rows[q] = 0
+        return self
+
+    # ---- application
+
+    def image_bits(self, x_qubits: Sequence[int], z_qubits: Sequence[int]) -> np.ndarray:
+        """Packed image of the frame with X bits on x_qubits and Z bits on z_qubits."""
+        n = self.num_qubits
+        sel = list(x_qubits) + [n + q for q in z_qubits]
+        if not sel:
+            return np.zeros(self.rows.shape[1], dtype=np.uint64)
+        return np.bitwise_xor.reduce(self.rows[sel], axis=0)
+
+    def apply_bits(self, packed: np.ndarray) -> np.ndarray:
+        """Image of a packed 2N-bit frame vector."""
+        sel = np.flatnonzero(unpack_bits(packed, 2 * self.num_qubits))
+        if not len(sel):
+            return np.zeros(self.rows.shape[1], dtype=np.uint64)
+        return np.bitwise_xor.reduce(self.rows[sel], axis=0)
+
+    def then(self, other: "Tableau") -> "Tableau":
+        """The map 'self, then other' as a new Tableau (a GF(2) matrix product)."""
+        n2 = 2 * self.num_qubits
+        a = unpack_bits(self.rows, n2).astype(np.float32)
+        b = unpack_bits(other.rows, n2).astype(np.float32)
+        # row j of a selects the rows of b to XOR; float32 sums are exact here
+        product = (a @ b).astype(np.int64) & 1
+        return Tableau(self.num_qubits, pack_bits(product.astype(np.uint8)))
+
+    def apply(self, errors: Dict[int, str]) -> Dict[int, str]:
+        """Image of a ``{qubit: pauli}`` frame, in the same dict format."""
+        xs = [q for q, p in errors.items() if p in ("X", "Y")]
+        zs = [q for q, p in errors.items() if p in ("Z", "Y")]
+        return self.bits_to_dict(self.image_bits(xs, zs))
+
+    def bits_to_dict(self, packed: np.ndarray) -> Dict[int, str]:
+        n = self.num_qubits
+        bits = unpack_bits(packed, 2 * n)
+        x, z = bits[:n], bits[n:]
+        return {int(q): _XZ_TO_PAULI[(int(x[q]), int(z[q]))]
+                for q in np.flatnonzero(x | z)}
+
+    def matrix(self) -> np.ndarray:
+        """Dense 2N x 2N uint8 matrix M with v' = M v (column j = image of e_j)."""
+        return unpack_bits(self.rows, 2 * self.num_qubits).T.copy()
+
+    def is_symplectic(self) -> bool:
+        """M^T Omega M == Omega over GF(2), true for any H/CNOT/CZ circuit."""
+        n = self.num_qubits
+        m = self.matrix().astype(np.int64)
+        omega = np.zeros((2 * n, 2 * n), dtype=np.int64)
+        omega[:n, n:] = np.eye(n, dtype=np.int64)
+        omega[n:, :n] = np.eye(n, dtype=np.int64)
+        return bool(np.array_equal((m.T @ omega @ m) % 2, omega))
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Tableau):
+            return NotImplemented
+        return self.num_qubits == other.num_qubits and np.array_equal(self.rows, other.rows)
+
+    def __repr__(self) -> str:
+        return f"Tableau({self.num_qubits} qubits)"
+
+
+class SuffixTableaux:
+    """
+    For every tick T, the map from tick T to the end of the circuit.
+
+    program: a CompiledCircuit with TICK positions, as built by
+    spidertrace.compiled.compile_stim_program. Tick bucket T starts right
+    after the T-th TICK (bucket 0 at the start of the program), so a fault at
+    tick T is acted on by every operation from ``tick_positions[T]`` on.
+
+    Built in one backward sweep (each operation is prepended once), after
+    which a fault injected at tick T reaches the final frame via
+    ``propagate`` with a single XOR over a few table rows instead of
+    replaying the gates.
+    """
+
+    def __init__(self, program: CompiledCircuit):
+        self.num_qubits = program.num_qubits
+        self.num_ticks = len(program.ticks)
+        self.tick_positions = _tick_positions(program)
+        self.suffixes: List[Tableau] = [None] * (self.num_ticks + 1)
+        current = Tableau.identity(self.num_qubits)
+        ops, q0, q1 = program.instruction_lists()
+        pos = len(ops)
+        for tick in range(self.num_ticks, -1, -1):
+            while pos > self.tick_positions[tick]:
+                pos -= 1
+                current.prepend_gate(ops[pos], q0[pos], q1[pos])
+            self.suffixes[tick] = current.copy()
+
+    def __getitem__(self, tick: int) -> Tableau:
+        return self.suffixes[tick]
+
+    def propagate(self, errors: Dict[int, str], tick: int) -> Dict[int, str]:
+        """Final frame of a ``{qubit: pauli}`` fault injected at ``tick``."""
+        return self.suffixes[min(tick, self.num_ticks)].apply(errors)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(t.rows.nbytes for t in self.suffixes)
+
+
+def _tick_positions(program: CompiledCircuit) -> np.ndarray:
+    # tick bucket T starts after the T-th TICK
+    return np.concatenate([[0], program.ticks]).astype(np.int64)
+
+
+class BasisImageTable:
+    """
+    Final-frame image of X_q and Z_q injected just before every operation.
+
+    program: a CompiledCircuit (gates, resets, measurements), e.g. from
+    spidertrace.compiled.compile_stim_program. A fault injected at position
+    p is acted on by the operations at positions >= p, so faults can be
+    placed between two gates of the same tick.
+
+    Only the images at the operation's own qubits are stored: the image of
+    X_q / Z_q at position p equals its image just before the next operation
+    touching q (found with a LightConeIndex), or X_q / Z_q itself when no
+    operation touches q again. That is 2 or 4 rows per position, all filled in
+    by one backward sweep of Tableau row operations.
+    """
+
+    def __init__(self, program: CompiledCircuit):
+        program = compile_circuit(program)
+        self.num_qubits = n = program.num_qubits
+        self.num_ticks = len(program.ticks)
+        self.tick_positions = _tick_positions(program)
+        self.opcode, self.q0, self.q1 = program.opcode, program.q0, program.q1
+        self.num_positions = len(program)
+        self.lightcone = LightConeIndex.from_circuit(program)
+
+        # images[p, slot, 0/1]: packed image of X/Z on the slot-th qubit of op p
+        ops, q0, q1 = program.instruction_lists()
+        self.images = np.zeros((self.num_positions, 2, 2, num_words(2 * n)), dtype=np.uint64)
+        current = Tableau.identity(n)
+        rows = current.rows
+        for p in range(self.num_positions - 1, -1, -1):
+            a, b = q0[p], q1[p]
+            current.prepend_gate(ops[p], a, b)
+            self.images[p, 0] = rows[[a, n + a]]
+            if b >= 0:
+                self.images[p, 1] = rows[[b, n + b]]
+
+    def _row(self, j: int, position: int) -> np.ndarray:
+        # image of basis vector j (X_q for j < N, Z_{j-N} otherwise)
+        q, comp = (j, 0) if j < self.num_qubits else (j - self.num_qubits, 1)
+        g = self.lightcone.next_gate(q, position)
+        if g >= self.num_positions:
+            row = np.zeros(self.images.shape[-1], dtype=np.uint64)
+            row[j // WORD_BITS] = _BIT[j % WORD_BITS]
+            return row
+        return self.images[g, 0 if self.q0[g] == q else 1, comp]
+
+    def image_bits(self, x_qubits: Sequence[int], z_qubits: Sequence[int],
+                   position: int) -> np.ndarray:
+        """Packed final image of X on x_qubits and Z on z_qubits injected at position."""
+        n = self.num_qubits
+        out = np.zeros(self.images.shape[-1], dtype=np.uint64)
+        for j in list(x_qubits) + [n + q for q in z_qubits]:
+            out ^= self._row(j, position)
+        return out
+
+    def propagate(self, errors: Dict[int, str], position: int) -> Dict[int, str]:
+        """Final frame of a ``{qubit: pauli}`` fault injected before ``position``."""
+        xs = [q for q, p in errors.items() if p in ("X", "Y")]
+        zs = [q for q, p in errors.items() if p in ("Z", "Y")]
+        bits = unpack_bits(self.image_bits(xs, zs, position), 2 * self.num_qubits)
+        x, z = bits[:self.num_qubits], bits[self.num_qubits:]
+        return {int(q): _XZ_TO_PAULI[(int(x[q]), int(z[q]))]
+                for q in np.flatnonzero(x | z)}
+
+    def propagate_tick(self, errors: Dict[int, str], tick: int) -> Dict[int, str]:
+        """Same seam as SuffixTableaux.propagate: inject at the start of ``tick``."""
+        return self.propagate(errors, int(self.tick_positions[min(tick, self.num_ticks)]))
+
+    @property
+    def nbytes(self) -> int:
+        return self.images.nbytes
@@ -0,0 +1,89 @@
+# trace containers: full per-step snapshots or delta-encoded steps
+
+from typing import Callable, Dict, List, Tuple
+
+
+class TraceStep:
+    def __init__(self, gate, errors_after):
+        self.gate = gate
+        self.errors_after = errors_after
+
+
+# one entry per changed qubit: (qubit, new Pauli), "I" meaning the error left it
+Delta = Tuple[Tuple[int, str], ...]
+
+
+class DeltaTrace:
+    """
+    Trace that records only the qubits changed by each gate.
+
+    Behaves like the list returned by propagate_errors (len, indexing,
+    iteration all give TraceStep objects) but stores one small delta per step
+    plus a full frame checkpoint every ``checkpoint_interval`` steps. Any step
+    is rebuilt from the nearest earlier checkpoint by replaying at most
+    ``checkpoint_interval`` deltas; ``trace[-1]`` and ``final`` are O(1).
+    """
+
+    def __init__(self, initial: Dict[int, str], gate_at: Callable[[int], object],
+                 checkpoint_interval: int = 64):
+        if checkpoint_interval < 1:
+            raise ValueError("checkpoint_interval must be >= 1")
+        self.checkpoint_interval = checkpoint_interval
+        self.deltas: List[Delta] = []
+        # checkpoints[k] is the frame before step k * checkpoint_interval
+        self.checkpoints: List[Dict[int, str]] = [dict(initial)]
+        self._gate_at = gate_at
+        self._final = dict(initial)
+
+    def append(self, delta: Delta, frame: Dict[int, str]):
+        """Record one step. ``frame`` is the live frame after the step."""
+        self.deltas.append(delta)
+        if len(self.deltas) % self.checkpoint_interval == 0:
+            self.checkpoints.append(frame.copy())
+        for q, p in delta:
+            if p == "I":
+                self._final.pop(q, None)
+            else:
+                self._final[q] = p
+
+    @property
+    def final(self) -> Dict[int, str]:
+        """Frame after the last step (a copy)."""
+        return dict(self._final)
+
+    def errors_after(self, i: int) -> Dict[int, str]:
+        """Frame after step i, rebuilt from the nearest checkpoint."""
+        n = len(self.deltas)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("trace index out of range")
+        if i == n - 1:
+            return self.final
+        k = i // self.checkpoint_interval
+        frame = dict(self.checkpoints[k])
+        for step in range(k * self.checkpoint_interval, i + 1):
+            _apply_delta(frame, self.deltas[step])
+        return frame
+
+    def __len__(self) -> int:
+        return len(self.deltas)
+
+    def __getitem__(self, i: int) -> TraceStep:
+        if i < 0:
+            i += len(self.deltas)
+        return TraceStep(self._gate_at(i), self.errors_after(i))
+
+    def __iter__(self):
+        frame = dict(self.checkpoints[0])
+        for i, delta in enumerate(self.deltas):
+            _apply_delta(frame, delta)
+            yield TraceStep(self._gate_at(i), frame.copy())
+
+
+def _apply_delta(frame: Dict[int, str], delta: Delta):
+    for q, p in delta:
+        if p == "I":
+            frame.pop(q, None)
+        else:
+            frame[q] = p
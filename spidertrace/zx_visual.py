@@ -4,29 +4,40 @@ from spidertrace.circuit import Gate
 from spidertrace.engine import TraceStep
 
 
-def draw_circuit_only(circuit):
+def _wire_rows(circuit, qubits=()):
+    """
+    Maps each qubit that a gate (or an extra qubit) uses to its wire row.
+
+    Stim numbers qubits sparsely, so wires are drawn only for used qubits, in
+    index order on consecutive rows, instead of one per index up to the max.
+    """
+    used = sorted({q for gate in circuit for q in gate.qubits} | set(qubits))
+    return {q: row for row, q in enumerate(used)}
+
+
+def draw_circuit_only(circuit, qubits=()):
     """
     Creates a ZX diagram showing the circuit without any errors.
     
     Args:
         circuit: List of Gate objects representing the full circuit
+        qubits: Extra qubits to draw a wire for even if no gate touches them
     
     Returns:
         pyzx Graph object that can be displayed
     """
     g = zx.Graph()
     
-    # Determine number of qubits from circuit
-    max_qubit = max(max(gate.qubits) for gate in circuit) if circuit else 0
-    num_qubits = max_qubit + 1
+    # One wire per qubit actually used, on consecutive rows
+    wires = _wire_rows(circuit, qubits)
     
     # Create input and output boundaries
-    inputs = []
-    outputs = []
+    inputs = {}
+    outputs = {}
     
-    for q in range(num_qubits):
-        inputs.append(g.add_vertex(zx.VertexType.BOUNDARY, qubit=q, row=0))
-        outputs.append(g.add_vertex(zx.VertexType.BOUNDARY, qubit=q, row=len(circuit) * 2 + 1))
+    for q, w in wires.items():
+        inputs[q] = g.add_vertex(zx.VertexType.BOUNDARY, qubit=w, row=0)
+        outputs[q] = g.add_vertex(zx.VertexType.BOUNDARY, qubit=w, row=len(circuit) * 2 + 1)
     
     # Add gates
     current_row = 1
@@ -37,7 +48,7 @@ def draw_circuit_only(circuit):
         if gate.name == "H":
             q = gate.qubits[0]
             # Add Hadamard gate (Z-spider with H-phase)
-            h_vertex = g.add_vertex(zx.VertexType.Z, qubit=q, row=gate_row)
+            h_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[q], row=gate_row)
             g.set_phase(h_vertex, 1)  # H phase
             
             # Connect to previous vertex or input
@@ -46,7 +57,7 @@ def draw_circuit_only(circuit):
             else:
                 # Find previous vertex on this qubit
                 prev_vertices = [v for v in g.vertices() 
-                               if g.qubit(v) == q and g.row(v) < gate_row]
+                               if g.qubit(v) == wires[q] and g.row(v) < gate_row]
                 if prev_vertices:
                     prev = max(prev_vertices, key=lambda v: g.row(v))
                     g.add_edge((prev, h_vertex))
@@ -59,8 +70,8 @@ def draw_circuit_only(circuit):
             control, target = gate.qubits
 
             # Add CNOT as Z-spider (control) and X-spider (target)
-            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=control, row=gate_row)
-            target_vertex = g.add_vertex(zx.VertexType.X, qubit=target, row=gate_row)
+            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[control], row=gate_row)
+            target_vertex = g.add_vertex(zx.VertexType.X, qubit=wires[target], row=gate_row)
 
             # Connect control and target
             g.add_edge((control_vertex, target_vertex))
@@ -71,7 +82,7 @@ def draw_circuit_only(circuit):
                     g.add_edge((inputs[q], vertex))
                 else:
                     prev_vertices = [v for v in g.vertices()
-                                   if g.qubit(v) == q and g.row(v) < gate_row]
+                                   if g.qubit(v) == wires[q] and g.row(v) < gate_row]
                     if prev_vertices:
                         prev = max(prev_vertices, key=lambda v: g.row(v))
                         g.add_edge((prev, vertex))
@@ -85,8 +96,8 @@ def draw_circuit_only(circuit):
             control, target = gate.qubits
 
             # CZ = two Z-spiders connected by a Hadamard edge
-            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=control, row=gate_row)
-            target_vertex = g.add_vertex(zx.VertexType.Z, qubit=target, row=gate_row)
+            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[control], row=gate_row)
+            target_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[target], row=gate_row)
 
             # Hadamard edge encodes the CZ interaction
             g.add_edge((control_vertex, target_vertex), zx.EdgeType.HADAMARD)
@@ -96,7 +107,7 @@ def draw_circuit_only(circuit):
                     g.add_edge((inputs[q], vertex))
                 else:
                     prev_vertices = [v for v in g.vertices()
-                                   if g.qubit(v) == q and g.row(v) < gate_row]
+                                   if g.qubit(v) == wires[q] and g.row(v) < gate_row]
                     if prev_vertices:
                         prev = max(prev_vertices, key=lambda v: g.row(v))
                         g.add_edge((prev, vertex))
@@ -121,11 +132,9 @@ def draw_initial_errors(circuit, errors):
     Returns:
         pyzx Graph object that can be displayed
     """
-    g = draw_circuit_only(circuit)
-    
-    # Add error annotations
-    max_qubit = max(max(gate.qubits) for gate in circuit) if circuit else 0
-    num_qubits = max_qubit + 1
+    error_qubits = [error.qubit for error in errors]
+    g = draw_circuit_only(circuit, error_qubits)
+    wires = _wire_rows(circuit, error_qubits)
     
     # Add errors at the beginning (row 0.5)
     for error in errors:
@@ -133,20 +142,20 @@ def draw_initial_errors(circuit, errors):
         error_type = error.type
         
         if error_type == "X":
-            error_vertex = g.add_vertex(zx.VertexType.X, qubit=qubit, row=0.5)
+            error_vertex = g.add_vertex(zx.VertexType.X, qubit=wires[qubit], row=0.5)
             g.set_phase(error_vertex, 1)  # X/Z error
         elif error_type == "Z":
-            error_vertex = g.add_vertex(zx.VertexType.Z, qubit=qubit, row=0.5)
+            error_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[qubit], row=0.5)
             g.set_phase(error_vertex, 0)  # Z error
         
         # Connect error vertex to input
         inputs = [v for v in g.vertices() if g.type(v) == zx.VertexType.BOUNDARY and g.row(v) == 0]
-        input_vertex = inputs[qubit]
+        input_vertex = inputs[wires[qubit]]
         g.add_edge((input_vertex, error_vertex))
         
         # Connect error to the first gate on this qubit
         gate_vertices = [v for v in g.vertices() 
-                         if g.qubit(v) == qubit and g.row(v) > 0.5 
+                         if g.qubit(v) == wires[qubit] and g.row(v) > 0.5 
                          and g.type(v) != zx.VertexType.BOUNDARY]
         if gate_vertices:
             first_gate = min(gate_vertices, key=lambda v: g.row(v))
@@ -169,17 +178,16 @@ def draw_trace_step(circuit, trace_step, step_index):
     """
     g = zx.Graph()
     
-    # Determine number of qubits from circuit
-    max_qubit = max(max(gate.qubits) for gate in circuit) if circuit else 0
-    num_qubits = max_qubit + 1
+    # One wire per qubit actually used, on consecutive rows
+    wires = _wire_rows(circuit, trace_step.errors_after)
     
     # Create input and output boundaries
-    inputs = []
-    outputs = []
+    inputs = {}
+    outputs = {}
     
-    for q in range(num_qubits):
-        inputs.append(g.add_vertex(zx.VertexType.BOUNDARY, qubit=q, row=0))
-        outputs.append(g.add_vertex(zx.VertexType.BOUNDARY, qubit=q, row=len(circuit) * 2 + 2))
+    for q, w in wires.items():
+        inputs[q] = g.add_vertex(zx.VertexType.BOUNDARY, qubit=w, row=0)
+        outputs[q] = g.add_vertex(zx.VertexType.BOUNDARY, qubit=w, row=len(circuit) * 2 + 2)
     
     # Add gates up to current step
     current_row = 1
@@ -190,7 +198,7 @@ def draw_trace_step(circuit, trace_step, step_index):
         if gate.name == "H":
             q = gate.qubits[0]
             # Add Hadamard gate (Z-spider with H-phase)
-            h_vertex = g.add_vertex(zx.VertexType.Z, qubit=q, row=gate_row)
+            h_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[q], row=gate_row)
             g.set_phase(h_vertex, 1)  # H phase
             
             # Connect to previous vertex or input
@@ -199,7 +207,7 @@ def draw_trace_step(circuit, trace_step, step_index):
             else:
                 # Find previous vertex on this qubit
                 prev_vertices = [v for v in g.vertices() 
-                               if g.qubit(v) == q and g.row(v) < gate_row]
+                               if g.qubit(v) == wires[q] and g.row(v) < gate_row]
                 if prev_vertices:
                     prev = max(prev_vertices, key=lambda v: g.row(v))
                     g.add_edge((prev, h_vertex))
@@ -212,8 +220,8 @@ def draw_trace_step(circuit, trace_step, step_index):
             control, target = gate.qubits
 
             # Add CNOT as Z-spider (control) and X-spider (target)
-            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=control, row=gate_row)
-            target_vertex = g.add_vertex(zx.VertexType.X, qubit=target, row=gate_row)
+            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[control], row=gate_row)
+            target_vertex = g.add_vertex(zx.VertexType.X, qubit=wires[target], row=gate_row)
 
             # Connect control and target
             g.add_edge((control_vertex, target_vertex))
@@ -224,7 +232,7 @@ def draw_trace_step(circuit, trace_step, step_index):
                     g.add_edge((inputs[q], vertex))
                 else:
                     prev_vertices = [v for v in g.vertices()
-                                   if g.qubit(v) == q and g.row(v) < gate_row]
+                                   if g.qubit(v) == wires[q] and g.row(v) < gate_row]
                     if prev_vertices:
                         prev = max(prev_vertices, key=lambda v: g.row(v))
                         g.add_edge((prev, vertex))
@@ -238,8 +246,8 @@ def draw_trace_step(circuit, trace_step, step_index):
             control, target = gate.qubits
 
             # CZ = two Z-spiders connected by a Hadamard edge
-            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=control, row=gate_row)
-            target_vertex = g.add_vertex(zx.VertexType.Z, qubit=target, row=gate_row)
+            control_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[control], row=gate_row)
+            target_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[target], row=gate_row)
 
             g.add_edge((control_vertex, target_vertex), zx.EdgeType.HADAMARD)
 
@@ -248,7 +256,7 @@ def draw_trace_step(circuit, trace_step, step_index):
                     g.add_edge((inputs[q], vertex))
                 else:
                     prev_vertices = [v for v in g.vertices()
-                                   if g.qubit(v) == q and g.row(v) < gate_row]
+                                   if g.qubit(v) == wires[q] and g.row(v) < gate_row]
                     if prev_vertices:
                         prev = max(prev_vertices, key=lambda v: g.row(v))
                         g.add_edge((prev, vertex))
@@ -263,19 +271,19 @@ def draw_trace_step(circuit, trace_step, step_index):
     error_row = len(circuit) * 2 + 1
     for qubit, error_type in trace_step.errors_after.items():
         if error_type == "X":
-            error_vertex = g.add_vertex(zx.VertexType.X, qubit=qubit, row=error_row)
+            error_vertex = g.add_vertex(zx.VertexType.X, qubit=wires[qubit], row=error_row)
             g.set_phase(error_vertex, 1)  # X/Z error
         elif error_type == "Z":
-            error_vertex = g.add_vertex(zx.VertexType.Z, qubit=qubit, row=error_row)
+            error_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[qubit], row=error_row)
             g.set_phase(error_vertex, 0)  # Z error
         elif error_type == "Y":
             # Y error can be represented as both X and Z on same vertex
-            error_vertex = g.add_vertex(zx.VertexType.Z, qubit=qubit, row=error_row)
+            error_vertex = g.add_vertex(zx.VertexType.Z, qubit=wires[qubit], row=error_row)
             g.set_phase(error_vertex, 2)  # Y phase
         
         # Connect error vertex to the circuit
         circuit_vertices = [v for v in g.vertices() 
-                           if g.qubit(v) == qubit and g.row(v) < error_row 
+                           if g.qubit(v) == wires[qubit] and g.row(v) < error_row 
                            and g.type(v) != zx.VertexType.BOUNDARY]
         if circuit_vertices:
             last_circuit_vertex = max(circuit_vertices, key=lambda v: g.row(v))
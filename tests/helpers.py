@@ -0,0 +1,17 @@
+"""
+Shared fixtures for the unit tests.
+"""
+
+from spidertrace.circuit import Gate
+
+
+def random_circuit(rng, num_qubits, num_gates):
+    """Random H / CNOT / CZ Gate list drawn from a ``random.Random``."""
+    circuit = []
+    for _ in range(num_gates):
+        name = rng.choice(["H", "CNOT", "CZ"])
+        if name == "H":
+            circuit.append(Gate("H", (rng.randrange(num_qubits),)))
+        else:
+            circuit.append(Gate(name, tuple(rng.sample(range(num_qubits), 2))))
+    return circuit
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the benchmark suite (timing harness and baseline comparison).
+"""
+
+import sys
+import os
+import copy
+import json
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import BENCHMARKS, compare_results, load_results, run_suite, save_results
+
+
+def test_every_benchmark_runs():
+    """Each registered benchmark runs its smallest point and reports a throughput"""
+    results = run_suite(quick=True, overrides={"d": [3], "shots": [64]},
+                        repeat=1, min_time=0.0)
+    names = {row["name"] for row in results["results"]}
+    assert names == set(BENCHMARKS)
+    for row in results["results"]:
+        assert row["seconds"] > 0 and row["throughput"] > 0
+        assert row["params"].get("d", 3) == 3
+    json.dumps(results)
+    print("PASS: every benchmark runs")
+
+
+def test_baseline_comparison():
+    """Results round-trip through JSON and slowdowns past the tolerance are flagged"""
+    results = run_suite(["propagate_final"], quick=True, overrides={"d": [3]},
+                        repeat=1, min_time=0.0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "base.json")
+        save_results(results, path)
+        baseline = load_results(path)
+    assert baseline == results
+    assert compare_results(results, baseline) == []
+    slower = copy.deepcopy(results)
+    slower["results"][0]["seconds"] *= 2
+    slower["results"][1]["seconds"] *= 1.1
+    regressions = compare_results(slower, baseline, tolerance=0.25)
+    assert [r.params for r in regressions] == [results["results"][0]["params"]]
+    assert abs(regressions[0].ratio - 2) < 1e-9
+    # points only in one run are ignored
+    assert compare_results(slower, {**baseline, "results": []}) == []
+    print("PASS: baseline comparison")
+
+
+def main():
+    print("Benchmark Harness Test Suite")
+    print("=" * 50)
+    try:
+        test_every_benchmark_runs()
+        test_baseline_comparison()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All benchmark harness tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
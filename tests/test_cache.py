@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the propagation cache.
+"""
+
+import sys
+import os
+import random
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from spidertrace import engine
+from spidertrace.compiled import compile_stim_program
+from spidertrace.engine import PropagationCache, propagate_errors_batch, propagate_final
+from spidertrace.error import PauliError
+from spidertrace.frame import BatchFrame
+from spidertrace.lightcone import LightConeIndex
+from spidertrace.schedule import schedule_layers
+import qec_zx_dataset as qzx
+
+
+def _program():
+    return compile_stim_program(qzx.build_circuit(3, 0.01).without_noise())
+
+
+def test_counters_and_eviction():
+    """Equal fault sets hit whatever their form; the least recently used entry is evicted"""
+    program = _program()
+    cache = PropagationCache(maxsize=2)
+    first = propagate_final(program, {3: "X", 5: "I"}, cache=cache)
+    assert dict(first) == propagate_final(program, {3: "X"})
+    assert propagate_final(program, [PauliError(3, "X")], cache=cache) is first
+    propagate_final(program, {3: "X"}, start=10, cache=cache)       # another key
+    propagate_final(program, {3: "X"}, cache=cache)                 # refresh the first
+    propagate_final(program, {4: "Z"}, cache=cache)                 # evicts start=10
+    assert cache.stats == (2, 3, 1, 2, 2)
+    propagate_final(program, {3: "X"}, start=10, cache=cache)
+    assert cache.stats.misses == 4 and cache.stats.evictions == 2
+    cache.clear()
+    assert cache.stats == (0, 0, 0, 0, 2)
+    print("PASS: counters and eviction")
+
+
+def test_results_are_read_only():
+    """Cached frames and rows cannot be changed by the caller"""
+    program = _program()
+    cache = PropagationCache()
+    final = propagate_final(program, {3: "X"}, cache=cache)
+    try:
+        final[0] = "Z"
+        assert False, "expected TypeError writing to a cached frame"
+    except TypeError:
+        pass
+    initial = np.zeros((4, program.num_qubits), dtype=np.uint8)
+    initial[:, 3] = 1
+    codes = propagate_errors_batch(program, initial, cache=cache)
+    codes[:] = 0                                        # a fresh array, not the cache's
+    assert np.array_equal(propagate_errors_batch(program, initial, cache=cache),
+                          propagate_errors_batch(program, initial))
+    print("PASS: results are read only")
+
+
+def test_batch_matches_uncached():
+    """Cached batches equal uncached ones, with each distinct row propagated once"""
+    program = schedule_layers(_program())
+    n = program.num_qubits
+    rng = np.random.default_rng(5)
+    cache = PropagationCache()
+    for _ in range(3):
+        initial = np.zeros((500, n), dtype=np.uint8)
+        rows = rng.integers(0, 500, 40)
+        initial[rows, rng.integers(0, n, 40) % 6] = rng.integers(1, 4, 40)
+        expected = propagate_errors_batch(program, initial)
+        assert np.array_equal(propagate_errors_batch(program, initial, cache=cache), expected)
+    distinct = cache.stats.misses
+    assert distinct == len(cache) < 3 * 40
+    print("PASS: batch matches uncached")
+
+
+def test_cached_sparse_batch():
+    """Low-weight cache misses go through the light-cone path, with the dense codes"""
+    program = schedule_layers(_program())
+    n = program.num_qubits
+    initial = np.zeros((200, n), dtype=np.uint8)
+    initial[[3, 50, 120], [0, 7, 7]] = [1, 3, 2]          # two faults repeat below
+    initial[150, 7] = 3
+    dense = engine._run_frame(program, BatchFrame.from_codes(initial, n)).to_codes()
+    lightcone = LightConeIndex.from_circuit(program.compiled)
+
+    sparse_calls = []
+    original = engine._propagate_batch_sparse
+
+    def counting(circuit_sequence, paulis, num_qubits, index):
+        sparse_calls.append((len(paulis), index))
+        return original(circuit_sequence, paulis, num_qubits, index)
+
+    engine._propagate_batch_sparse = counting
+    try:
+        cache = PropagationCache()
+        got = propagate_errors_batch(program, initial, cache=cache, lightcone=lightcone)
+        assert np.array_equal(got, dense)
+        # the distinct rows (identity, X0, Z7, Y7) missed and went sparse,
+        # through the given index
+        assert sparse_calls == [(4, lightcone)]
+        assert np.array_equal(propagate_errors_batch(program, initial, cache=cache), dense)
+        assert len(sparse_calls) == 1                   # all hits the second time
+    finally:
+        engine._propagate_batch_sparse = original
+    print("PASS: cached sparse batch")
+
+
+def test_shared_across_threads():
+    """Concurrent callers on one small cache all get correct frames"""
+    program = _program()
+    cache = PropagationCache(maxsize=8)
+    faults = [{q: p} for q in range(0, 12, 2) for p in "XYZ"]
+    expected = [propagate_final(program, f) for f in faults]
+    failures = []
+
+    def work(seed):
+        rng = random.Random(seed)
+        for _ in range(100):
+            i = rng.randrange(len(faults))
+            if dict(propagate_final(program, faults[i], cache=cache)) != expected[i]:
+                failures.append(i)
+
+    threads = [threading.Thread(target=work, args=(s,)) for s in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not failures
+    stats = cache.stats
+    assert stats.hits + stats.misses == 400 and stats.size <= 8
+    print("PASS: shared across threads")
+
+
+def main():
+    print("Propagation Cache Test Suite")
+    print("=" * 50)
+    try:
+        test_counters_and_eviction()
+        test_results_are_read_only()
+        test_batch_matches_uncached()
+        test_cached_sparse_batch()
+        test_shared_across_threads()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All propagation cache tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for qubit compaction.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from spidertrace.circuit import Gate
+from spidertrace.compact import QubitMap, compact_qubits
+from spidertrace.compiled import compile_stim_program
+from spidertrace.engine import propagate_errors_batch, propagate_final
+from spidertrace.error import PauliError
+from spidertrace.frame import pack_bits, unpack_bits
+from spidertrace.zx_visual import draw_circuit_only, draw_initial_errors
+import qec_zx_dataset as qzx
+
+
+def test_qubit_map_round_trip():
+    """Frames, codes and packed bits map to the compact range and back"""
+    qubit_map = QubitMap([7, 2, 11], num_original=13)
+    assert qubit_map.num_qubits == 3 and qubit_map.used.tolist() == [2, 7, 11]
+    assert qubit_map.to_compact({11: "Y", 2: "X"}) == {2: "Y", 0: "X"}
+    assert qubit_map.to_original({2: "Y", 0: "X"}) == {11: "Y", 2: "X"}
+    assert qubit_map.split({7: "Z", 5: "X"}) == ({1: "Z"}, {5: "X"})
+    try:
+        qubit_map.to_compact({5: "X"})
+        assert False, "expected ValueError for an unused qubit"
+    except ValueError:
+        pass
+    codes = qubit_map.codes_to_original(np.array([[1, 2, 3]]))
+    assert codes.shape == (1, 13) and codes[0, [2, 7, 11]].tolist() == [1, 2, 3]
+    bits = np.array([1, 0, 1, 0, 1, 1], dtype=np.uint8)          # X0 Y1 Z2 ... compact
+    wide = unpack_bits(qubit_map.bits_to_original(pack_bits(bits)), 26)
+    assert np.flatnonzero(wide[:13]).tolist() == [2, 11]
+    assert np.flatnonzero(wide[13:]).tolist() == [7, 11]
+    print("PASS: qubit map round trip")
+
+
+def test_compact_program_propagates_the_same():
+    """A compacted surface-code program gives the same frames after mapping back"""
+    circuit = qzx.build_circuit(3, 0.01)
+    program = compile_stim_program(circuit.without_noise())
+    small, qubit_map = compact_qubits(program)
+    assert qubit_map.num_qubits < program.num_qubits == circuit.num_qubits
+    assert small.num_qubits == qubit_map.num_qubits and small.detectors == program.detectors
+    rng = random.Random(3)
+    used = qubit_map.used.tolist()
+    for _ in range(50):
+        errors = {q: rng.choice("XYZ") for q in rng.sample(used, 2)}
+        start = rng.randrange(len(program))
+        expected = propagate_final(program, errors, start)
+        got = propagate_final(small, qubit_map.to_compact(errors), start)
+        assert qubit_map.to_original(got) == expected
+    initial = np.zeros((20, qubit_map.num_qubits), dtype=np.uint8)
+    initial[np.arange(20), np.arange(20) % qubit_map.num_qubits] = 1 + np.arange(20) % 3
+    wide = propagate_errors_batch(program, qubit_map.codes_to_original(initial))
+    assert np.array_equal(qubit_map.codes_to_original(propagate_errors_batch(small, initial)), wide)
+    print("PASS: compact program propagates the same")
+
+
+def test_compact_fault_tables():
+    """Compact native tables are the full tables restricted to the used qubits"""
+    circuit = qzx.build_circuit(3, 0.01)
+    propagator = qzx.BasisImageZXPropagator(circuit)
+    assert propagator.qubits.num_qubits == 17
+    full, _ = qzx.build_native_fault_tables(circuit, propagator)
+    small, _ = qzx.build_native_fault_tables(circuit, propagator, compact=True)
+    used = small.qubits
+    assert full.qubits is None and small.num_qubits == len(used) < full.num_qubits
+    for i in range(full.num_errors):
+        for wide, narrow in ((full.raw_pauli[i], small.raw_pauli[i]),
+                             (full.zx_pauli[i], small.zx_pauli[i])):
+            assert [wide[int(q)] for q in used] == [narrow[k] for k in range(len(used))]
+            assert sum(wide[q] != 0 for q in range(full.num_qubits)) == narrow.weight
+    print("PASS: compact fault tables")
+
+
+def test_zx_visual_draws_used_wires():
+    """Diagrams draw one wire per used qubit, not one per index up to the max"""
+    circuit = [Gate("H", (3,)), Gate("CNOT", (3, 10))]
+    g = draw_circuit_only(circuit)
+    rows = sorted({g.qubit(v) for v in g.vertices()})
+    assert rows == [0, 1]
+    g = draw_initial_errors(circuit, [PauliError(6, "X")])
+    assert sorted({g.qubit(v) for v in g.vertices()}) == [0, 1, 2]
+    print("PASS: zx_visual draws used wires")
+
+
+def main():
+    print("Qubit Compaction Test Suite")
+    print("=" * 50)
+    try:
+        test_qubit_map_round_trip()
+        test_compact_program_propagates_the_same()
+        test_compact_fault_tables()
+        test_zx_visual_draws_used_wires()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All qubit compaction tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Unit tests for CompiledCircuit: compilation, hashing and both engine paths.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import stim
+
+from spidertrace.circuit import Gate
+from spidertrace.compiled import (OP_CNOT, OP_H, compile_circuit, compile_stim_circuit,
+                                  compile_stim_program)
+from spidertrace.engine import (propagate_errors, propagate_errors_batch, propagate_final,
+                                propagate_frame)
+from spidertrace.schedule import schedule_layers
+from spidertrace.tableau import Tableau
+from spidertrace.error import PauliError
+from tests.helpers import random_circuit
+from generate_dataset import _stim_to_spider_gates
+
+
+def test_compile_roundtrip():
+    """compile_circuit keeps gate order and operands"""
+    circuit = [Gate("H", (0,)), Gate("CNOT", (0, 2)), Gate("CZ", (2, 1))]
+    compiled = compile_circuit(circuit)
+    assert len(compiled) == 3 and compiled.num_qubits == 3
+    assert compiled.opcode.tolist()[:2] == [OP_H, OP_CNOT]
+    assert compiled.q1.tolist()[0] == -1
+    assert compiled.gates() == circuit
+    print("PASS: compile round trip")
+
+
+def test_hash_and_equality():
+    """Equal gate sequences compile to equal, hashable, read-only circuits"""
+    circuit = [Gate("H", (3,)), Gate("CZ", (0, 3))]
+    a, b = compile_circuit(circuit), compile_circuit(list(circuit))
+    assert a == b and hash(a) == hash(b) and a.key == b.key
+    assert {a: 1}[b] == 1
+    assert a != compile_circuit([Gate("H", (3,)), Gate("CZ", (3, 0))])
+    assert not a.opcode.flags.writeable
+    print("PASS: hash and equality")
+
+
+def test_unsupported_gate():
+    """Unknown gate names are rejected at compile time"""
+    try:
+        compile_circuit([Gate("T", (0,))])
+    except ValueError:
+        print("PASS: unsupported gate rejected")
+        return
+    raise AssertionError("expected ValueError for gate 'T'")
+
+
+def test_compiled_paths_match_reference():
+    """Dict, packed and batch paths give the same result for compiled input"""
+    rng = random.Random(5)
+    circuit = random_circuit(rng, 12, 150)
+    compiled = compile_circuit(circuit)
+    errors = [PauliError(1, "X"), PauliError(7, "Y")]
+
+    reference = propagate_errors(circuit, errors)
+    trace = propagate_errors(compiled, errors)
+    assert [s.errors_after for s in trace] == [s.errors_after for s in reference]
+    assert [s.gate for s in trace] == circuit
+
+    assert propagate_frame(compiled, errors).to_dict() == reference[-1].errors_after
+
+    codes = np.zeros((1, 12), dtype=np.uint8)
+    codes[0, 1], codes[0, 7] = 1, 2
+    final = propagate_errors_batch(compiled, codes)[0]
+    assert {q: "IXYZ"[c] for q, c in enumerate(final) if c} == reference[-1].errors_after
+    print("PASS: compiled paths match reference")
+
+
+def test_compile_stim_circuit():
+    """compile_stim_circuit matches _stim_to_spider_gates on a surface code"""
+    circuit = stim.Circuit.generated("surface_code:rotated_memory_z", distance=3, rounds=1)
+    compiled = compile_stim_circuit(circuit)
+    assert compiled.gates() == _stim_to_spider_gates(circuit)
+    print("PASS: compile_stim_circuit matches _stim_to_spider_gates")
+
+
+def test_resets_and_measurements_on_every_path():
+    """R / M / MR and their X-basis forms agree across all engine paths"""
+    rng = random.Random(9)
+    for _ in range(10):
+        circuit = random_circuit(rng, 8, 80)
+        for _ in range(20):
+            name = rng.choice(["R", "M", "MR", "RX", "MX", "MRX"])
+            circuit.insert(rng.randrange(len(circuit) + 1), Gate(name, (rng.randrange(8),)))
+        errors = [PauliError(q, rng.choice("XYZ")) for q in rng.sample(range(8), 4)]
+        expected = propagate_errors(circuit, errors)[-1].errors_after
+        compiled = compile_circuit(circuit, 8)
+        assert propagate_errors(compiled, errors, trace_mode="delta").final == expected
+        assert propagate_final(compiled, errors) == expected
+        assert propagate_frame(compiled, errors, 8).to_dict() == expected
+        assert propagate_frame(schedule_layers(compiled), errors, 8).to_dict() == expected
+        codes = np.zeros((1, 8), dtype=np.uint8)
+        for e in errors:
+            codes[0, e.qubit] = "IXYZ".index(e.type)
+        final = propagate_errors_batch(schedule_layers(compiled), codes)[0]
+        assert {q: "IXYZ"[c] for q, c in enumerate(final) if c} == expected
+        assert Tableau.from_circuit(compiled).apply({e.qubit: e.type for e in errors}) == expected
+    print("PASS: resets and measurements on every path")
+
+
+def test_compile_stim_program():
+    """A whole memory circuit compiles to one program with its annotations"""
+    circuit = stim.Circuit.generated("surface_code:rotated_memory_z", distance=3, rounds=3,
+                                     after_clifford_depolarization=0.01)
+    program = compile_stim_program(circuit)
+    assert program.num_qubits == circuit.num_qubits
+    assert program.num_measurements == circuit.num_measurements
+    assert len(program.detectors) == circuit.num_detectors
+    assert len(program.observables) == circuit.num_observables
+    assert len(program.ticks) == str(circuit.flattened()).count("TICK")
+    assert all(r < program.num_measurements for d in program.detectors for r in d)
+    assert compile_stim_program(circuit.without_noise()) == program
+    try:
+        compile_stim_program(stim.Circuit("RY 0"))
+    except ValueError:
+        print("PASS: compile_stim_program")
+        return
+    raise AssertionError("expected ValueError for instruction 'RY'")
+
+
+def main():
+    print("CompiledCircuit Test Suite")
+    print("=" * 50)
+    try:
+        test_compile_roundtrip()
+        test_hash_and_equality()
+        test_unsupported_gate()
+        test_compiled_paths_match_reference()
+        test_compile_stim_circuit()
+        test_resets_and_measurements_on_every_path()
+        test_compile_stim_program()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All CompiledCircuit tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the reverse-time detector error model sweep.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import stim
+
+from spidertrace.compiled import compile_stim_program
+from spidertrace.dem import sweep_error_model
+from spidertrace.engine import detector_flips
+from spidertrace.lightcone import LightConeIndex
+import qec_zx_dataset as qzx
+
+
+def _stim_model(circuit):
+    out = {}
+    dem = circuit.detector_error_model(decompose_errors=False, flatten_loops=True)
+    for inst in dem.flattened():
+        if inst.type != "error":
+            continue
+        targets = inst.targets_copy()
+        key = (tuple(sorted(t.val for t in targets if t.is_relative_detector_id())),
+               tuple(sorted(t.val for t in targets if t.is_logical_observable_id())))
+        out[key] = inst.args_copy()[0]
+    return out
+
+
+def _assert_same_model(circuit):
+    ours = sweep_error_model(circuit).to_dict()
+    theirs = _stim_model(circuit)
+    assert ours.keys() == theirs.keys(), f"{len(ours)} vs {len(theirs)} errors"
+    for key, p in theirs.items():
+        assert abs(ours[key] - p) <= 1e-12 * p, f"{key}: {ours[key]} != {p}"
+
+
+def _cx_as_cz(circuit):
+    # CX a b  ==  H b; CZ a b; H b
+    out = stim.Circuit()
+    for inst in circuit.flattened():
+        if inst.name == "CX":
+            targets = [t.value for t in inst.targets_copy()]
+            out.append("H", targets[1::2])
+            out.append("CZ", targets)
+            out.append("H", targets[1::2])
+        else:
+            out.append(inst)
+    return out
+
+
+def test_matches_stim_dem():
+    """The sweep reproduces stim's DEM for Z- and X-basis memory circuits"""
+    for basis in "zx":
+        _assert_same_model(qzx.build_circuit(3, 0.01, basis=basis))
+    _assert_same_model(qzx.build_circuit(5, 0.002, rounds=2))
+    print("PASS: sweep matches stim DEM")
+
+
+def test_cz_and_measurement_flips():
+    """CZ rules and M(p) / MR(p) flip probabilities are covered too"""
+    circuit = _cx_as_cz(qzx.build_circuit(3, 0.01))
+    _assert_same_model(circuit)
+    flips = stim.Circuit("""
+        R 0 1
+        DEPOLARIZE1(0.1) 0 1
+        CZ 0 1
+        MR(0.05) 0
+        M(0.02) 1
+        DETECTOR rec[-1]
+        DETECTOR rec[-2]
+        OBSERVABLE_INCLUDE(0) rec[-1] rec[-2]
+    """)
+    _assert_same_model(flips)
+    print("PASS: CZ and measurement flips")
+
+
+def test_representatives_trigger_their_signature():
+    """Each representative fault, injected at its position, flips exactly its signature"""
+    circuit = qzx.build_circuit(3, 0.01)
+    model = sweep_error_model(circuit)
+    # drop noise by hand: without_noise() would fuse the two leading R's
+    noise = ("X_ERROR", "DEPOLARIZE1", "DEPOLARIZE2")
+    noiseless = [inst for inst in circuit.flattened() if inst.name not in noise]
+    rng = random.Random(3)
+    for i in rng.sample(range(len(model)), 25):
+        fault, position = model.faults[i], int(model.positions[i])
+        lines = []          # text, so stim does not fuse the split instructions
+        count = 0
+        done = not fault
+        for inst in noiseless:
+            if not done and count == position:
+                lines += [f"{p}_ERROR(1) {q}" for q, p in fault.items()]
+                done = True
+            lines.append(str(inst))
+            qubits = [t.value for t in inst.targets_copy() if t.is_qubit_target]
+            if inst.name in ("H", "R", "M", "MR"):
+                count += len(qubits)
+            elif inst.name == "CX":
+                count += len(qubits) // 2
+        injected = stim.Circuit("\n".join(lines))
+        sample = injected.compile_detector_sampler().sample(1, append_observables=True)[0]
+        fired = tuple(np.flatnonzero(sample).tolist())
+        nd = model.num_detectors
+        expected = model.detectors[i] + tuple(nd + o for o in model.observables[i])
+        if fault:
+            assert fired == expected, f"error {i} {fault}@{position}: {fired} != {expected}"
+    print("PASS: representatives trigger their signature")
+
+
+def test_engine_detector_flips():
+    """The forward engine's detector flips agree with the backward sweep"""
+    for basis in "zx":
+        circuit = qzx.build_circuit(3, 0.01, basis=basis)
+        model = sweep_error_model(circuit)
+        program = compile_stim_program(circuit)
+        lightcone = LightConeIndex.from_circuit(program)
+        for i in range(len(model)):
+            if model.faults[i]:
+                got = detector_flips(program, model.faults[i], int(model.positions[i]), lightcone)
+                assert got == (model.detectors[i], model.observables[i]), f"error {i}"
+    print("PASS: engine detector flips")
+
+
+def test_native_fault_tables():
+    """Native tables align the sampler columns with the sweep's errors"""
+    circuit = qzx.build_circuit(3, 0.01)
+    tables, sampler = qzx.build_native_fault_tables(circuit)
+    stim_tables, _ = qzx.build_fault_tables(circuit, qzx.BasisImageZXPropagator(circuit))
+    assert tables.num_errors == stim_tables.num_errors
+    assert tables.num_detectors == circuit.num_detectors
+    assert np.array_equal(tables.detector_coords, stim_tables.detector_coords)
+    model = sweep_error_model(circuit)
+    dets, obs, errs = sampler.sample(200, return_errors=True)
+    assert errs.shape == (200, tables.num_errors)
+    for s in range(20):
+        expect = np.zeros(circuit.num_detectors, dtype=bool)
+        for i in np.flatnonzero(errs[s]):
+            expect[list(model.detectors[i])] ^= True
+        assert np.array_equal(expect, dets[s])
+    exact = qzx.BasisImageZXPropagator(circuit)
+    for i in range(0, tables.num_errors, 7):
+        fault = model.faults[i]
+        if fault:
+            qubits = list(fault)
+            paulis = [qzx.PAULI_CHAR.index(p) for p in fault.values()]
+            assert tables.zx_pauli[i] == exact.propagate_at(qubits, paulis,
+                                                            int(model.positions[i]))
+    print("PASS: native fault tables")
+
+
+def main():
+    print("Detector Error Model Test Suite")
+    print("=" * 50)
+    try:
+        test_matches_stim_dem()
+        test_cz_and_measurement_flips()
+        test_representatives_trigger_their_signature()
+        test_engine_detector_flips()
+        test_native_fault_tables()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All detector error model tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bit-packed PauliFrame and engine.propagate_frame.
+
+The dict engine (propagate_errors) is the reference: every packed result is
+checked against it, including qubit indices that straddle uint64 words.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from spidertrace.circuit import Gate
+from spidertrace.engine import propagate_errors, propagate_errors_batch, propagate_frame
+from spidertrace.error import PauliError
+from spidertrace.frame import PAULI_CODES, BatchFrame, PauliFrame, pack_bits, unpack_bits
+from tests.helpers import random_circuit
+
+
+def _random_errors(rng, num_qubits, weight):
+    return [PauliError(q, rng.choice("XYZ"))
+            for q in rng.sample(range(num_qubits), weight)]
+
+
+def test_frame_roundtrip():
+    """dict -> PauliFrame -> dict is the identity, across word boundaries"""
+    errors = {0: "X", 63: "Y", 64: "Z", 130: "X"}
+    frame = PauliFrame.from_dict(errors, num_qubits=131)
+    assert frame.to_dict() == errors, f"got {frame.to_dict()}"
+    assert frame.weight() == 4
+    assert frame.get(63) == "Y" and frame.get(1) == "I"
+    print("PASS: dict <-> PauliFrame round trip")
+
+
+def test_pack_unpack():
+    """pack_bits inverts unpack_bits"""
+    bits = [[1, 0, 1] + [0] * 60 + [1, 1]]
+    words = pack_bits(bits)
+    assert words.shape == (1, 2)
+    assert unpack_bits(words, 65).tolist() == bits
+    print("PASS: pack_bits / unpack_bits")
+
+
+def test_single_gates_match_reference():
+    """Every single-qubit Pauli input through H, CNOT, CZ matches the dict engine"""
+    for name, qubits in (("H", (0,)), ("CNOT", (0, 1)), ("CNOT", (1, 0)),
+                         ("CZ", (0, 1))):
+        for p0 in "IXYZ":
+            for p1 in "IXYZ":
+                errors = [PauliError(q, p) for q, p in ((0, p0), (1, p1)) if p != "I"]
+                circuit = [Gate(name, qubits)]
+                expected = propagate_errors(circuit, errors)[-1].errors_after
+                actual = propagate_frame(circuit, errors, num_qubits=2).to_dict()
+                assert actual == expected, f"{name}{qubits} {p0}{p1}: {actual} != {expected}"
+    print("PASS: single gates match reference")
+
+
+def test_random_circuits_match_reference():
+    """Random H/CNOT/CZ circuits over 150 qubits match the dict engine"""
+    rng = random.Random(1234)
+    for _ in range(30):
+        circuit = random_circuit(rng, 150, 400)
+        errors = _random_errors(rng, 150, rng.randint(1, 4))
+        expected = propagate_errors(circuit, errors)[-1].errors_after
+        actual = propagate_frame(circuit, errors, num_qubits=150).to_dict()
+        assert actual == expected, f"mismatch: {actual} != {expected}"
+    print("PASS: random circuits match reference")
+
+
+def test_default_num_qubits():
+    """num_qubits defaults to cover the circuit and the initial errors"""
+    frame = propagate_frame([Gate("CNOT", (0, 1))], [PauliError(5, "Z")])
+    assert frame.num_qubits == 6
+    assert frame.to_dict() == {5: "Z"}
+    print("PASS: default num_qubits")
+
+
+def test_batch_codes_roundtrip():
+    """BatchFrame.from_codes -> to_codes is the identity for 130 shots"""
+    rng = np.random.default_rng(7)
+    codes = rng.integers(0, 4, size=(130, 9), dtype=np.uint8)
+    frame = BatchFrame.from_codes(codes)
+    assert np.array_equal(frame.to_codes(), codes)
+    assert frame.shot(129).to_dict() == {q: PAULI_CODES[c] for q, c in enumerate(codes[129]) if c}
+    print("PASS: BatchFrame code round trip")
+
+
+def test_batch_matches_reference():
+    """propagate_errors_batch agrees shot-by-shot with the dict engine"""
+    rng = random.Random(99)
+    circuit = random_circuit(rng, 20, 200)
+    shots = [_random_errors(rng, 20, rng.randint(0, 3)) for _ in range(150)]
+    codes = np.zeros((len(shots), 20), dtype=np.uint8)
+    for s, errors in enumerate(shots):
+        for e in errors:
+            codes[s, e.qubit] = PAULI_CODES.index(e.type)
+    final = propagate_errors_batch(circuit, codes)
+    for s, errors in enumerate(shots):
+        expected = propagate_errors(circuit, errors)[-1].errors_after
+        actual = {q: PAULI_CODES[c] for q, c in enumerate(final[s]) if c}
+        assert actual == expected, f"shot {s}: {actual} != {expected}"
+    print("PASS: batch propagation matches reference")
+
+
+def main():
+    print("PauliFrame Test Suite")
+    print("=" * 50)
+    try:
+        test_frame_roundtrip()
+        test_pack_unpack()
+        test_single_gates_match_reference()
+        test_random_circuits_match_reference()
+        test_default_num_qubits()
+        test_batch_codes_roundtrip()
+        test_batch_matches_reference()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All PauliFrame tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
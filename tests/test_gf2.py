@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Unit tests for GF(2) row reduction and stabilizer-canonical frames.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from spidertrace.frame import pack_bits, unpack_bits
+from spidertrace.gf2 import StabilizerReducer, rref
+import qec_zx_dataset as qzx
+
+
+def _span(rng, generators, count):
+    coeffs = rng.integers(0, 2, (count, len(generators)))
+    return (coeffs @ generators % 2).astype(np.uint8)
+
+
+def test_rref():
+    """Reduced basis spans the same space with identity pivot columns"""
+    rng = np.random.default_rng(0)
+    m = rng.integers(0, 2, (7, 12)).astype(np.uint8)
+    m[6] = m[0] ^ m[1]                       # rank at most 6
+    basis, pivots = rref(m)
+    assert len(basis) <= 6
+    assert np.array_equal(basis[:, pivots], np.eye(len(basis), dtype=np.uint8))
+    # same row space: each original row reduces to zero against the basis
+    for row in m:
+        row = row.copy()
+        for b, c in zip(basis, pivots):
+            if row[c]:
+                row ^= b
+        assert not row.any()
+    # uniqueness: a different spanning set gives the identical basis
+    again, _ = rref(_span(rng, m, 40))
+    assert np.array_equal(again, basis)
+    print("PASS: rref")
+
+
+def test_reduce_is_a_coset_invariant():
+    """Frames differing by a stabilizer reduce to the same representative"""
+    rng = np.random.default_rng(1)
+    for basis in "zx":
+        circuit = qzx.build_circuit(3, 0.01, basis=basis)
+        generators = qzx.code_stabilizers(circuit)
+        reducer = StabilizerReducer(generators)
+        n = circuit.num_qubits
+        frames = (rng.random((300, 2 * n)) < 0.1).astype(np.uint8)
+        shifted = frames ^ _span(rng, generators, 300)
+        a, b = reducer.reduce(pack_bits(frames)), reducer.reduce(pack_bits(shifted))
+        assert np.array_equal(a, b)
+        assert reducer.equivalent(a, pack_bits(frames)).all()
+        # no single generator lowers the weight any further
+        packed_generators = pack_bits(generators)
+        for g in packed_generators:
+            assert (reducer.weight(a ^ g) >= reducer.weight(a)).all()
+        # a stabilizer itself reduces to the identity
+        assert not reducer.reduce(pack_bits(_span(rng, generators, 20))).any()
+    print("PASS: reduction is a coset invariant")
+
+
+def test_canonical_zx_targets():
+    """Canonical zx targets stay in the coset of the plain product of table rows"""
+    circuit = qzx.build_circuit(3, 0.01)
+    tables, sampler = qzx.build_native_fault_tables(circuit, compact=True)
+    generators = qzx.code_stabilizers(circuit, tables.qubits)
+    assert generators.shape[1] == 2 * tables.num_qubits
+    reducer = StabilizerReducer(generators, tables.num_qubits)
+    _, _, errs = sampler.sample(200, return_errors=True)
+    codes = qzx._canonical_codes(errs, tables.zx_pauli, tables.num_qubits, reducer)
+    n = tables.num_qubits
+    for s in range(0, 200, 10):
+        plain = np.zeros(2 * n, dtype=np.uint8)
+        for i in np.flatnonzero(errs[s]):
+            xs, zs = tables.zx_pauli[i].to_numpy()
+            plain ^= np.concatenate([xs, zs]).astype(np.uint8)
+        canon = np.zeros(2 * n, dtype=np.uint8)
+        canon[:n] = np.isin(codes[s], (1, 2))
+        canon[n:] = np.isin(codes[s], (2, 3))
+        assert reducer.equivalent(pack_bits(plain), pack_bits(canon))
+        assert np.array_equal(unpack_bits(reducer.reduce(pack_bits(plain)), 2 * n), canon)
+    shots = list(qzx.sample_tuples(circuit, tables, sampler, 5, reducer=reducer))
+    assert all(t["zx_target"].shape == (n, 4) for t in shots)
+    print("PASS: canonical zx targets")
+
+
+def main():
+    print("GF(2) Reduction Test Suite")
+    print("=" * 50)
+    try:
+        test_rref()
+        test_reduce_is_a_coset_invariant()
+        test_canonical_zx_targets()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All GF(2) reduction tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Unit tests for incremental re-propagation.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spidertrace.circuit import Gate
+from spidertrace.engine import propagate_errors
+from spidertrace.error import PauliError
+from spidertrace.incremental import IncrementalTrace
+
+
+def _random_gate(rng, n):
+    name = rng.choice(["H", "CNOT", "CZ", "R", "RX", "M"])
+    if name in ("CNOT", "CZ"):
+        return Gate(name, tuple(rng.sample(range(n), 2)))
+    return Gate(name, (rng.randrange(n),))
+
+
+def _random_circuit(rng, n, length):
+    return [_random_gate(rng, n) for _ in range(length)]
+
+
+def test_edits_match_full_replay():
+    """After any sequence of edits the trace equals a fresh propagate_errors"""
+    rng = random.Random(11)
+    n = 5
+    circuit = _random_circuit(rng, n, 300)
+    errors = [PauliError(0, "X"), PauliError(3, "Z")]
+    inc = IncrementalTrace(circuit, errors, checkpoint_interval=16)
+    for _ in range(60):
+        kind = rng.choice(["replace", "insert", "delete"])
+        i = rng.randrange(len(inc))
+        if kind == "replace":
+            inc.replace(i, _random_gate(rng, n))
+        elif kind == "insert":
+            inc.insert(i, _random_gate(rng, n))
+        else:
+            inc.delete(i)
+        expected = propagate_errors(inc.gates, errors)
+        assert inc.final == expected[-1].errors_after
+        j = rng.randrange(len(inc))
+        assert inc.errors_after(j) == expected[j].errors_after
+    assert [s.errors_after for s in inc.trace()] == \
+        [s.errors_after for s in propagate_errors(inc.gates, errors)]
+    print("PASS: edits match full replay")
+
+
+def test_edit_replays_only_the_suffix():
+    """An edit near the end replays at most one interval plus the tail"""
+    rng = random.Random(2)
+    circuit = _random_circuit(rng, 6, 2000)
+    inc = IncrementalTrace(circuit, {1: "Y"}, checkpoint_interval=32)
+    inc.final
+    assert inc.replayed <= 2000 + 32
+    before = inc.replayed
+    inc.replace(1990, Gate("H", (1,)))
+    inc.final
+    assert inc.replayed - before <= 32
+    # one-gate variants share the checkpoints and leave the trace untouched
+    final = inc.final
+    before = inc.replayed
+    for gate in (Gate("H", (2,)), Gate("CNOT", (2, 3)), Gate("CZ", (1, 4))):
+        variant = list(inc.gates)
+        variant[1500] = gate
+        assert inc.final_with(1500, gate) == propagate_errors(variant, [PauliError(1, "Y")])[-1].errors_after
+    assert inc.replayed - before <= 3 * (500 + 32)
+    assert inc.final == final
+    print("PASS: edit replays only the suffix")
+
+
+def main():
+    print("Incremental Re-propagation Test Suite")
+    print("=" * 50)
+    try:
+        test_edits_match_full_replay()
+        test_edit_replays_only_the_suffix()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All incremental re-propagation tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
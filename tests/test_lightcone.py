@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the forward light-cone index and propagate_final.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from spidertrace.circuit import Gate
+from spidertrace.compiled import compile_stim_program
+from spidertrace.engine import propagate_errors, propagate_errors_batch, propagate_final
+from spidertrace.frame import BatchFrame
+from spidertrace.schedule import run_layered, schedule_layers
+from spidertrace.error import PauliError
+from spidertrace.lightcone import LightConeIndex
+from tests.helpers import random_circuit
+import qec_zx_dataset as qzx
+
+
+def test_next_gate():
+    """next_gate returns the earliest gate at or after a position on a qubit"""
+    circuit = [Gate("H", (0,)), Gate("CNOT", (1, 2)), Gate("CZ", (0, 2)), Gate("H", (3,))]
+    index = LightConeIndex.from_circuit(circuit)
+    assert index.positions[2] == [1, 2]
+    assert index.next_gate(0, 0) == 0
+    assert index.next_gate(0, 1) == 2
+    assert index.next_gate(1, 2) == 4          # nothing left on qubit 1
+    assert index.next_gate(9, 0) == 4          # qubit never used
+    generic = LightConeIndex([(0,), (1, 2), (0, 2), (3,)])
+    assert generic.positions[:4] == index.positions
+    print("PASS: next_gate lookups")
+
+
+def test_final_matches_reference():
+    """propagate_final equals the last step of the full trace, from any start"""
+    rng = random.Random(17)
+    for _ in range(60):
+        circuit = random_circuit(rng, 12, 120)
+        errors = [PauliError(q, rng.choice("XYZ")) for q in rng.sample(range(12), 2)]
+        start = rng.randrange(len(circuit))
+        expected = propagate_errors(circuit[start:], errors)[-1].errors_after
+        index = LightConeIndex.from_circuit(circuit)
+        assert propagate_final(circuit, errors, start=start, lightcone=index) == expected
+        if start == 0:
+            assert propagate_errors(circuit, errors, trace_mode="final") == expected
+    print("PASS: propagate_final matches reference")
+
+
+def test_skips_unreachable_gates():
+    """A fault outside every gate's support is returned untouched"""
+    circuit = [Gate("CNOT", (0, 1))] * 1000
+    assert propagate_final(circuit, {5: "Y"}) == {5: "Y"}
+    print("PASS: unreachable gates skipped")
+
+
+def test_dense_switch_matches_sparse():
+    """Frames switched to a packed vector and back give the dict walk's result"""
+    rng = random.Random(3)
+    program = compile_stim_program(qzx.build_circuit(5, 0.0).without_noise())
+    lightcone = LightConeIndex.from_circuit(program)
+    n = program.num_qubits
+    for _ in range(60):
+        fault = {q: rng.choice("XYZ") for q in rng.sample(range(n), rng.randrange(1, 40))}
+        start = rng.randrange(len(program))
+        sparse_meas = []
+        sparse = propagate_final(program, fault, start, lightcone, sparse_meas, dense_weight=n)
+        # 0: packed from the first gate on; 1 / 3: switches back and forth
+        for dense_weight in (0, 1, 3, None):
+            measured = []
+            final = propagate_final(program, fault, start, lightcone, measured,
+                                    dense_weight=dense_weight)
+            assert final == sparse, (fault, start, dense_weight)
+            assert measured == sparse_meas, (fault, start, dense_weight)
+    print("PASS: dense switch matches sparse")
+
+
+def test_sparse_batch_matches_packed():
+    """Light batches go shot by shot on the light cone, with the same codes"""
+    rng = np.random.default_rng(4)
+    program = compile_stim_program(qzx.build_circuit(3, 0.0).without_noise())
+    layered = schedule_layers(program)
+    n = program.num_qubits
+    for shots, weight in ((1, 1), (4, 2), (3, 0), (40, 3)):  # the last one is dense
+        codes = np.zeros((shots, n), dtype=np.uint8)
+        for s in range(shots):
+            codes[s, rng.choice(n, weight, replace=False)] = rng.integers(1, 4, weight)
+        expected = run_layered(layered, BatchFrame.from_codes(codes, n)).to_codes()
+        assert np.array_equal(propagate_errors_batch(program, codes), expected)
+        assert np.array_equal(propagate_errors_batch(layered, codes), expected)
+    print("PASS: sparse batch matches packed")
+
+
+def main():
+    print("Light-Cone Test Suite")
+    print("=" * 50)
+    try:
+        test_next_gate()
+        test_final_matches_reference()
+        test_skips_unreachable_gates()
+        test_dense_switch_matches_sparse()
+        test_sparse_batch_matches_packed()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All light-cone tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the streaming .stim text loader.
+"""
+
+import sys
+import os
+import io
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import stim
+
+from spidertrace.compiled import compile_stim_program
+from spidertrace.engine import propagate_final
+from spidertrace.loader import iter_stim_chunks, load_stim_program
+import qec_zx_dataset as qzx
+
+
+def test_matches_compile_stim_program():
+    """Loading the text gives the program compiled from the parsed stim.Circuit"""
+    circuits = [qzx.build_circuit(3, 0.01), qzx.build_circuit(5, 0.002, rounds=2, basis="x"),
+                stim.Circuit.generated("repetition_code:memory", distance=5, rounds=4,
+                                       after_clifford_depolarization=0.01)]
+    for circuit in circuits:
+        expected = compile_stim_program(circuit)
+        assert load_stim_program(io.StringIO(str(circuit))) == expected
+        assert load_stim_program(str(circuit).splitlines(), records=False) == \
+            compile_stim_program(circuit, records=False)
+    # a file on disk, read by path
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "memory.stim")
+        circuits[0].to_file(path)
+        assert load_stim_program(path) == compile_stim_program(circuits[0])
+    print("PASS: matches compile_stim_program")
+
+
+def test_text_format_details():
+    """Comments, tags, aliases, lower case, nested REPEATs, inverted targets and noise"""
+    text = """
+        # a comment line
+        QUBIT_COORDS(0, 0) 0
+        rz 0 1 2          # trailing comment
+        REPEAT 2 {
+            H[my_tag] 0
+            REPEAT 3 {
+                CNOT 0 1
+                TICK
+            }
+            SQRT_Z 2
+            MZ(0.01) !1
+            DETECTOR(1, 2, 0) rec[-1]
+        }
+        CORRELATED_ERROR(0.1) X0 Z7
+        MX 0
+        OBSERVABLE_INCLUDE(0) rec[-1] rec[-2]
+    """
+    program = load_stim_program(text.splitlines())
+    assert program == compile_stim_program(stim.Circuit(text))
+    assert program.num_qubits == 8                       # the E target counts
+    assert len(program.ticks) == 6 and program.observables == ((2, 1),)
+    for bad in ("RY 0", "H 0\n}", "REPEAT 2 {\nH 0", "CX 0", "DETECTOR 3"):
+        try:
+            load_stim_program(bad.splitlines())
+        except ValueError:
+            continue
+        raise AssertionError(f"expected ValueError for {bad!r}")
+    print("PASS: text format details")
+
+
+def test_chunks_propagate_like_the_whole_program():
+    """Chained chunks cover the program and propagate faults like the whole of it"""
+    circuit = qzx.build_circuit(5, 0.01, rounds=6)
+    whole = compile_stim_program(circuit, records=False)
+    chunks = list(iter_stim_chunks(io.StringIO(str(circuit)), chunk_size=100,
+                                   num_qubits=whole.num_qubits))
+    assert len(chunks) > 5 and all(len(c) < 150 for c in chunks)
+    assert np.array_equal(np.concatenate([c.opcode for c in chunks]), whole.opcode)
+    assert np.array_equal(np.concatenate([c.q1 for c in chunks]), whole.q1)
+    offsets = np.cumsum([0] + [len(c) for c in chunks[:-1]])
+    ticks = np.concatenate([c.ticks + off for c, off in zip(chunks, offsets)])
+    assert np.array_equal(ticks, whole.ticks)
+    start = int(whole.ticks[3])
+    for fault in ({12: "X"}, {30: "Z", 31: "Y"}):
+        frame, seen = dict(fault), 0
+        for chunk in chunks:
+            if seen + len(chunk) > start:
+                frame = propagate_final(chunk, frame, max(0, start - seen))
+            seen += len(chunk)
+        assert frame == propagate_final(whole, fault, start)
+    print("PASS: chunks propagate like the whole program")
+
+
+def main():
+    print("Stim Loader Test Suite")
+    print("=" * 50)
+    try:
+        test_matches_compile_stim_program()
+        test_text_format_details()
+        test_chunks_propagate_like_the_whole_program()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All loader tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
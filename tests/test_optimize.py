@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Clifford peephole optimizer.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spidertrace.circuit import Gate
+from spidertrace.compiled import compile_stim_program
+from spidertrace.optimize import optimize_circuit
+from spidertrace.schedule import LayeredCircuit, schedule_layers
+from spidertrace.tableau import SuffixTableaux, Tableau
+import qec_zx_dataset as qzx
+
+
+def test_rewrites():
+    """Self-inverse pairs cancel through disjoint gates and H-CZ-H becomes CNOT"""
+    circuit = [Gate("H", (0,)), Gate("CNOT", (1, 2)), Gate("H", (3,)), Gate("H", (0,))]
+    assert optimize_circuit(circuit) == [Gate("CNOT", (1, 2)), Gate("H", (3,))]
+    circuit = [Gate("H", (0,)), Gate("CNOT", (0, 1)), Gate("CNOT", (0, 1)), Gate("H", (0,))]
+    assert optimize_circuit(circuit) == []
+    assert optimize_circuit([Gate("CZ", (0, 1)), Gate("CZ", (1, 0))]) == []
+    circuit = [Gate("H", (1,)), Gate("H", (2,)), Gate("CZ", (0, 1)), Gate("H", (1,))]
+    assert optimize_circuit(circuit) == [Gate("H", (2,)), Gate("CNOT", (0, 1))]
+    # a reset or a shared qubit blocks the rewrite
+    blocked = [Gate("H", (0,)), Gate("R", (0,)), Gate("H", (0,)),
+               Gate("CNOT", (0, 1)), Gate("H", (1,)), Gate("CNOT", (0, 1))]
+    assert optimize_circuit(blocked) == blocked
+    print("PASS: peephole rewrites")
+
+
+def test_preserves_propagation():
+    """Random circuits keep the exact GF(2) map, resets included"""
+    rng = random.Random(7)
+    kinds = ["H", "H", "H", "CNOT", "CZ", "R", "MR", "M", "RX"]
+    for _ in range(200):
+        n = rng.randint(2, 5)
+        circuit = []
+        for _ in range(rng.randint(0, 60)):
+            name = rng.choice(kinds)
+            if name in ("CNOT", "CZ"):
+                circuit.append(Gate(name, tuple(rng.sample(range(n), 2))))
+            else:
+                circuit.append(Gate(name, (rng.randrange(n),)))
+        optimized = optimize_circuit(circuit, num_qubits=n)
+        assert len(optimized) <= len(circuit)
+        assert Tableau.from_circuit(optimized, n) == Tableau.from_circuit(circuit, n)
+    print("PASS: optimizer preserves propagation")
+
+
+def test_programs_keep_ticks():
+    """Programs keep every per-tick suffix map, their detectors and their layering type"""
+    program = compile_stim_program(qzx.build_circuit(3, 0.01).without_noise())
+    optimized = optimize_circuit(program)
+    assert optimized.detectors == program.detectors
+    assert len(optimized.ticks) == len(program.ticks)
+    before, after = SuffixTableaux(program), SuffixTableaux(optimized)
+    for tick in range(len(program.ticks) + 1):
+        assert before[tick] == after[tick], tick
+    assert isinstance(optimize_circuit(schedule_layers(program)), LayeredCircuit)
+    print("PASS: programs keep ticks")
+
+
+def main():
+    print("Peephole Optimizer Test Suite")
+    print("=" * 50)
+    try:
+        test_rewrites()
+        test_preserves_propagation()
+        test_programs_keep_ticks()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All peephole optimizer tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the noisy Pauli-frame sampler, cross-checked against stim.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import stim
+
+from spidertrace.compiled import compile_stim_program
+from spidertrace.engine import propagate_final
+from spidertrace.frame import PAULI_CODES
+from spidertrace.sampler import FrameSampler, _sparse_hits
+import qec_zx_dataset as qzx
+
+
+def _close(ours, theirs, shots, sigmas=5.0):
+    # two independent binomial estimates of the same rates
+    se = np.sqrt(np.maximum(theirs * (1 - theirs), 1 / shots) * 2 / shots)
+    return (np.abs(ours - theirs) <= sigmas * se).all()
+
+
+def _with_faults(circuit: stim.Circuit, line: str) -> stim.Circuit:
+    """Inserts ``line`` before the first CX layer."""
+    return stim.Circuit(str(circuit).replace("TICK\nCX", f"TICK\n{line}\nCX", 1))
+
+
+def test_deterministic_faults_match_stim():
+    """Probability-1 faults and measurement flips give stim's exact samples and frames"""
+    noiseless = qzx.build_circuit(3, 0.0).without_noise()
+    for line in ("X_ERROR(1) 3", "Y_ERROR(1) 9\nZ_ERROR(1) 10", "PAULI_CHANNEL_1(0, 0, 1) 2 17"):
+        circuit = _with_faults(noiseless, line)
+        result = FrameSampler(circuit).sample(70, seed=0, frames=True)
+        det, obs = circuit.compile_detector_sampler().sample(70, separate_observables=True)
+        assert np.array_equal(result.detectors, det), line
+        assert np.array_equal(result.observables, obs), line
+        assert det.any() or obs.any()
+    # the final frames are the propagated fault
+    circuit = _with_faults(noiseless, "X_ERROR(1) 3")
+    result = FrameSampler(circuit).sample(5, frames=True)
+    start = FrameSampler(circuit).channels[0].position
+    final = propagate_final(compile_stim_program(noiseless), {3: "X"}, start)
+    expected = np.zeros(result.frames.shape[1], dtype=np.uint8)
+    for q, p in final.items():
+        expected[q] = PAULI_CODES.index(p)
+    assert (result.frames == expected).all()
+    # a noisy measurement result flips the record, not the frame
+    circuit = stim.Circuit(str(noiseless).replace("MR ", "MR(1) ", 1))
+    det = circuit.compile_detector_sampler().sample(3)
+    assert det.any()
+    assert np.array_equal(FrameSampler(circuit).sample(3).detectors, det)
+    print("PASS: deterministic faults match stim")
+
+
+def test_rates_match_stim():
+    """Detector and observable rates agree with stim's sampler for build_circuit noise"""
+    shots = 40000
+    for basis in "zx":
+        circuit = qzx.build_circuit(3, 0.01, basis=basis)
+        result = FrameSampler(circuit).sample(shots, seed=1)
+        det, obs = circuit.compile_detector_sampler(seed=2).sample(shots, separate_observables=True)
+        assert result.detectors.shape == det.shape
+        assert _close(result.detectors.mean(axis=0), det.mean(axis=0), shots), basis
+        assert _close(result.observables.mean(axis=0), obs.mean(axis=0), shots), basis
+    print("PASS: rates match stim")
+
+
+def test_uniform_locations_match_stim():
+    """Uniform per-location noise on a noiseless program matches stim's generated noise"""
+    shots = 40000
+    circuit = stim.Circuit.generated("surface_code:rotated_memory_z", distance=3, rounds=3,
+                                     after_clifford_depolarization=0.02,
+                                     after_reset_flip_probability=0.01,
+                                     before_measure_flip_probability=0.015)
+    sampler = FrameSampler.uniform(compile_stim_program(circuit.without_noise()),
+                                   after_clifford_depolarization=0.02,
+                                   after_reset_flip_probability=0.01,
+                                   before_measure_flip_probability=0.015)
+    ours = sampler.sample(shots, seed=3).detectors.mean(axis=0)
+    theirs = circuit.compile_detector_sampler(seed=4).sample(shots).mean(axis=0)
+    assert _close(ours, theirs, shots)
+    print("PASS: uniform locations match stim")
+
+
+def test_sparse_hits():
+    """Geometric-gap sampling has the Bernoulli mean and stays in range"""
+    rng = np.random.default_rng(0)
+    hits = _sparse_hits(rng, 1_000_000, 0.003)
+    assert abs(len(hits) - 3000) < 5 * np.sqrt(3000)
+    assert (np.diff(hits) > 0).all() and hits[0] >= 0 and hits[-1] < 1_000_000
+    assert len(_sparse_hits(rng, 10, 1.0)) == 10 and len(_sparse_hits(rng, 10, 0.0)) == 0
+    print("PASS: sparse hits")
+
+
+def main():
+    print("Frame Sampler Test Suite")
+    print("=" * 50)
+    try:
+        test_deterministic_faults_match_stim()
+        test_rates_match_stim()
+        test_uniform_locations_match_stim()
+        test_sparse_hits()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All frame sampler tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the layer scheduler and vectorized per-layer application.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from spidertrace.circuit import Gate
+from spidertrace.engine import propagate_errors, propagate_errors_batch, propagate_frame
+from spidertrace.error import PauliError
+from spidertrace.schedule import schedule_layers
+from tests.helpers import random_circuit
+
+
+def test_layers_are_qubit_disjoint():
+    """Every layer touches each qubit at most once and no gate is lost"""
+    rng = random.Random(3)
+    layered = schedule_layers(random_circuit(rng, 10, 300))
+    total = 0
+    for layer in layered.layers:
+        qubits = np.concatenate([layer.h, layer.cnot_c, layer.cnot_t, layer.cz_a, layer.cz_b])
+        assert len(qubits) == len(set(qubits.tolist())), f"overlapping layer: {qubits}"
+        total += len(layer)
+    assert total == 300
+    print("PASS: layers are qubit-disjoint")
+
+
+def test_depth():
+    """Parallel gates share a layer; dependent gates do not"""
+    circuit = [Gate("H", (0,)), Gate("H", (1,)), Gate("CNOT", (0, 1)),
+               Gate("CZ", (2, 3)), Gate("H", (1,))]
+    layered = schedule_layers(circuit)
+    assert layered.depth == 3, f"expected depth 3, got {layered.depth}"
+    assert len(layered.layers[0]) == 3       # H0, H1, CZ23
+    print("PASS: ASAP depth")
+
+
+def test_layered_matches_reference():
+    """Layered single-frame and batch propagation match the dict engine"""
+    rng = random.Random(11)
+    for _ in range(10):
+        circuit = random_circuit(rng, 16, 250)
+        layered = schedule_layers(circuit)
+        errors = [PauliError(q, rng.choice("XYZ")) for q in rng.sample(range(16), 3)]
+        expected = propagate_errors(circuit, errors)[-1].errors_after
+        assert propagate_frame(layered, errors).to_dict() == expected
+
+        codes = np.zeros((1, 16), dtype=np.uint8)
+        for e in errors:
+            codes[0, e.qubit] = "IXYZ".index(e.type)
+        final = propagate_errors_batch(layered, codes)[0]
+        assert {q: "IXYZ"[c] for q, c in enumerate(final) if c} == expected
+    print("PASS: layered propagation matches reference")
+
+
+def main():
+    print("Layer Scheduler Test Suite")
+    print("=" * 50)
+    try:
+        test_layers_are_qubit_disjoint()
+        test_depth()
+        test_layered_matches_reference()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All scheduler tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
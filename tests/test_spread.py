@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the exhaustive single-fault spread table.
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spidertrace.circuit import Gate
+from spidertrace.compiled import compile_stim_program
+from spidertrace.engine import propagate_final
+from spidertrace.frame import PAULI_CODES
+from spidertrace.spread import fault_spread
+import qec_zx_dataset as qzx
+
+
+def test_matches_propagation():
+    """Every row's weights are those of the fault propagated through the program"""
+    circuit = qzx.build_circuit(3, 0.01)
+    program = compile_stim_program(circuit)
+    spread = fault_spread(program)
+    data = set(qzx._data_qubits(circuit))
+    assert set(spread.data_qubits.tolist()) == data
+    assert len(spread) == 3 * (len(program) + int((program.q1 >= 0).sum()))
+    for k in range(len(spread)):
+        pauli = PAULI_CODES[spread.pauli[k]]
+        final = propagate_final(program, {int(spread.qubit[k]): pauli}, int(spread.position[k]))
+        assert spread.weight[k] == len(final), k
+        assert spread.data_weight[k] == sum(q in data for q in final), k
+        assert spread.hook[k] == (spread.qubit[k] not in data and spread.data_weight[k] >= 2)
+        assert spread.row(int(spread.position[k]), int(spread.qubit[k]), pauli) == k
+    assert spread.hook.any() and spread.histogram().sum() == len(spread)
+    print("PASS: matches propagation")
+
+
+def test_hook_errors_and_lookup():
+    """An ancilla X between the CNOTs of a weight-3 check spreads to the data qubits left"""
+    circuit = [Gate("CNOT", (0, 1)), Gate("CNOT", (0, 2)), Gate("CNOT", (0, 3)),
+               Gate("M", (1,)), Gate("M", (2,)), Gate("M", (3,))]
+    spread = fault_spread(circuit)
+    assert spread.data_qubits.tolist() == [1, 2, 3]
+    x_on_ancilla = [spread.row(p, 0, "X") for p in range(3)]
+    assert spread.data_weight[x_on_ancilla].tolist() == [3, 2, 1]
+    assert spread.hook[x_on_ancilla].tolist() == [True, True, False]
+    # Z on the ancilla never reaches the data; faults after the last gate on a
+    # qubit are not rows; a fault after gate p is the row before the next one
+    assert spread.data_weight[spread.row(0, 0, "Z")] == 0
+    assert spread.row(3, 0, "X") == -1
+    assert spread.row(1, 1, "X") == spread.row(3, 1, "X")
+    assert set(spread.hooks()) == {k for k in range(len(spread)) if spread.hook[k]}
+    try:
+        fault_spread(circuit[:3])
+    except ValueError:
+        print("PASS: hook errors and lookup")
+        return
+    raise AssertionError("expected ValueError without a final readout")
+
+
+def main():
+    print("Fault Spread Test Suite")
+    print("=" * 50)
+    try:
+        test_matches_propagation()
+        test_hook_errors_and_lookup()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All fault spread tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
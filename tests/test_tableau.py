@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Unit tests for GF(2) tableaux and per-tick suffix tableaux.
+"""
+
+import sys
+import os
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import stim
+
+from spidertrace.circuit import Gate
+from spidertrace.dem import sweep_error_model
+from spidertrace.engine import propagate_final
+from spidertrace.tableau import BasisImageTable, SuffixTableaux, Tableau
+from tests.helpers import random_circuit
+import qec_zx_dataset as qzx
+
+
+def test_single_gate_matrices():
+    """CNOT's matrix maps X_c -> X_c X_t and Z_t -> Z_c Z_t"""
+    m = Tableau.from_circuit([Gate("CNOT", (0, 1))]).matrix()
+    # basis order [x0, x1, z0, z1]; column j is the image of basis j
+    assert m[:, 0].tolist() == [1, 1, 0, 0]
+    assert m[:, 3].tolist() == [0, 0, 1, 1]
+    assert m[:, 1].tolist() == [0, 1, 0, 0]
+    print("PASS: CNOT tableau columns")
+
+
+def test_tableau_matches_engine():
+    """Tableau images equal propagate_final and the map is symplectic"""
+    rng = random.Random(4)
+    for _ in range(20):
+        circuit = random_circuit(rng, 9, 120)
+        tab = Tableau.from_circuit(circuit, num_qubits=9)
+        assert tab.is_symplectic()
+        errors = {q: rng.choice("XYZ") for q in rng.sample(range(9), 3)}
+        assert tab.apply(errors) == propagate_final(circuit, errors)
+    print("PASS: tableau matches engine")
+
+
+def test_matrix_vector_product():
+    """matrix() acts on column vectors: v' = M v (mod 2)"""
+    rng = random.Random(6)
+    circuit = random_circuit(rng, 5, 40)
+    tab = Tableau.from_circuit(circuit, num_qubits=5)
+    v = np.zeros(10, dtype=np.int64)
+    v[2] = 1            # X on qubit 2
+    v[5 + 4] = 1        # Z on qubit 4
+    out = (tab.matrix().astype(np.int64) @ v) % 2
+    expected = propagate_final(circuit, {2: "X", 4: "Z"})
+    x, z = out[:5], out[5:]
+    got = {q: {(1, 0): "X", (0, 1): "Z", (1, 1): "Y"}[(x[q], z[q])]
+           for q in range(5) if x[q] or z[q]}
+    assert got == expected, f"{got} != {expected}"
+    print("PASS: dense matrix-vector product")
+
+
+def test_suffix_tableaux_match_reference():
+    """TableauZXPropagator agrees with stim's FlipSimulator at tick boundaries"""
+    circuit = qzx.build_circuit(3, 0.01)
+    matches, trials = qzx.validate_adapter(3, 0.01, n_trials=60, seed=2,
+                                           adapter_cls=qzx.TableauZXPropagator)
+    assert matches == trials, f"{matches}/{trials}"
+    adapter = qzx.SpiderTraceAdapter(circuit)
+    tables = qzx.TableauZXPropagator(circuit)
+    for tick in range(0, adapter.num_ticks + 1, 3):
+        for q in (1, 2, 9):
+            for pl in (1, 2, 3):
+                assert adapter.propagate([q], [pl], tick) == tables.propagate([q], [pl], tick)
+    print("PASS: suffix tableaux match adapter and reference")
+
+
+def test_basis_image_table_positions():
+    """Per-position images equal a tableau of the remaining operations"""
+    rng = random.Random(8)
+    adapter = qzx.SpiderTraceAdapter(qzx.build_circuit(3, 0.01))
+    n = adapter.N
+    table = BasisImageTable(adapter.program)
+    suffixes = SuffixTableaux(adapter.program)
+    ops, q0, q1 = adapter.program.instruction_lists()
+    for _ in range(15):
+        position = rng.randrange(table.num_positions + 1)
+        tab = Tableau.identity(n)
+        for i in range(table.num_positions - 1, position - 1, -1):
+            tab.prepend_gate(ops[i], q0[i], q1[i])
+        errors = {q: rng.choice("XYZ") for q in rng.sample(range(n), 3)}
+        assert table.propagate(errors, position) == tab.apply(errors)
+    for tick in range(adapter.num_ticks + 1):
+        errors = {q: rng.choice("XYZ") for q in rng.sample(range(n), 2)}
+        assert table.propagate_tick(errors, tick) == suffixes.propagate(errors, tick)
+    print("PASS: basis-image table positions")
+
+
+def test_exact_fault_locations():
+    """Gate and reset faults are injected after their gate, not at the tick start"""
+    circuit = qzx.build_circuit(3, 0.01)
+    ref = qzx.ReferenceZXPropagator(circuit)
+    exact = qzx.BasisImageZXPropagator(circuit)
+    explained = circuit.explain_detector_error_model_errors(
+        reduce_to_one_representative_error=True)
+    moved = 0
+    for e in explained:
+        loc = e.circuit_error_locations[0]
+        targets = [g.gate_target for g in loc.flipped_pauli_product]
+        if loc.instruction_targets.gate != "DEPOLARIZE2" or not targets:
+            continue
+        qubits = [t.qubit_value for t in targets]
+        paulis = [1 if t.is_x_target else (2 if t.is_y_target else 3) for t in targets]
+        # DEPOLARIZE2 follows its CX layer, i.e. sits just before the next TICK
+        got = exact.propagate_location(qubits, paulis, loc)
+        assert got == ref.propagate(qubits, paulis, loc.tick_offset + 1)
+        moved += got != exact.propagate(qubits, paulis, loc.tick_offset)
+    assert moved > 0
+    print("PASS: exact fault locations")
+
+
+def test_fault_locations_with_generic_cliffords():
+    """S and SWAP operations count towards fault positions, as in sweep_error_model"""
+    circuit = stim.Circuit()
+    for instr in qzx.build_circuit(3, 0.01).flattened():
+        # identity S / S_DAG and SWAP / SWAP pairs with noise in between
+        if instr.name == "H":
+            targets = instr.targets_copy()
+            circuit.append("S", targets)
+            circuit.append("DEPOLARIZE1", targets, 0.01)
+            circuit.append("S_DAG", targets)
+        elif instr.name == "MR":
+            qs = [t.qubit_value for t in instr.targets_copy()]
+            pairs = [q for pair in zip(qs[0::2], qs[1::2]) for q in pair]
+            circuit.append("SWAP", pairs)
+            circuit.append("DEPOLARIZE2", pairs, 0.01)
+            circuit.append("SWAP", pairs)
+        circuit.append(instr)
+    exact = qzx.BasisImageZXPropagator(circuit)
+    locations = {}
+    for e in circuit.explain_detector_error_model_errors():
+        terms = [t.dem_target for t in e.dem_error_terms]
+        key = (tuple(sorted(t.val for t in terms if t.is_relative_detector_id())),
+               tuple(sorted(t.val for t in terms if t.is_logical_observable_id())))
+        locations[key] = e.circuit_error_locations
+    # the sweep's representative of every mechanism is one of stim's
+    # locations for it, at the same program position
+    model = sweep_error_model(circuit)
+    checked = 0
+    for i in range(len(model)):
+        if not model.faults[i]:
+            continue                                # measurement flips
+        key = (tuple(model.detectors[i]), tuple(model.observables[i]))
+        assert any(exact.location_position(loc) == model.positions[i]
+                   and {g.gate_target.qubit_value: g.gate_target.pauli_type
+                        for g in loc.flipped_pauli_product} == model.faults[i]
+                   for loc in locations[key]), f"error {i}"
+        checked += 1
+    assert checked > 100
+    print("PASS: fault locations with generic cliffords")
+
+
+def main():
+    print("Tableau Test Suite")
+    print("=" * 50)
+    try:
+        test_single_gate_matrices()
+        test_tableau_matches_engine()
+        test_matrix_vector_product()
+        test_suffix_tableaux_match_reference()
+        test_basis_image_table_positions()
+        test_exact_fault_locations()
+        test_fault_locations_with_generic_cliffords()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All tableau tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)
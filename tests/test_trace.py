@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the delta-encoded and streaming trace modes of propagate_errors.
+"""
+
+import sys
+import os
+import random
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spidertrace.circuit import Gate
+from spidertrace.compiled import compile_circuit
+from spidertrace.engine import propagate_errors
+from spidertrace.error import PauliError
+from tests.helpers import random_circuit
+
+
+def _setup(seed=21):
+    rng = random.Random(seed)
+    circuit = random_circuit(rng, 10, 200)
+    errors = [PauliError(q, rng.choice("XYZ")) for q in rng.sample(range(10), 2)]
+    return circuit, errors
+
+
+def test_delta_matches_full():
+    """Every step of a DeltaTrace equals the full trace, by index and by iteration"""
+    circuit, errors = _setup()
+    full = propagate_errors(circuit, errors)
+    for interval in (1, 7, 64, 1000):
+        delta = propagate_errors(circuit, errors, trace_mode="delta",
+                                 checkpoint_interval=interval)
+        assert len(delta) == len(full)
+        for i in (0, 5, 63, 64, 150, len(full) - 1, -1, -2):
+            assert delta[i].errors_after == full[i].errors_after, f"step {i}"
+            assert delta[i].gate is full[i].gate
+        assert [s.errors_after for s in delta] == [s.errors_after for s in full]
+        assert delta.final == full[-1].errors_after
+    print("PASS: delta trace matches full trace")
+
+
+def test_delta_stores_only_changes():
+    """Steps that do not touch the frame record an empty delta"""
+    circuit = [Gate("H", (5,)), Gate("CNOT", (0, 1)), Gate("CZ", (2, 3))]
+    trace = propagate_errors(circuit, [PauliError(0, "X")], trace_mode="delta")
+    assert trace.deltas == [(), ((1, "X"),), ()], f"got {trace.deltas}"
+    print("PASS: delta records only changed qubits")
+
+
+def test_stream_is_lazy_and_matches():
+    """Stream mode yields the same steps from a generator"""
+    circuit, errors = _setup(8)
+    stream = propagate_errors(compile_circuit(circuit), errors, trace_mode="stream")
+    assert isinstance(stream, types.GeneratorType)
+    full = propagate_errors(circuit, errors)
+    for step, ref in zip(stream, full):
+        assert step.errors_after == ref.errors_after
+        assert step.gate == ref.gate
+    print("PASS: stream mode matches full trace")
+
+
+def test_bad_mode():
+    """Unknown trace modes are rejected"""
+    try:
+        propagate_errors([Gate("H", (0,))], [], trace_mode="sparse")
+    except ValueError:
+        print("PASS: unknown trace mode rejected")
+        return
+    raise AssertionError("expected ValueError")
+
+
+def main():
+    print("Trace Mode Test Suite")
+    print("=" * 50)
+    try:
+        test_delta_matches_full()
+        test_delta_stores_only_changes()
+        test_stream_is_lazy_and_matches()
+        test_bad_mode()
+        print("\n" + "=" * 50)
+        print("SUCCESS: All trace mode tests passed!")
+    except AssertionError as e:
+        print(f"\nFAIL: {e}")
+        import traceback
+        traceback.print_exc()
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    sys.exit(0 if success else 1)